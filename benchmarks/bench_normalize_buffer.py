@@ -0,0 +1,90 @@
+"""Measure the time spent to normalize the output received from the session.
+
+Usage: PYTHONPATH=. python benchmarks/bench_normalize_buffer.py [size_mb ...]
+
+For every output size prints the time per MB to normalize the output chunk by
+chunk with the previous implementation of normalize_buffer, with the current
+normalize_buffer, with BufferNormalizer used by the sessions and with
+TerminalNormalizer used by the sessions with the terminal model, for the output
+with colors and CR LF and for the plain output.
+"""
+import re
+import sys
+import timeit
+
+from cloudshell.cli.session.helper.normalize_buffer import (
+    BufferNormalizer,
+    TerminalNormalizer,
+    normalize_buffer,
+)
+
+CHUNK_SIZE = 4096
+LINE = (
+    "\x1b[1;32minterface\x1b[0m GigabitEthernet0/1 is up, "
+    "line protocol is up\r\n  Description: uplink to the core switch\r\n"
+)
+
+
+def previous_normalize_buffer(input_buffer):
+    color_pattern = re.compile(
+        r"\[[0-9]+;{0,1}[0-9]+m|\[[0-9]+m|\b|" + chr(27)
+    )  # 27 - ESC character
+
+    result_buffer = ""
+
+    match_iter = color_pattern.finditer(input_buffer)
+
+    current_index = 0
+    for match_color in match_iter:
+        match_range = match_color.span()
+        result_buffer += input_buffer[current_index : match_range[0]]
+        current_index = match_range[1]
+
+    result_buffer += input_buffer[current_index:]
+
+    result_buffer = result_buffer.replace("\r\n", "\n")
+
+    return re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\xff]", "", result_buffer)
+
+
+def generate_chunks(size):
+    output = (LINE * (size // len(LINE) + 1))[:size]
+    return [output[i : i + CHUNK_SIZE] for i in range(0, len(output), CHUNK_SIZE)]
+
+
+def normalize_chunks(chunks, normalizer):
+    for chunk in chunks:
+        normalizer.normalize(chunk)
+    normalizer.flush()
+
+
+def main(sizes_mb):
+    columns = ("previous", "current", "incremental", "terminal", "terminal plain")
+    header = ("{:>8}" + " {:>16}" * len(columns)).format("size", *columns)
+    print(header)  # noqa: T001
+    for size_mb in sizes_mb:
+        chunks = generate_chunks(int(size_mb * 1024 * 1024))
+        plain_chunks = [normalize_buffer(chunk) for chunk in chunks]
+        times = [
+            timeit.timeit(lambda: [func(chunk) for chunk in chunks], number=1)
+            for func in (previous_normalize_buffer, normalize_buffer)
+        ]
+        for normalizer_class, normalizer_chunks in (
+            (BufferNormalizer, chunks),
+            (TerminalNormalizer, chunks),
+            (TerminalNormalizer, plain_chunks),
+        ):
+            times.append(
+                timeit.timeit(
+                    lambda: normalize_chunks(normalizer_chunks, normalizer_class()),
+                    number=1,
+                )
+            )
+        row = ("{:>6}MB" + " {:>16}" * len(times)).format(
+            size_mb, *("{:.1f} ms/MB".format(t * 1000 / size_mb) for t in times)
+        )
+        print(row)  # noqa: T001
+
+
+if __name__ == "__main__":
+    main([float(size) for size in sys.argv[1:]] or [1, 10])
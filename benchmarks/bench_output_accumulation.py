@@ -0,0 +1,212 @@
+"""Measure memory and time spent to collect big outputs in hardware_expect.
+
+Usage: PYTHONPATH=. python benchmarks/bench_output_accumulation.py [size_mb ...]
+
+For every output size prints the time and the peak of memory allocated by
+hardware_expect, by the loop of the previous hardware_expect implementation and
+by collecting the chunks with OutputBuffer. Memory is shown in output sizes, so
+it is the count of full copies of the output alive at the same time.
+
+Then prints the allocation counts traced with tracemalloc: the count of reads
+followed by an allocation bigger than COPY_THRESHOLD, i.e. a copy of the
+collected output, and the total size of these allocations in output sizes.
+CPython resizes a string appended to in place if nothing else refers to it, so
+such copies aren't counted. tracemalloc.reset_peak requires Python 3.9. The
+previous loop searches the whole output on every read, it takes minutes for
+100 MB.
+"""
+import logging
+import re
+import sys
+import timeit
+import tracemalloc
+
+from cloudshell.cli.session.expect_session import ExpectSession
+from cloudshell.cli.session.helper.normalize_buffer import normalize_buffer
+from cloudshell.cli.session.helper.output_buffer import OutputBuffer
+from cloudshell.cli.session.session_exceptions import SessionReadTimeout
+
+CHUNK_SIZE = 4096
+# chunks are normalized and searched in small copies, bigger allocations are
+# copies of the collected output
+COPY_THRESHOLD = 16 * CHUNK_SIZE
+COMMAND = "show running-config"
+PROMPT = "switch#"
+LINE = "interface GigabitEthernet0/1 description uplink to the core switch\n"
+
+
+class FakeSession(ExpectSession):
+    """Session returning the generated output chunk by chunk."""
+
+    def __init__(self, chunks):
+        super(FakeSession, self).__init__(clear_buffer_timeout=0)
+        self._chunks = chunks
+        self._counter = None
+        self._sent = False
+        self._timeout_next = False
+
+    def _initialize_session(self, prompt, logger):
+        pass
+
+    def _connect_actions(self, prompt, logger):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def _send(self, command, logger):
+        self._sent = True
+
+    def _receive(self, timeout, logger):
+        # every chunk is followed by the read timeout as on a real device
+        if not self._sent or self._timeout_next or not self._chunks:
+            self._timeout_next = False
+            raise SessionReadTimeout()
+        self._timeout_next = True
+        if self._counter is not None:
+            self._counter.step()
+        return self._chunks.pop()
+
+
+def generate_chunks(size):
+    lines = LINE * (size // len(LINE) + 1)
+    output = COMMAND + "\n" + lines[:size] + PROMPT
+    chunks = [output[i : i + CHUNK_SIZE] for i in range(0, len(output), CHUNK_SIZE)]
+    chunks.reverse()
+    return chunks
+
+
+def measure(func, *args):
+    """Return the result, duration and peak of memory allocated by the call."""
+    tracemalloc.start()
+    start = timeit.default_timer()
+    result = func(*args)
+    duration = timeit.default_timer() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, duration, peak
+
+
+class AllocationCounter(object):
+    """Count the steps allocating more memory than the threshold."""
+
+    def __init__(self, threshold=COPY_THRESHOLD):
+        self._threshold = threshold
+        self._current = 0
+        self.count = 0
+        self.size = 0
+
+    def start(self):
+        tracemalloc.start()
+        self._mark()
+
+    def stop(self):
+        self.step()
+        tracemalloc.stop()
+
+    def _mark(self):
+        self._current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+    def step(self):
+        """Count the memory allocated since the previous step."""
+        _, peak = tracemalloc.get_traced_memory()
+        allocated = peak - self._current
+        if allocated > self._threshold:
+            self.count += 1
+            self.size += allocated
+        self._mark()
+
+
+def count_allocations(func, *args):
+    """Return the result and the allocation counter of the call.
+
+    The call gets the counter as the last argument.
+    """
+    counter = AllocationCounter()
+    counter.start()
+    result = func(*args + (counter,))
+    counter.stop()
+    return result, counter
+
+
+def previous_hardware_expect_loop(chunks, counter=None):
+    """Collect the output as the previous hardware_expect implementation did."""
+    command_pattern = r"\s*" + re.escape(COMMAND).replace(r"\ ", r"\s+") + r"\s*"
+    remove_command_from_output = True
+    output_list = []
+    output_str = ""
+    for chunk in chunks:
+        read_buffer = normalize_buffer(chunk)
+        output_str += read_buffer
+        if remove_command_from_output and re.search(
+            command_pattern, output_str, flags=re.MULTILINE
+        ):
+            output_str = re.sub(
+                command_pattern, "", output_str, count=1, flags=re.MULTILINE
+            )
+            remove_command_from_output = False
+        if counter is not None:
+            counter.step()
+        if re.search(PROMPT, output_str, re.DOTALL):
+            output_list.append(output_str)
+            break
+    return "".join(output_list)
+
+
+def collect_chunks(chunks, counter=None):
+    output = OutputBuffer()
+    for chunk in chunks:
+        output.write(chunk)
+        if counter is not None:
+            counter.step()
+    return output.getvalue()
+
+
+def hardware_expect(session, counter=None):
+    session._counter = counter
+    return session.hardware_expect(COMMAND, PROMPT, logging.getLogger("benchmark"))
+
+
+def format_allocations(name, output, counter):
+    return "{} {:6} allocations {:6.2f}x".format(
+        name, counter.count, float(counter.size) / len(output)
+    )
+
+
+def run(size_mb):
+    size = size_mb * 1024 * 1024
+    output, duration, peak = measure(
+        hardware_expect, FakeSession(generate_chunks(size))
+    )
+    line = "{:>4} MB: hardware_expect {:7.2f}s {:5.2f}x".format(
+        size_mb, duration, float(peak) / len(output)
+    )
+    output, counter = count_allocations(
+        hardware_expect, FakeSession(generate_chunks(size))
+    )
+    allocations_line = "{:>4} MB: {}".format(
+        size_mb, format_allocations("hardware_expect", output, counter)
+    )
+
+    for name, collect in (
+        ("previous", previous_hardware_expect_loop),
+        ("buffer", collect_chunks),
+    ):
+        chunks = generate_chunks(size)
+        chunks.reverse()
+        output, duration, peak = measure(collect, chunks)
+        line += ", {} {:7.2f}s {:5.2f}x".format(
+            name, duration, float(peak) / len(output)
+        )
+        chunks = generate_chunks(size)
+        chunks.reverse()
+        output, counter = count_allocations(collect, chunks)
+        allocations_line += ", " + format_allocations(name, output, counter)
+    print(line)  # noqa: T001
+    print(allocations_line)  # noqa: T001
+
+
+if __name__ == "__main__":
+    for size_mb in map(int, sys.argv[1:] or [1, 10, 100]):
+        run(size_mb)
@@ -1,6 +1,12 @@
 import re
 from collections import OrderedDict
 
+from cloudshell.cli.session.helper.pattern_cache import compile_pattern
+
+KEY_PATTERN = re.compile(r"{(\w+)}")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+BRACKETS_PATTERN = re.compile(r"\[|\]")
+
 
 class CommandTemplate:
     def __init__(self, command, action_map=None, error_map=None):
@@ -46,14 +52,17 @@ class CommandTemplate:
 
     def prepare_command(self, **kwargs):
         cmd = self._command
-        keys = re.findall(r"{(\w+)}", self._command)
+        keys = KEY_PATTERN.findall(self._command)
         for key in keys:
             if key not in kwargs or kwargs[key] is None:
-                cmd = re.sub(r"\[[^[]*?{{{key}}}.*?\]".format(key=key), r"", cmd)
+                optional_pattern = compile_pattern(
+                    r"\[[^[]*?{{{key}}}.*?\]".format(key=key)
+                )
+                cmd = optional_pattern.sub(r"", cmd)
 
         if not cmd:
             raise Exception(self.__class__.__name__, "Unable to prepare command")
 
-        cmd = re.sub(r"\s+", " ", cmd).strip(" \t\n\r")
-        result = re.sub(r"\[|\]", "", cmd).format(**kwargs)
+        cmd = WHITESPACE_PATTERN.sub(" ", cmd).strip(" \t\n\r")
+        result = BRACKETS_PATTERN.sub("", cmd).format(**kwargs)
         return result
@@ -4,6 +4,7 @@ import sys
 from abc import ABCMeta, abstractmethod
 
 from cloudshell.cli.service.cli import CLI
+from cloudshell.cli.session.ssh_exec_session import SSHExecSession
 from cloudshell.cli.session.ssh_session import SSHSession
 from cloudshell.cli.session.telnet_session import TelnetSession
 
@@ -17,19 +18,31 @@ else:
 
 class CLIServiceConfigurator(object):
     REGISTERED_SESSIONS = (SSHSession, TelnetSession)
-
-    def __init__(self, resource_config, logger, cli=None, registered_sessions=None):
+    # selected by the connection type only, not tried as the auto fallback
+    SELECTABLE_SESSIONS = (SSHExecSession,)
+
+    def __init__(
+        self,
+        resource_config,
+        logger,
+        cli=None,
+        registered_sessions=None,
+        ssh_tuning_profile=None,
+    ):
         """Initialize CLI service configurator.
 
         :param cloudshell.shell.standards.resource_config_generic_models.GenericCLIConfig resource_config:  # noqa: E501
         :param logging.Logger logger:
         :param cloudshell.cli.service.cli.CLI cli:
         :param registered_sessions: Session types and order
+        :param cloudshell.cli.session.helper.ssh_tuning_profile.SSHTuningProfile ssh_tuning_profile:  # noqa: E501
+            transport settings of the SSH sessions
         """
         self._cli = cli or CLI()
         self._resource_config = resource_config
         self._logger = logger
         self._registered_sessions = registered_sessions or self.REGISTERED_SESSIONS
+        self._ssh_tuning_profile = ssh_tuning_profile
 
     @property
     def _username(self):
@@ -52,13 +65,16 @@ class CLIServiceConfigurator(object):
 
     @property
     def _cli_type(self):
-        """Connection type property [ssh|telnet|console|auto]."""
+        """Connection type property [ssh|telnet|ssh_exec|console|auto]."""
         return self._resource_config.cli_connection_type
 
     @property
     @lru_cache()
     def _session_dict(self):
-        return {sess.SESSION_TYPE.lower(): [sess] for sess in self._registered_sessions}
+        return {
+            sess.SESSION_TYPE.lower(): [sess]
+            for sess in self.SELECTABLE_SESSIONS + tuple(self._registered_sessions)
+        }
 
     def _on_session_start(self, session, logger):
         """Perform some default commands when session just opened.
@@ -78,9 +94,17 @@ class CLIServiceConfigurator(object):
             "on_session_start": self._on_session_start,
         }
 
+    def _get_session_kwargs(self, session_type):
+        kwargs = self._session_kwargs
+        if self._ssh_tuning_profile is not None and issubclass(
+            session_type, SSHSession
+        ):
+            kwargs = dict(kwargs, tuning_profile=self._ssh_tuning_profile)
+        return kwargs
+
     def _defined_sessions(self):
         return [
-            sess(**self._session_kwargs)
+            sess(**self._get_session_kwargs(sess))
             for sess in self._session_dict.get(
                 self._cli_type.lower(), self._registered_sessions
             )
@@ -1,11 +1,9 @@
-import io
-
-import paramiko
 from cloudshell.core.logger.qs_logger import get_qs_logger
 
 from cloudshell.cli.cli import CLI
 from cloudshell.cli.command_mode import CommandMode
 from cloudshell.cli.command_mode_helper import CommandModeHelper
+from cloudshell.cli.session.helper.ssh_key_cache import PRIVATE_KEYS
 from cloudshell.cli.session.ssh_session import SSHSession
 from cloudshell.cli.session_pool_manager import SessionPoolManager
 
@@ -39,10 +37,7 @@ if __name__ == "__main__":
 
     host = "<AWS-IP>"
 
-    pem_file = open("mykey.pem", "r")
-    key_str = pem_file.read()
-    keyfile = io.StringIO(key_str)
-    mykey = paramiko.RSAKey.from_private_key(keyfile)
+    mykey = PRIVATE_KEYS.from_file("mykey.pem")
 
     modes = CommandModeHelper.create_command_mode(context)
     default_mode = modes[CliCommandMode]
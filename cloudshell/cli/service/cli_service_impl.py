@@ -2,6 +2,8 @@ import re
 
 from cloudshell.cli.service.cli_service import CliService
 from cloudshell.cli.service.command_mode_helper import CommandModeHelper
+from cloudshell.cli.session.helper.pattern_cache import compile_pattern
+from cloudshell.cli.session.helper.tracer import get_tracer
 
 
 class EnterCommandModeContextManager(object):
@@ -54,14 +56,20 @@ class EnterDetachCommandModeContextManager(EnterCommandModeContextManager):
 
         :rtype: CliServiceImpl
         """
-        self._command_mode.step_up(self._cli_service, self._logger)
+        if self._cli_service.session.COMMAND_MODES:
+            self._command_mode.step_up(self._cli_service, self._logger)
+        else:
+            self._cli_service.command_mode = self._command_mode
         return self._cli_service
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if exc_type:  # if we catch an error throw it upper
             return False
 
-        self._command_mode.step_down(self._cli_service, self._logger)
+        if self._cli_service.session.COMMAND_MODES:
+            self._command_mode.step_down(self._cli_service, self._logger)
+        else:
+            self._cli_service.command_mode = self._previous_mode
 
 
 CommandModeContextManager = EnterDetachCommandModeContextManager  # Deprecated
@@ -79,12 +87,19 @@ class CliServiceImpl(CliService):
 
         :type requested_command_mode: cloudshell.cli.command_mode.CommandMode
         """
-        self.command_mode = CommandModeHelper.determine_current_mode(
-            self.session, requested_command_mode, self._logger
-        )
-        self.command_mode.enter_actions(self)
-        self.command_mode.prompt_actions(self, self._logger)
-        self._change_mode(requested_command_mode)
+        with get_tracer().span("cli_service.initialize"):
+            if not self.session.COMMAND_MODES:
+                # mode commands wouldn't apply to the next commands
+                self.command_mode = requested_command_mode
+                return
+            with get_tracer().span("cli_service.determine_current_mode"):
+                self.command_mode = CommandModeHelper.determine_current_mode(
+                    self.session, requested_command_mode, self._logger
+                )
+            self.command_mode.pager_actions(self, self._logger)
+            self.command_mode.enter_actions(self)
+            self.command_mode.prompt_actions(self, self._logger)
+            self._change_mode(requested_command_mode)
 
     def enter_mode(self, command_mode):
         """Enter specified command mode.
@@ -143,9 +158,108 @@ class CliServiceImpl(CliService):
             **kwargs
         )
         if remove_prompt:
-            output = re.sub(
-                r"^.*{}.*$".format(expected_string), "", output, flags=re.MULTILINE
+            output = compile_pattern(
+                r"^.*{}.*$".format(expected_string), re.MULTILINE
+            ).sub("", output)
+        return output
+
+    def send_commands(
+        self,
+        commands,
+        expected_string=None,
+        error_map=None,
+        logger=None,
+        remove_prompt=False,
+        *args,
+        **kwargs
+    ):
+        """Send commands, all at once if the pipeline mode is requested.
+
+        :param list[str] commands:
+        :param expected_string:
+        :param error_map: expected error map applied to every command
+        :type error_map: dict[str, cloudshell.cli.session.session_exceptions.CommandExecutionException|str]  # noqa: E501
+        :param logger:
+        :param remove_prompt:
+        :param args:
+        :param kwargs:
+        :return: Outputs of the commands
+        :rtype: list[str]
+        """
+        if not expected_string:
+            expected_string = self.command_mode.prompt
+
+        if not logger:
+            logger = self._logger
+        self.session.logger = logger
+        outputs = self.session.send_commands(
+            commands,
+            expected_string=expected_string,
+            error_map=error_map,
+            logger=logger,
+            *args,
+            **kwargs
+        )
+        if remove_prompt:
+            prompt_pattern = compile_pattern(
+                r"^.*{}.*$".format(expected_string), re.MULTILINE
+            )
+            outputs = [prompt_pattern.sub("", output) for output in outputs]
+        return outputs
+
+    def send_command_iter(
+        self,
+        command,
+        expected_string=None,
+        action_map=None,
+        error_map=None,
+        logger=None,
+        remove_prompt=False,
+        lines=False,
+        *args,
+        **kwargs
+    ):
+        """Send command and yield the output while it's received.
+
+        The output isn't kept in memory, so it can be parsed, hashed or written
+        to a file while the device is still sending it. The generator has to be
+        consumed to the end to leave the session ready for the next command.
+
+        :param command:
+        :param expected_string:
+        :param action_map:
+        :param error_map: expected error map with subclass of CommandExecutionException
+            or str
+        :type error_map: dict[str, cloudshell.cli.session.session_exceptions.CommandExecutionException|str]  # noqa: E501
+        :param logger:
+        :param remove_prompt: remove lines with the prompt, output is split into lines
+        :param lines: yield complete lines instead of received chunks
+        :param args:
+        :param kwargs:
+        :return: Command output chunks or lines
+        :rtype: collections.Iterable[str]
+        """
+        if not expected_string:
+            expected_string = self.command_mode.prompt
+
+        if not logger:
+            logger = self._logger
+        self.session.logger = logger
+        output = self.session.hardware_expect_iter(
+            command,
+            expected_string=expected_string,
+            action_map=action_map,
+            error_map=error_map,
+            logger=logger,
+            lines=lines or remove_prompt,
+            *args,
+            **kwargs
+        )
+        if remove_prompt:
+            prompt_pattern = compile_pattern(
+                r"^.*{}.*$".format(expected_string), re.MULTILINE
             )
+            output = (prompt_pattern.sub("", line) for line in output)
         return output
 
     def _change_mode(self, requested_command_mode):
@@ -154,7 +268,9 @@ class CliServiceImpl(CliService):
         :param requested_command_mode:
         :type requested_command_mode: CommandMode
         """
-        if requested_command_mode:
+        if requested_command_mode and not self.session.COMMAND_MODES:
+            self.command_mode = requested_command_mode
+        elif requested_command_mode:
             steps = CommandModeHelper.calculate_route_steps(
                 self.command_mode, requested_command_mode
             )
@@ -2,6 +2,7 @@ import re
 
 from cloudshell.cli.service.cli_exception import CliException
 from cloudshell.cli.service.node import Node
+from cloudshell.cli.session.helper.tracer import get_tracer
 
 
 class CommandModeException(CliException):
@@ -25,6 +26,7 @@ class CommandMode(Node):
         parent_mode=None,
         enter_actions=None,
         use_exact_prompt=False,
+        pager_disable_commands=None,
     ):
         """Initialize Command Mode.
 
@@ -47,6 +49,9 @@ class CommandMode(Node):
         :type exit_error_map: dict[str, cloudshell.cli.session.session_exceptions.CommandExecutionException|str]  # noqa: E501
         :param
         :param parent_mode: Connect parent mode
+        :param pager_disable_commands: commands disabling pager on different
+            platforms, the first one accepted by the device is used
+        :type pager_disable_commands: list[str]
         """
         if not exit_error_map:
             exit_error_map = {}
@@ -68,6 +73,7 @@ class CommandMode(Node):
         self._exit_error_map = exit_error_map
         self._enter_actions = enter_actions
         self._use_exact_prompt = use_exact_prompt
+        self._pager_disable_commands = pager_disable_commands
 
         if parent_mode:
             self.add_parent_mode(parent_mode)
@@ -100,20 +106,22 @@ class CommandMode(Node):
         :type cli_service: CliService
         :type logger: logging.Logger
         """
-        if not isinstance(self._enter_command, (list, tuple)):
-            enter_command_list = [self._enter_command]
-        else:
-            enter_command_list = self._enter_command
-        for enter_command in enter_command_list:
-            cli_service.send_command(
-                enter_command,
-                expected_string=self.prompt,
-                action_map=self._enter_action_map,
-                error_map=self._enter_error_map,
-            )
-        cli_service.command_mode = self
-        self.enter_actions(cli_service)
-        self.prompt_actions(cli_service, logger)
+        with get_tracer().span("command_mode.step_up", mode=type(self).__name__):
+            if not isinstance(self._enter_command, (list, tuple)):
+                enter_command_list = [self._enter_command]
+            else:
+                enter_command_list = self._enter_command
+            for enter_command in enter_command_list:
+                cli_service.send_command(
+                    enter_command,
+                    expected_string=self.prompt,
+                    action_map=self._enter_action_map,
+                    error_map=self._enter_error_map,
+                )
+            cli_service.command_mode = self
+            self.pager_actions(cli_service, logger)
+            self.enter_actions(cli_service)
+            self.prompt_actions(cli_service, logger)
 
     def step_down(self, cli_service, logger):
         """Exit from command mode.
@@ -122,18 +130,30 @@ class CommandMode(Node):
         :type cli_service: CliService
         :type logger: logging.Logger
         """
-        if not isinstance(self._exit_command, (list, tuple)):
-            exit_command_list = [self._exit_command]
-        else:
-            exit_command_list = self._exit_command
-        for exit_command in exit_command_list:
-            cli_service.send_command(
-                exit_command,
-                expected_string=self.parent_node.prompt,
-                action_map=self._exit_action_map,
-                error_map=self._exit_error_map,
+        with get_tracer().span("command_mode.step_down", mode=type(self).__name__):
+            if not isinstance(self._exit_command, (list, tuple)):
+                exit_command_list = [self._exit_command]
+            else:
+                exit_command_list = self._exit_command
+            for exit_command in exit_command_list:
+                cli_service.send_command(
+                    exit_command,
+                    expected_string=self.parent_node.prompt,
+                    action_map=self._exit_action_map,
+                    error_map=self._exit_error_map,
+                )
+            cli_service.command_mode = self.parent_node
+
+    def pager_actions(self, cli_service, logger):
+        """Disable pager before the enter actions.
+
+        :type cli_service: cloudshell.cli.cli_service.CliService
+        :type logger: logging.Logger
+        """
+        if self._pager_disable_commands:
+            cli_service.session.disable_pager(
+                self._pager_disable_commands, self.prompt, logger
             )
-        cli_service.command_mode = self.parent_node
 
     def enter_actions(self, cli_service):
         """Default actions.
@@ -151,7 +171,7 @@ class CommandMode(Node):
         """
         if self._use_exact_prompt:
             self._exact_prompt = self._initialize_exact_prompt(cli_service, logger)
-            logger.debug("Exact prompt: " + self._exact_prompt)
+            logger.debug("Exact prompt: %s", self._exact_prompt)
 
     def _initialize_exact_prompt(self, cli_service, logger):
         """Exact prompt initialization.
@@ -1,5 +1,6 @@
 from cloudshell.cli.service.cli_exception import CliException
 from cloudshell.cli.service.session_manager import SessionManager
+from cloudshell.cli.session.helper.tracer import get_tracer
 
 
 class SessionManagerException(CliException):
@@ -22,10 +23,20 @@ class SessionManagerImpl(SessionManager):
         if not isinstance(new_sessions, list):
             new_sessions = [new_sessions]
 
+        with get_tracer().span("session_manager.new_session"):
+            return self._new_session(new_sessions, prompt, logger)
+
+    def _new_session(self, new_sessions, prompt, logger):
+        """Connect the first session that can be connected.
+
+        :param list new_sessions:
+        :param prompt:
+        :param logger:
+        """
         for session in new_sessions:
             try:
                 session.connect(prompt, logger)
-                logger.debug("Created new {} session".format(session.session_type))
+                logger.debug("Created new %s session", session.session_type)
                 self._existing_sessions.append(session)
                 return session
             except Exception as e:
@@ -52,7 +63,7 @@ class SessionManagerImpl(SessionManager):
         """
         if session in self._existing_sessions:
             self._existing_sessions.remove(session)
-            logger.debug("{} session was removed".format(session.session_type))
+            logger.debug("%s session was removed", session.session_type)
 
     def is_compatible(self, session, new_sessions, logger):
         """Compare session with new session parameters.
@@ -4,6 +4,7 @@ from threading import Condition
 from cloudshell.cli.service.cli_exception import CliException
 from cloudshell.cli.service.session_manager_impl import SessionManagerImpl
 from cloudshell.cli.service.session_pool import SessionPool
+from cloudshell.cli.session.helper.tracer import get_tracer
 
 try:
     from queue import Queue
@@ -56,7 +57,7 @@ class SessionPoolManager(SessionPool):
         :rtype: Session
         """
         call_time = time.time()
-        with self._session_condition:
+        with get_tracer().span("session_pool.get_session"), self._session_condition:
             session_obj = None
             while session_obj is None:
                 if not self._pool.empty():
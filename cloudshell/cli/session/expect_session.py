@@ -1,21 +1,50 @@
+import codecs
 import re
+import select
 import time
 from abc import ABCMeta, abstractmethod
-from collections import OrderedDict
-
-from cloudshell.cli.session.helper.normalize_buffer import normalize_buffer
+from collections import OrderedDict, deque
+from threading import Thread, current_thread
+
+from cloudshell.cli.session.helper.buffer_size import AdaptiveBufferSize
+from cloudshell.cli.session.helper.device_capabilities import DEVICE_CAPABILITIES
+from cloudshell.cli.session.helper.expect_matcher import ExpectMatcher
+from cloudshell.cli.session.helper.normalize_buffer import (
+    BufferNormalizer,
+    TerminalNormalizer,
+)
+from cloudshell.cli.session.helper.output_buffer import (
+    OutputBuffer,
+    SpooledOutput,
+    SpoolingOutputBuffer,
+)
+from cloudshell.cli.session.helper.pattern_cache import compile_pattern
+from cloudshell.cli.session.helper.session_metrics import (
+    CommandTiming,
+    SessionMetrics,
+)
+from cloudshell.cli.session.helper.tracer import get_tracer
+from cloudshell.cli.session.helper.transcript import TranscriptRecorder
 from cloudshell.cli.session.session import Session
 from cloudshell.cli.session.session_exceptions import (
     CommandExecutionException,
     ExpectedSessionException,
+    SessionCommandTimeoutException,
     SessionLoopDetectorException,
     SessionLoopLimitException,
     SessionReadEmptyData,
     SessionReadTimeout,
 )
 
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
 ABC = ABCMeta("ABC", (object,), {"__slots__": ()})
 
+COMMAND_WHITESPACE_PATTERN = re.compile(r"\\\s+")
+
 
 class ExpectSession(Session, ABC):
     """Help to handle additional actions during send command."""
@@ -25,10 +54,34 @@ class ExpectSession(Session, ABC):
     MAX_LOOP_RETRIES = 20
     READ_TIMEOUT = 30
     EMPTY_LOOP_TIMEOUT = 0.5
+    EMPTY_LOOP_MIN_TIMEOUT = 0.01
+    COMMAND_TIMEOUT = None
+    PIPELINE_PROBE_TIMEOUT = 2
+    # comments on most network OSes, an error without side effects elsewhere
+    PIPELINE_PROBE_COMMANDS = ("!pipeline probe 1", "!pipeline probe 2")
+    PIPELINE_CAPABILITY = "pipeline_commands"
     CLEAR_BUFFER_TIMEOUT = 0.1
+    READ_POLL_TIMEOUT = 0.1
+    TIMED_CLEAR_BUFFER = False
+    QUIESCENCE_COMPLETION = False
+    ABORT_ON_ERROR = False
+    BACKGROUND_DRAIN = False
+    TERMINAL_MODEL = False
+    PAGER_MAP = None
+    PAGER_DISABLE_CAPABILITY = "pager_disable_command"
+    PAGER_DISABLE_ERROR = (
+        r"[Ii]nvalid|[Ee]rror|[Uu]nknown|[Uu]nrecognized|[Ii]ncomplete|not found|\^"
+    )
     LOOP_DETECTOR_MAX_ACTION_LOOPS = 3
     LOOP_DETECTOR_MAX_COMBINATION_LENGTH = 4
     RECONNECT_TIMEOUT = 30
+    MATCH_OVERLAP_WINDOW = ExpectMatcher.OVERLAP_WINDOW
+    SPILL_THRESHOLD = None
+    ENCODING = "utf-8"
+    DECODE_ERRORS = "strict"
+    RECEIVE_BATCH_SIZE = 65536
+    BUFFER_SIZE = 1024
+    MAX_BUFFER_SIZE = AdaptiveBufferSize.MAX_SIZE
 
     def __init__(
         self,
@@ -40,16 +93,60 @@ class ExpectSession(Session, ABC):
         loop_detector_max_combination_length=LOOP_DETECTOR_MAX_COMBINATION_LENGTH,
         clear_buffer_timeout=CLEAR_BUFFER_TIMEOUT,
         reconnect_timeout=RECONNECT_TIMEOUT,
+        match_overlap_window=MATCH_OVERLAP_WINDOW,
+        full_buffer_match=False,
+        spill_threshold=SPILL_THRESHOLD,
+        timed_clear_buffer=TIMED_CLEAR_BUFFER,
+        quiescence_completion=QUIESCENCE_COMPLETION,
+        command_timeout=COMMAND_TIMEOUT,
+        abort_on_error=ABORT_ON_ERROR,
+        background_drain=BACKGROUND_DRAIN,
+        terminal_model=TERMINAL_MODEL,
+        pager_map=PAGER_MAP,
+        encoding=ENCODING,
+        decode_errors=DECODE_ERRORS,
+        timing_callback=None,
+        transcript=None,
     ):
         """Help to handle additional actions during send command.
 
         :param timeout:
         :param new_line:
         :param max_loop_retries:
-        :param empty_loop_timeout:
+        :param empty_loop_timeout: max delay between empty reads, the delay grows
+            exponentially from EMPTY_LOOP_MIN_TIMEOUT
         :param loop_detector_max_action_loops:
         :param loop_detector_max_combination_length:
         :param clear_buffer_timeout:
+        :param match_overlap_window: count of already received characters searched
+            again for the prompt and action patterns together with new data
+        :param full_buffer_match: search the prompt and action patterns in the whole
+            output on every read instead of the new data and the overlap window
+        :param spill_threshold: count of output characters kept in memory by
+            hardware_expect_spooled, longer output is moved to a temporary file
+        :param timed_clear_buffer: wait clear_buffer_timeout for late data when
+            clearing the buffer instead of reading only the data already received
+        :param quiescence_completion: complete the output when the expected string
+            is at its end and no data is received within the idle window learned
+            from the gaps between the chunks of the output
+        :param command_timeout: max time to get the command output, seconds,
+            None to limit only the time without any data by timeout
+        :param abort_on_error: raise the error as soon as an error map pattern is
+            found in the output instead of waiting for the expected string
+        :param background_drain: read the output of the aborted command until the
+            expected string in a thread, the next command waits for it
+        :param terminal_model: apply carriage returns, backspaces, erase line and
+            cursor movements to the output for devices redrawing lines
+        :param pager_map: dict with {re_str: response} to answer pager prompts,
+            e.g. {"--More--": " "}, pager prompts are removed from the output
+        :param encoding: encoding of the data sent to and received from the device
+        :param decode_errors: error handling scheme of the received data decoding,
+            "strict", "replace" or "ignore"
+        :param timing_callback: function called with CommandTiming of every
+            hardware_expect command
+        :param TranscriptRecorder transcript: recorder of the data sent and
+            received instead of logging every chunk, it's flushed when a command
+            fails
         :return:
         """
         self._new_line = new_line
@@ -63,14 +160,69 @@ class ExpectSession(Session, ABC):
         )
         self._clear_buffer_timeout = clear_buffer_timeout
         self._reconnect_timeout = reconnect_timeout
+        self._match_overlap_window = match_overlap_window
+        self._full_buffer_match = full_buffer_match
+        self._spill_threshold = spill_threshold
+        self._timed_clear_buffer = timed_clear_buffer
+        self._quiescence_completion = quiescence_completion
+        self._command_timeout = command_timeout
+        self._abort_on_error = abort_on_error
+        self._background_drain = background_drain
+        self._buffer_size = AdaptiveBufferSize(
+            self.BUFFER_SIZE, max_size=self.MAX_BUFFER_SIZE
+        )
+        self._metrics = SessionMetrics(buffer_size=self._buffer_size)
+        if terminal_model:
+            self._normalizer = TerminalNormalizer()
+        else:
+            self._normalizer = BufferNormalizer()
+        self._pager_map = pager_map
+        self._pager_disabled = False
+        self._pager_disable_failed = False
+        self._pager_tail = ""
+        self._encoding = encoding
+        self._decode_errors = decode_errors
+        self._decoder = codecs.getincrementaldecoder(encoding)(decode_errors)
+        self._receive_buffer = bytearray()
+        self._received_bytes = 0
+        self._received_chunks = 0
+        self._timing_callback = timing_callback
+        self._last_command_timing = None
+        self._transcript = transcript
+        self._drain_thread = None
+        self._drain_error = None
 
         self._active = False
-        self._command_patterns = {}
+        self._socket_timeout = None
 
     @property
     def session_type(self):
         return self.SESSION_TYPE
 
+    @property
+    def metrics(self):
+        """Measurements of the session.
+
+        :rtype: SessionMetrics
+        """
+        return self._metrics
+
+    @property
+    def transcript(self):
+        """Recorder of the data sent and received.
+
+        :rtype: TranscriptRecorder
+        """
+        return self._transcript
+
+    @property
+    def last_command_timing(self):
+        """Timing of the last hardware_expect command.
+
+        :rtype: CommandTiming
+        """
+        return self._last_command_timing
+
     @abstractmethod
     def _connect_actions(self, prompt, logger):
         """Read out buffer and run on_session_start actions.
@@ -95,23 +247,166 @@ class ExpectSession(Session, ABC):
     def active(self):
         return self._active
 
+    def _select_handle(self):
+        """Object with fileno() to wait for incoming data on.
+
+        :return: socket, channel or None if the session can't be waited on
+        """
+        return None
+
+    def _has_pending_data(self):
+        """Check if the handler keeps data that was already read from the socket.
+
+        :rtype: bool
+        """
+        return False
+
+    def _wait_readable(self, timeout):
+        """Wait until data can be read from the session.
+
+        :param float timeout: max time to wait, seconds
+        :return: False if no data arrived in timeout, True if data is ready or the
+            session can't be waited on
+        :rtype: bool
+        """
+        handle = self._select_handle()
+        if handle is None or self._has_pending_data():
+            return True
+        return wait_readable(handle, timeout)
+
+    def _idle_wait(self, timeout):
+        """Sleep for timeout or until data can be read from the session.
+
+        :param float timeout: seconds
+        """
+        if self._select_handle() is None:
+            time.sleep(timeout)
+        else:
+            self._wait_readable(timeout)
+
+    def _receive_bytes(self, timeout, logger):
+        """Read raw data from the session.
+
+        :param timeout: time to wait for the data
+        :param logger: logger
+        :rtype: bytes
+        :raises SessionReadTimeout: if nothing is received in timeout
+        :raises SessionReadEmptyData: if the session is closed
+        """
+        raise NotImplementedError
+
+    def _receive(self, timeout, logger):
+        """Read session buffer and decode it.
+
+        The data already received after the first chunk is read without waiting
+        and decoded at once. Multi-byte characters split between the reads are
+        kept until the rest of their bytes is received.
+
+        :param timeout: time to wait for the first chunk
+        :param logger: logger
+        :rtype: str
+        """
+        receive_buffer = self._receive_buffer
+        receive_buffer += self._receive_bytes(timeout, logger)
+        chunks = 1
+        if self._select_handle() is not None:
+            while len(receive_buffer) < self.RECEIVE_BATCH_SIZE and (
+                self._wait_readable(0)
+            ):
+                try:
+                    receive_buffer += self._receive_bytes(
+                        self.READ_POLL_TIMEOUT, logger
+                    )
+                except (SessionReadTimeout, SessionReadEmptyData):
+                    break
+                chunks += 1
+        self._received_bytes += len(receive_buffer)
+        self._received_chunks += chunks
+        try:
+            data = self._decoder.decode(receive_buffer)
+        except UnicodeDecodeError:
+            # the failed chunk is dropped, the next reads are decoded from scratch
+            self._decoder.reset()
+            raise
+        finally:
+            del receive_buffer[:]
+        return data
+
+    def _encode(self, command):
+        """Encode the data sent to the session.
+
+        Byte strings, e.g. str on Python 2, are sent as they are.
+
+        :param str command:
+        :rtype: bytes
+        """
+        if isinstance(command, bytes):
+            return command
+        return command.encode(self._encoding)
+
+    def _set_socket_timeout(self, sock, timeout):
+        """Set socket timeout if it's changed, every change is a system call.
+
+        :param socket.socket sock:
+        :param float timeout:
+        """
+        if self._socket_timeout != (sock, timeout):
+            sock.settimeout(timeout)
+            self._socket_timeout = (sock, timeout)
+
     def _clear_buffer(self, timeout, logger):
         """Clear buffer.
 
+        Only the data already received is read, unless the timed clear buffer is
+        enabled or the session can't be waited on, then every read waits for new
+        data up to the timeout.
+
         :param timeout:
         :return:
         """
-        out = ""
-        while True:
+        out = []
+        while self._timed_clear_buffer or self._wait_readable(0):
             try:
                 read_buffer = self._receive(timeout, logger)
             except (SessionReadTimeout, SessionReadEmptyData):
                 read_buffer = None
             if read_buffer:
-                out += read_buffer
+                out.append(read_buffer)
             else:
                 break
-        return out
+        return "".join(out)
+
+    def _read_tail(self, output_tail, expected_string, logger):
+        """Read data received after the expected string.
+
+        :param str output_tail: end of the output, at least the overlap window
+        :param expected_string: expected string
+        :param logger: logger
+        :rtype: str
+        """
+        if self._quiescence_completion and compile_pattern(
+            r"(?:{})\s*\Z".format(expected_string), re.DOTALL
+        ).search(output_tail):
+            return self._wait_quiescence(logger)
+        return self._clear_buffer(self._clear_buffer_timeout, logger)
+
+    def _wait_quiescence(self, logger):
+        """Read data until nothing is received within the idle window.
+
+        :param logger: logger
+        :rtype: str
+        """
+        out = []
+        while self._wait_readable(self._metrics.idle_window):
+            try:
+                read_buffer = self._receive(self.READ_POLL_TIMEOUT, logger)
+            except (SessionReadTimeout, SessionReadEmptyData):
+                break
+            if not read_buffer:
+                break
+            out.append(read_buffer)
+        self._metrics.add_completion(bool(out))
+        return "".join(out)
 
     def connect(self, prompt, logger):
         """Connect to device.
@@ -119,13 +414,18 @@ class ExpectSession(Session, ABC):
         :param prompt: expected string in output
         :param logger: logger
         """
-        try:
-            self._initialize_session(prompt, logger)
-            self._connect_actions(prompt, logger)
-            self.set_active(True)
-        except Exception:
-            self.disconnect()
-            raise
+        self._pager_disabled = False
+        self._pager_disable_failed = False
+        self._decoder.reset()
+        del self._receive_buffer[:]
+        with get_tracer().span("session.connect", session_type=self.session_type):
+            try:
+                self._initialize_session(prompt, logger)
+                self._connect_actions(prompt, logger)
+                self.set_active(True)
+            except Exception:
+                self.disconnect()
+                raise
 
     def send_line(self, command, logger):
         """Add new line to the end of command string and send.
@@ -133,11 +433,16 @@ class ExpectSession(Session, ABC):
         :param command:
         :return:
         """
+        if self._transcript is not None:
+            self._transcript.record(TranscriptRecorder.SENT, command)
         self._send(command + self._new_line, logger)
 
     def _receive_all(self, timeout, logger):
         """Read as much as possible before catch SessionTimeoutException.
 
+        Sessions that can be waited on return as soon as data arrives and all the
+        data that is already available is read, others poll the session.
+
         :param timeout:
         :param logger:
         :return:
@@ -145,30 +450,35 @@ class ExpectSession(Session, ABC):
         """
         if not timeout:
             timeout = self._timeout
-        start_time = time.time()
-        read_buffer = ""
+        deadline = monotonic() + timeout
+        read_buffer = []
         while True:
-            try:
-                read_buffer += self._receive(0.1, logger)
-            except (SessionReadTimeout, SessionReadEmptyData):
-                if read_buffer:
-                    return read_buffer
-                elif time.time() - start_time > timeout:
-                    raise ExpectedSessionException(
-                        self.__class__.__name__, "Socket closed by timeout"
-                    )
+            wait_timeout = 0 if read_buffer else deadline - monotonic()
+            if self._wait_readable(wait_timeout):
+                try:
+                    read_buffer.append(self._receive(self.READ_POLL_TIMEOUT, logger))
+                    continue
+                except (SessionReadTimeout, SessionReadEmptyData):
+                    pass
+            if read_buffer:
+                return "".join(read_buffer)
+            elif monotonic() > deadline:
+                raise ExpectedSessionException(
+                    self.__class__.__name__, "Socket closed by timeout"
+                )
 
     def _generate_command_pattern(self, command):
         """Generate command_pattern.
 
         :param command:
-        :return:
+        :return: compiled pattern from the shared pattern cache
         """
-        if command not in self._command_patterns:
-            self._command_patterns[command] = (
-                "\\s*" + re.sub(r"\\\s+", r"\\s+", re.escape(command)) + "\\s*"
-            )
-        return self._command_patterns[command]
+        command_pattern = (
+            "\\s*"
+            + COMMAND_WHITESPACE_PATTERN.sub(r"\\s+", re.escape(command))
+            + "\\s*"
+        )
+        return compile_pattern(command_pattern, re.MULTILINE)
 
     def probe_for_prompt(self, expected_string, logger):
         """Matched string for regexp.
@@ -189,7 +499,7 @@ class ExpectSession(Session, ABC):
         :param logger
         :rtype: bool
         """
-        if re.search(prompt, match_string, re.DOTALL):
+        if compile_pattern(prompt, re.DOTALL).search(match_string):
             return True
         else:
             return False
@@ -206,6 +516,11 @@ class ExpectSession(Session, ABC):
         check_action_loop_detector=True,
         empty_loop_timeout=None,
         remove_command_from_output=True,
+        full_buffer_match=None,
+        command_timeout=None,
+        abort_on_error=None,
+        background_drain=None,
+        pager_map=None,
         **optional_args
     ):
         """Get response from the device.
@@ -227,23 +542,615 @@ class ExpectSession(Session, ABC):
         :param remove_command_from_output: In some switches the output string includes
             the command which was called. The flag used to verify whether the the
             command string removed from the output string.
-        :return:
+        :param full_buffer_match: search the prompt and action patterns in the whole
+            output on every read, default value is set for the session
+        :param command_timeout: max time to get the output, seconds, default value
+            is set for the session
+        :param abort_on_error: raise the error as soon as an error map pattern is
+            found in the output, default value is set for the session
+        :param background_drain: read the output of the aborted command in a thread,
+            default value is set for the session
+        :param pager_map: dict with {re_str: response} to answer pager prompts,
+            default value is set for the session
+        :return: output
         :rtype: str
         """
-        if not action_map:
-            action_map = OrderedDict()
+        return self._timed_hardware_expect(
+            command,
+            expected_string,
+            logger,
+            action_map=action_map,
+            error_map=error_map,
+            timeout=timeout,
+            retries=retries,
+            check_action_loop_detector=check_action_loop_detector,
+            empty_loop_timeout=empty_loop_timeout,
+            remove_command_from_output=remove_command_from_output,
+            full_buffer_match=full_buffer_match,
+            command_timeout=command_timeout,
+            abort_on_error=abort_on_error,
+            background_drain=background_drain,
+            pager_map=pager_map,
+        )
+
+    def hardware_expect_spooled(
+        self, command, expected_string, logger, spill_threshold=None, **kwargs
+    ):
+        """Get response from the device moving long output to a temporary file.
+
+        The output is returned as SpooledOutput when it's longer than
+        spill_threshold, it's searched with its search and finditer methods and
+        str(output) loads it whole. Output received before the command echo
+        counts toward the threshold as well.
+
+        :param command: command to send
+        :param expected_string: expected string
+        :param logger: logger
+        :param spill_threshold: count of output characters kept in memory,
+            default value is set for the session, 0 if it isn't set
+        :param kwargs: arguments of hardware_expect
+        :return: output, SpooledOutput if it's longer than spill_threshold
+        :rtype: str|SpooledOutput
+        """
+        if spill_threshold is None:
+            spill_threshold = self._spill_threshold or 0
+        return self._timed_hardware_expect(
+            command,
+            expected_string,
+            logger,
+            spill_threshold=spill_threshold,
+            hold_command_echo=False,
+            **kwargs
+        )
 
+    def _timed_hardware_expect(self, command, expected_string, logger, **kwargs):
+        """Get response from the device and report the timing of the command."""
+        timing = CommandTiming(command)
+        start_time = monotonic()
+        received_bytes = self._received_bytes
+        received_chunks = self._received_chunks
+        with get_tracer().span("session.hardware_expect", command=command) as span:
+            try:
+                return self._hardware_expect(
+                    command, expected_string, logger, timing, **kwargs
+                )
+            except Exception:
+                self._flush_transcript()
+                raise
+            finally:
+                timing.total = monotonic() - start_time
+                timing.bytes_received = self._received_bytes - received_bytes
+                timing.chunks = self._received_chunks - received_chunks
+                span.set_attribute("bytes_received", timing.bytes_received)
+                self._last_command_timing = timing
+                if self._timing_callback is not None:
+                    self._timing_callback(timing)
+
+    def _hardware_expect(
+        self,
+        command,
+        expected_string,
+        logger,
+        timing,
+        action_map=None,
+        error_map=None,
+        timeout=None,
+        retries=None,
+        check_action_loop_detector=True,
+        empty_loop_timeout=None,
+        remove_command_from_output=True,
+        full_buffer_match=None,
+        command_timeout=None,
+        abort_on_error=None,
+        background_drain=None,
+        pager_map=None,
+        spill_threshold=None,
+        hold_command_echo=True,
+    ):
+        """Get response from the device and record the timing of the command.
+
+        :param CommandTiming timing: timing of the command
+        :param spill_threshold: count of output characters kept in memory, None
+            to keep the whole output in memory
+        :param hold_command_echo: keep the output until the command echo is found
+        """
         if not error_map:
             error_map = OrderedDict()
 
+        if spill_threshold is None:
+            output = OutputBuffer()
+        else:
+            output = SpoolingOutputBuffer(spill_threshold)
+        if abort_on_error is None:
+            abort_on_error = self._abort_on_error
+        if abort_on_error and error_map:
+            error_matcher = self._create_error_matcher(
+                error_map, full_buffer_match, expected_string
+            )
+        else:
+            error_matcher = None
+
+        chunks = self._expect_output(
+            command,
+            expected_string,
+            logger,
+            action_map=action_map,
+            timeout=timeout,
+            retries=retries,
+            check_action_loop_detector=check_action_loop_detector,
+            empty_loop_timeout=empty_loop_timeout,
+            remove_command_from_output=remove_command_from_output,
+            full_buffer_match=full_buffer_match,
+            command_timeout=command_timeout,
+            pager_map=pager_map,
+            hold_command_echo=hold_command_echo,
+            timing=timing,
+        )
+        for data in chunks:
+            output.write(data)
+            if error_matcher is not None:
+                # errors usually come together with the prompt in one read
+                prompt_match, error_key = error_matcher.feed(
+                    data, self._normalizer.preview
+                )
+                if error_key is not None:
+                    raise self._abort_command(
+                        chunks,
+                        error_map[error_key],
+                        expected_string,
+                        logger,
+                        background_drain,
+                        prompt_received=bool(prompt_match),
+                        action_map=action_map,
+                        timeout=timeout,
+                        pager_map=pager_map,
+                    )
+        result_output = output.getvalue()
+        self._check_error_map(result_output, error_map)
+
+        # Read buffer to the end. Useful when expected_string isn't last in buffer
+        drain_start = monotonic()
+        tail_output = self._read_tail(
+            result_output[-self._match_overlap_window :], expected_string, logger
+        )
+        timing.drain = monotonic() - drain_start
+        if tail_output:
+            result_output += tail_output
+        return result_output
+
+    def hardware_expect_iter(
+        self,
+        command,
+        expected_string,
+        logger,
+        action_map=None,
+        error_map=None,
+        timeout=None,
+        retries=None,
+        check_action_loop_detector=True,
+        empty_loop_timeout=None,
+        remove_command_from_output=True,
+        full_buffer_match=None,
+        command_timeout=None,
+        abort_on_error=None,
+        background_drain=None,
+        pager_map=None,
+        lines=False,
+        **optional_args
+    ):
+        """Get response from the device chunk by chunk while it's received.
+
+        Streaming variant of hardware_expect, the output isn't kept in memory.
+        The command is sent when the iteration starts, the generator has to be
+        consumed to the end to leave the session ready for the next command.
+        Error map patterns are searched in the overlap window of the output,
+        the exception is raised after the expected string is matched, or as soon
+        as the pattern is found if abort_on_error is set.
+
+        :param command: command to send
+        :param expected_string: expected string
+        :param logger: logger
+        :param action_map: dict with {re_str: action} to trigger some action
+            on received string
+        :param error_map: expected error map with subclass of CommandExecutionException
+            or str
+        :type error_map: dict[str, CommandExecutionException|str]
+        :param timeout: session timeout
+        :param retries: maximal retries count
+        :param remove_command_from_output: remove the command echo from the output
+        :param full_buffer_match: search the prompt, action and error patterns in the
+            whole output on every read, default value is set for the session
+        :param command_timeout: max time to get the output, seconds, default value
+            is set for the session
+        :param abort_on_error: raise the error as soon as an error map pattern is
+            found in the output, default value is set for the session
+        :param background_drain: read the output of the aborted command in a thread,
+            default value is set for the session
+        :param pager_map: dict with {re_str: response} to answer pager prompts,
+            default value is set for the session
+        :param lines: yield complete lines instead of received chunks
+        :rtype: collections.Iterable[str]
+        """
+        chunks = self._iter_output(
+            command,
+            expected_string,
+            logger,
+            action_map=action_map,
+            error_map=error_map,
+            timeout=timeout,
+            retries=retries,
+            check_action_loop_detector=check_action_loop_detector,
+            empty_loop_timeout=empty_loop_timeout,
+            remove_command_from_output=remove_command_from_output,
+            full_buffer_match=full_buffer_match,
+            command_timeout=command_timeout,
+            abort_on_error=abort_on_error,
+            background_drain=background_drain,
+            pager_map=pager_map,
+        )
+        if self._transcript is not None:
+            chunks = self._flush_transcript_on_error(chunks)
+        if lines:
+            return split_lines(chunks)
+        return chunks
+
+    def send_commands(
+        self,
+        commands,
+        expected_string,
+        logger,
+        error_map=None,
+        error_maps=None,
+        timeout=None,
+        pipeline=False,
+        remove_command_from_output=True,
+        **optional_args
+    ):
+        """Send commands and get the output of every command.
+
+        Commands are sent one by one with hardware_expect unless the pipeline
+        mode is requested. In the pipeline mode all the commands are written at
+        once and the output is split by the command echoes following the prompt,
+        so the whole batch takes about one round trip. Every command is executed
+        before the error maps are checked. With pipeline=None support of the
+        pipeline mode is probed once per device. Commands are sent one by one
+        anyway if hardware_expect arguments are passed, the session overrides
+        hardware_expect or the commands can be paged. If a batch fails in the
+        pipeline mode, the error is raised and the next batches to the device
+        are sent one by one.
+
+        :param list[str] commands: commands to send
+        :param expected_string: expected string
+        :param logger: logger
+        :param error_map: expected error map applied to every command
+        :param error_maps: error maps of the commands, checked before error_map
+        :type error_maps: list[dict[str, CommandExecutionException|str]]
+        :param timeout: session timeout
+        :param pipeline: True to write all the commands at once, False to send them
+            one by one, None to probe if the device supports the pipeline mode
+        :param remove_command_from_output: remove the command echo from the outputs
+        :return: outputs of the commands
+        :rtype: list[str]
+        """
+        command_error_maps = self._merge_error_maps(commands, error_map, error_maps)
+
+        if (
+            optional_args
+            or self._hardware_expect_overridden()
+            or (self._pager_map and not self._pager_disabled)
+        ):
+            # actions and pagers have to be answered before the next command is
+            # sent, otherwise the next command is read as the answer, sessions
+            # sending commands or reading the output their own way and the
+            # other hardware_expect arguments aren't supported by the pipeline
+            pipeline = False
+        elif pipeline is None:
+            pipeline = len(commands) > 1 and self._pipeline_supported(
+                expected_string, logger
+            )
+        if not pipeline:
+            return [
+                self.hardware_expect(
+                    command,
+                    expected_string,
+                    logger,
+                    error_map=command_error_map,
+                    timeout=timeout,
+                    remove_command_from_output=remove_command_from_output,
+                    **optional_args
+                )
+                for command, command_error_map in zip(commands, command_error_maps)
+            ]
+
+        try:
+            outputs = self._pipeline_output(commands, expected_string, logger, timeout)
+        except ExpectedSessionException:
+            DEVICE_CAPABILITIES.set(self._device_key(), self.PIPELINE_CAPABILITY, False)
+            raise
+
+        if remove_command_from_output:
+            outputs = [
+                self._generate_command_pattern(command).sub("", output, count=1)
+                for command, output in zip(commands, outputs)
+            ]
+        tail_output = self._read_tail(
+            outputs[-1][-self._match_overlap_window :], expected_string, logger
+        )
+        if tail_output:
+            outputs[-1] += tail_output
+
+        for output, command_error_map in zip(outputs, command_error_maps):
+            self._check_error_map(output, command_error_map)
+        return outputs
+
+    @classmethod
+    def _hardware_expect_overridden(cls):
+        """Check if the session class has its own hardware_expect.
+
+        :rtype: bool
+        """
+        # unbound methods on Python 2, functions on Python 3
+        method = getattr(cls.hardware_expect, "__func__", cls.hardware_expect)
+        base_method = getattr(
+            ExpectSession.hardware_expect, "__func__", ExpectSession.hardware_expect
+        )
+        return method is not base_method
+
+    @staticmethod
+    def _merge_error_maps(commands, error_map, error_maps):
+        """Error map of every command followed by the common error map.
+
+        :param list[str] commands: commands
+        :param dict error_map: error map common for all the commands
+        :param list[dict] error_maps: error maps of the commands
+        :rtype: list[collections.OrderedDict]
+        """
+        command_error_maps = []
+        for command_error_map in error_maps or [None] * len(commands):
+            command_error_map = OrderedDict(command_error_map or {})
+            for error_pattern, error in (error_map or {}).items():
+                command_error_map.setdefault(error_pattern, error)
+            command_error_maps.append(command_error_map)
+        return command_error_maps
+
+    def _pipeline_output(self, commands, expected_string, logger, timeout):
+        """Write all the commands at once and split the output.
+
+        Output of a command ends where the echo of the next command follows the
+        prompt, the last output ends with the prompt.
+
+        :rtype: list[str]
+        """
+        self._wait_drain()
+        self._clear_buffer(self._clear_buffer_timeout, logger)
+        self._normalizer.reset()
+        self._pager_tail = ""
+        for command in commands:
+            logger.debug("Command: %s", command)
+            self.send_line(command, logger)
+
+        prompt_pattern = compile_pattern(
+            r"(?:{})\s*\Z".format(expected_string), re.DOTALL
+        )
+        outputs = []
+        stream = ""
+        for command in commands[1:]:
+            command_pattern = self._generate_command_pattern(command)
+            window = self._match_overlap_window + 2 * len(command)
+            search_pos = 0
+            output = None
+            while output is None:
+                for match in command_pattern.finditer(stream, search_pos):
+                    start = match.start()
+                    if prompt_pattern.search(stream, max(start - window, 0), start):
+                        output, stream = stream[:start], stream[start:]
+                        break
+                else:
+                    search_pos = max(len(stream) - window, 0)
+                    stream += self._receive_output(timeout, logger)
+            outputs.append(output)
+
+        matcher = ExpectMatcher(
+            expected_string, overlap_window=self._match_overlap_window
+        )
+        output = OutputBuffer()
+        output.write(stream)
+        prompt_match, _ = matcher.feed(stream, self._normalizer.preview)
+        while not prompt_match:
+            read_buffer = self._receive_output(timeout, logger)
+            output.write(read_buffer)
+            prompt_match, _ = matcher.feed(read_buffer, self._normalizer.preview)
+        output.write(self._normalizer.flush())
+        outputs.append(output.getvalue())
+        return outputs
+
+    def _receive_output(self, timeout, logger):
+        """Read and normalize the data received from the session.
+
+        :rtype: str
+        """
+        for _ in range(self._max_loop_retries):
+            read_buffer = self._receive_all(timeout, logger)
+            if read_buffer:
+                read_buffer = self._normalizer.normalize(read_buffer)
+                self._log_output(read_buffer, logger)
+                if self._pager_map:
+                    read_buffer = self._answer_pager(
+                        read_buffer, self._pager_map, logger
+                    )
+                return read_buffer
+            self._idle_wait(self._empty_loop_timeout)
+        raise SessionLoopLimitException(
+            self.__class__.__name__,
+            "Session Loop limit exceeded, {} loops".format(self._max_loop_retries),
+        )
+
+    def _device_key(self):
+        """Key of the device in the capabilities registry.
+
+        :rtype: tuple
+        """
+        return (
+            self.session_type,
+            getattr(self, "host", None),
+            getattr(self, "port", None),
+        )
+
+    def _pipeline_supported(self, expected_string, logger):
+        """Check if the device supports the pipeline mode, probe it once.
+
+        :rtype: bool
+        """
+        device = self._device_key()
+        supported = DEVICE_CAPABILITIES.get(device, self.PIPELINE_CAPABILITY)
+        if supported is None:
+            supported = self._probe_pipeline(expected_string, logger)
+            DEVICE_CAPABILITIES.set(device, self.PIPELINE_CAPABILITY, supported)
+        return supported
+
+    def _probe_pipeline(self, expected_string, logger):
+        """Write two marker commands at once and split their output.
+
+        The echo of the second command has to follow the prompt ending the
+        output of the first one. Devices echoing the typed-ahead commands before
+        the output fail the probe after the probe timeout.
+
+        :rtype: bool
+        """
+        try:
+            self._pipeline_output(
+                list(self.PIPELINE_PROBE_COMMANDS),
+                expected_string,
+                logger,
+                self.PIPELINE_PROBE_TIMEOUT,
+            )
+        except ExpectedSessionException:
+            logger.debug("Pipeline mode isn't supported by the device")
+            return False
+        finally:
+            self._clear_buffer(self._clear_buffer_timeout, logger)
+        return True
+
+    def _iter_output(
+        self,
+        command,
+        expected_string,
+        logger,
+        error_map=None,
+        full_buffer_match=None,
+        abort_on_error=None,
+        background_drain=None,
+        **kwargs
+    ):
+        """Yield the command output, check error map and read buffer to the end.
+
+        :rtype: collections.Iterable[str]
+        """
+        if abort_on_error is None:
+            abort_on_error = self._abort_on_error
+        error_keys = list(error_map or [])
+        error_matcher = self._create_error_matcher(
+            error_keys, full_buffer_match, expected_string if abort_on_error else None
+        )
+        error_index = None
+        output_tail = ""
+
+        chunks = self._expect_output(
+            command,
+            expected_string,
+            logger,
+            full_buffer_match=full_buffer_match,
+            hold_command_echo=False,
+            **kwargs
+        )
+        for data in chunks:
+            prompt_match, error_key = error_matcher.feed(data, self._normalizer.preview)
+            if error_key is not None and abort_on_error:
+                yield data
+                raise self._abort_command(
+                    chunks,
+                    error_map[error_key],
+                    expected_string,
+                    logger,
+                    background_drain,
+                    prompt_received=bool(prompt_match),
+                    action_map=kwargs.get("action_map"),
+                    timeout=kwargs.get("timeout"),
+                    pager_map=kwargs.get("pager_map"),
+                )
+            if error_key is not None:
+                index = error_keys.index(error_key)
+                if error_index is None or index < error_index:
+                    error_index = index
+            output_tail = (output_tail + data)[-self._match_overlap_window :]
+            yield data
+
+        if error_index is not None:
+            raise self._command_execution_exception(error_map[error_keys[error_index]])
+
+        tail_output = self._read_tail(output_tail, expected_string, logger)
+        if tail_output:
+            yield tail_output
+
+    def _expect_output(
+        self,
+        command,
+        expected_string,
+        logger,
+        action_map=None,
+        timeout=None,
+        retries=None,
+        check_action_loop_detector=True,
+        empty_loop_timeout=None,
+        remove_command_from_output=True,
+        full_buffer_match=None,
+        hold_command_echo=True,
+        command_timeout=None,
+        pager_map=None,
+        timing=None,
+    ):
+        """Send command and yield normalized output until expected string matched.
+
+        The timeout limits the time without any data, the command timeout limits
+        the whole time to get the output. Delays between empty reads grow
+        exponentially up to empty_loop_timeout and end as soon as data arrives.
+        Pager prompts are answered as soon as they're received and removed from
+        the output, they aren't counted by the action loop detector.
+
+        :param hold_command_echo: keep the output until the command echo is found,
+            otherwise the output is kept only while it fits the echo search window
+        :param CommandTiming timing: timing of the command to record the phases
+        :rtype: collections.Iterable[str]
+        """
+        if not action_map:
+            action_map = OrderedDict()
+
         retries = retries or self._max_loop_retries
         empty_loop_timeout = empty_loop_timeout or self._empty_loop_timeout
-
+        if full_buffer_match is None:
+            full_buffer_match = self._full_buffer_match
+        if command_timeout is None:
+            command_timeout = self._command_timeout
+        deadline = None if command_timeout is None else monotonic() + command_timeout
+        if pager_map is None:
+            pager_map = self._pager_map
+
+        if timing is None:
+            timing = CommandTiming(command)
+
+        self._wait_drain()
+        sent_time = monotonic()
         if command is not None:
             self._clear_buffer(self._clear_buffer_timeout, logger)
+            self._normalizer.reset()
+            self._pager_tail = ""
+            clear_time = monotonic()
+            timing.clear_buffer = clear_time - sent_time
 
-            logger.debug("Command: {}".format(command))
+            logger.debug("Command: %s", command)
             self.send_line(command, logger)
+            sent_time = monotonic()
+            timing.send = sent_time - clear_time
 
         if not expected_string:
             raise ExpectedSessionException(
@@ -252,8 +1159,6 @@ class ExpectSession(Session, ABC):
 
         # Loop until one of the expressions is matched or MAX_RETRIES
         # nothing is expected (usually used for exit)
-        output_list = []
-        output_str = ""
         retries_count = 0
         is_correct_exit = False
 
@@ -261,51 +1166,120 @@ class ExpectSession(Session, ABC):
             self._loop_detector_max_action_loops,
             self._loop_detector_max_combination_length,
         )
+        matcher = ExpectMatcher(
+            expected_string,
+            list(action_map),
+            overlap_window=self._match_overlap_window,
+            full_buffer=full_buffer_match,
+        )
+        remove_command_from_output = bool(command) and remove_command_from_output
+        if remove_command_from_output:
+            command_pattern = self._generate_command_pattern(command)
+            # command echo is searched in the recent output only, the output is
+            # held back until the echo is found and removed from it
+            held_output = OutputBuffer()
+            command_window = ""
+            command_window_size = self._match_overlap_window + 2 * len(command)
+        # gaps are measured between the chunks of the output, not the time the
+        # device takes to respond to the command or an action
+        last_read_time = None
+        min_empty_loop_delay = min(self.EMPTY_LOOP_MIN_TIMEOUT, empty_loop_timeout)
+        empty_loop_delay = min_empty_loop_delay
+
         while retries == 0 or retries_count < retries:
 
-            read_buffer = self._receive_all(timeout, logger)
+            read_timeout = timeout
+            if deadline is not None:
+                read_timeout = min(timeout or self._timeout, deadline - monotonic())
+                if read_timeout <= 0:
+                    raise self._command_timeout_exception(command_timeout)
+            try:
+                read_buffer = self._receive_all(read_timeout, logger)
+            except ExpectedSessionException:
+                if deadline is not None and monotonic() >= deadline:
+                    raise self._command_timeout_exception(command_timeout)
+                raise
 
             if read_buffer:
-                read_buffer = normalize_buffer(read_buffer)
-                logger.debug(read_buffer)
-                output_str += read_buffer
+                read_time = monotonic()
+                if timing.first_byte is None:
+                    timing.first_byte = read_time - sent_time
+                if last_read_time is not None:
+                    self._metrics.add_chunk_gap(read_time - last_read_time)
+                last_read_time = read_time
+                empty_loop_delay = min_empty_loop_delay
+                read_buffer = self._normalizer.normalize(read_buffer)
+                self._log_output(read_buffer, logger)
+                if pager_map:
+                    read_buffer = self._answer_pager(read_buffer, pager_map, logger)
+                matched_data = read_buffer
                 # if option remove_command_from_output is set to True, look for command
                 # in output buffer, remove it in case of found
-                if command and remove_command_from_output:
-                    command_pattern = self._generate_command_pattern(command)
-                    if re.search(command_pattern, output_str, flags=re.MULTILINE):
-                        output_str = re.sub(
-                            command_pattern, "", output_str, count=1, flags=re.MULTILINE
+                if remove_command_from_output:
+                    held_output.write(read_buffer)
+                    command_window = (command_window + read_buffer)[
+                        -command_window_size:
+                    ]
+                    if command_pattern.search(command_window):
+                        matched_data = command_pattern.sub(
+                            "", held_output.getvalue(), count=1
                         )
+                        held_output.clear()
                         remove_command_from_output = False
+                        matcher.reset()
+                        yield matched_data
+                    elif not hold_command_echo and (
+                        len(held_output) > command_window_size
+                    ):
+                        remove_command_from_output = False
+                        yield held_output.getvalue()
+                        held_output.clear()
+                else:
+                    yield read_buffer
                 retries_count = 0
             else:
                 retries_count += 1
-                time.sleep(empty_loop_timeout)
+                if deadline is not None:
+                    empty_loop_delay = max(
+                        min(empty_loop_delay, deadline - monotonic()), 0
+                    )
+                self._idle_wait(empty_loop_delay)
+                empty_loop_delay = min(empty_loop_delay * 2, empty_loop_timeout)
                 continue
 
-            if self.match_prompt(expected_string, output_str, logger):
-                output_list.append(output_str)
-                is_correct_exit = True
+            prompt_match, action_key = matcher.feed(
+                matched_data, self._normalizer.preview
+            )
+            if (prompt_match or action_key is not None) and remove_command_from_output:
+                yield held_output.getvalue()
+                held_output.clear()
 
-            for action_key in action_map:
-                result_match = re.search(action_key, output_str, re.DOTALL)
-                if result_match:
-                    output_list.append(output_str)
-
-                    if check_action_loop_detector:
-                        if action_loop_detector.loops_detected(action_key):
-                            logger.error("Loops detected")
-                            raise SessionLoopDetectorException(
-                                self.__class__.__name__,
-                                "Expected actions loops detected",
-                            )
-                    logger.debug("Action key: {}".format(action_key))
-                    action_map[action_key](self, logger)
-                    output_str = ""
-                    break
+            if prompt_match:
+                is_correct_exit = True
+                timing.prompt_match = monotonic() - sent_time
+
+            if action_key is not None:
+                if check_action_loop_detector:
+                    if action_loop_detector.loops_detected(action_key):
+                        logger.error("Loops detected")
+                        raise SessionLoopDetectorException(
+                            self.__class__.__name__,
+                            "Expected actions loops detected",
+                        )
+                logger.debug("Action key: %s", action_key)
+                if self._normalizer.preview:
+                    # the line is answered, it mustn't be matched again
+                    yield self._normalizer.flush()
+                action_start = monotonic()
+                action_map[action_key](self, logger)
+                timing.actions += monotonic() - action_start
+                matcher.reset()
+                last_read_time = None
 
             if is_correct_exit:
+                pending_data = self._normalizer.flush()
+                if pending_data:
+                    yield pending_data
                 break
 
         if not is_correct_exit:
@@ -314,22 +1288,247 @@ class ExpectSession(Session, ABC):
                 "Session Loop limit exceeded, {} loops".format(retries_count),
             )
 
-        result_output = "".join(output_list)
+    def _log_output(self, data, logger):
+        """Record the received data to the transcript or log it.
+
+        :param str data: normalized data
+        :param logger: logger
+        """
+        if self._transcript is not None:
+            self._transcript.record(TranscriptRecorder.RECEIVED, data)
+        else:
+            logger.debug(data)
 
+    def _flush_transcript(self):
+        """Write the transcript of the failed command."""
+        if self._transcript is not None:
+            self._transcript.flush()
+
+    def _flush_transcript_on_error(self, chunks):
+        """Yield the chunks, write the transcript if the command fails.
+
+        :rtype: collections.Iterable[str]
+        """
+        try:
+            for data in chunks:
+                yield data
+        except Exception:
+            self._flush_transcript()
+            raise
+
+    def _answer_pager(self, data, pager_map, logger):
+        """Answer pager prompts and remove them from the data.
+
+        Pager prompts are searched together with the overlap window of the
+        previous data, a prompt split between reads is answered and only its
+        part received in this data is removed.
+
+        :param str data: normalized data received from the session
+        :param dict pager_map: dict with {re_str: response}
+        :param logger: logger
+        :rtype: str
+        """
+        tail = self._pager_tail
+        answered = False
+        for pager_pattern, response in pager_map.items():
+            pattern = compile_pattern(pager_pattern)
+            data, pages = pattern.subn("", data)
+            if not pages and tail:
+                match = pattern.search(tail + data)
+                if match and match.end() > len(tail):
+                    data = data[match.end() - len(tail) :]
+                    pages = 1
+            if not pages and pattern.search(self._normalizer.preview):
+                # pager prompt is redrawn by the device, the line with it isn't a
+                # part of output, the rest of the prompt and spaces are dropped too
+                self._normalizer.flush()
+                pages = 1
+            if pages:
+                logger.debug("Pager: %s", pager_pattern)
+                if self._transcript is not None:
+                    self._transcript.record(TranscriptRecorder.SENT, response)
+                self._send(response, logger)
+                answered = True
+        if answered:
+            self._pager_tail = ""
+        else:
+            self._pager_tail = (tail + data)[-self._match_overlap_window :]
+        return data
+
+    def disable_pager(self, commands, expected_string, logger):
+        """Disable pager with the first command accepted by the device.
+
+        The command that worked is kept for the device and tried first, the rest
+        of the commands are tried if it fails. The pager is disabled once per
+        connection, if none of the commands works they aren't tried again until
+        the session reconnects.
+
+        :param list[str] commands: commands disabling pager on different platforms
+        :param expected_string: expected string
+        :param logger: logger
+        :return: command that disabled pager or None
+        :rtype: str
+        """
+        device = self._device_key()
+        known_command = DEVICE_CAPABILITIES.get(device, self.PAGER_DISABLE_CAPABILITY)
+        if self._pager_disabled:
+            return known_command
+        if self._pager_disable_failed:
+            return None
+        if known_command:
+            candidates = [known_command] + [
+                command for command in commands if command != known_command
+            ]
+        else:
+            candidates = commands
+
+        for command in candidates:
+            try:
+                self.hardware_expect(
+                    command,
+                    expected_string,
+                    logger,
+                    error_map=OrderedDict(
+                        [(self.PAGER_DISABLE_ERROR, "Pager isn't disabled")]
+                    ),
+                )
+            except CommandExecutionException:
+                logger.debug("Command %s didn't disable pager", command)
+                continue
+            DEVICE_CAPABILITIES.set(device, self.PAGER_DISABLE_CAPABILITY, command)
+            self._pager_disabled = True
+            return command
+
+        # the commands can fail because of the mode or the state of this
+        # connection, the failure isn't kept for the device
+        self._pager_disable_failed = True
+        return None
+
+    def _create_error_matcher(
+        self, error_keys, full_buffer_match=None, expected_string=None
+    ):
+        """Create matcher of the error map patterns.
+
+        :param list error_keys: error map patterns in the order of priority
+        :param bool full_buffer_match: search the whole output on every read,
+            default value is set for the session
+        :param str expected_string: prompt searched together with the errors
+        :rtype: ExpectMatcher
+        """
+        if full_buffer_match is None:
+            full_buffer_match = self._full_buffer_match
+        return ExpectMatcher(
+            expected_string,
+            list(error_keys),
+            overlap_window=self._match_overlap_window,
+            full_buffer=full_buffer_match,
+        )
+
+    def _abort_command(
+        self,
+        chunks,
+        error,
+        expected_string,
+        logger,
+        background_drain=None,
+        prompt_received=False,
+        **kwargs
+    ):
+        """Stop handling the output of the failed command and drain it.
+
+        The rest of the output is read until the expected string, so the session
+        is ready for the next command. The session becomes inactive if the output
+        can't be drained.
+
+        :param chunks: output generator of the failed command
+        :param error: error of the matched error map pattern
+        :param expected_string: expected string
+        :param logger: logger
+        :param bool background_drain: drain the output in a thread, default value
+            is set for the session
+        :param bool prompt_received: the expected string was already received,
+            there is nothing to drain
+        :return: exception to raise
+        :rtype: CommandExecutionException
+        """
+        chunks.close()
+        if prompt_received:
+            logger.debug("Command aborted, the output is complete")
+            return self._command_execution_exception(error)
+        logger.debug("Command aborted, draining the output")
+        if background_drain is None:
+            background_drain = self._background_drain
+        if background_drain:
+            self._drain_error = None
+            self._drain_thread = Thread(
+                target=self._drain_output, args=(expected_string, logger), kwargs=kwargs
+            )
+            self._drain_thread.daemon = True
+            self._drain_thread.start()
+        else:
+            self._drain_output(expected_string, logger, **kwargs)
+            self._drain_error = None
+        return self._command_execution_exception(error)
+
+    def _drain_output(self, expected_string, logger, **kwargs):
+        """Read the output until the expected string, deactivate session on error.
+
+        :param expected_string: expected string
+        :param logger: logger
+        """
+        try:
+            for _ in self._expect_output(None, expected_string, logger, **kwargs):
+                pass
+        except Exception as e:
+            logger.debug("Output wasn't drained: %s", e)
+            self._drain_error = e
+            self.set_active(False)
+
+    def _wait_drain(self):
+        """Wait for the output of the aborted command to be drained."""
+        drain_thread = self._drain_thread
+        if drain_thread is None or drain_thread is current_thread():
+            return
+        drain_thread.join()
+        self._drain_thread = None
+        error, self._drain_error = self._drain_error, None
+        if error is not None:
+            raise ExpectedSessionException(
+                self.__class__.__name__,
+                "Output of the aborted command wasn't drained, {}".format(error),
+            )
+
+    def _check_error_map(self, output, error_map):
+        """Raise the error of the first error map pattern found in the output.
+
+        :param str|SpooledOutput output: command output
+        :param dict error_map: expected error map
+        """
         for error_pattern, error in error_map.items():
-            result_match = re.search(error_pattern, result_output, re.DOTALL)
+            if isinstance(output, SpooledOutput):
+                result_match = output.search(error_pattern, re.DOTALL)
+            else:
+                result_match = compile_pattern(error_pattern, re.DOTALL).search(output)
 
             if result_match:
-                if isinstance(error, CommandExecutionException):
-                    raise error
-                else:
-                    raise CommandExecutionException(
-                        "Session returned '{}'".format(error)
-                    )
+                raise self._command_execution_exception(error)
 
-        # Read buffer to the end. Useful when expected_string isn't last in buffer
-        result_output += self._clear_buffer(self._clear_buffer_timeout, logger)
-        return result_output
+    def _command_timeout_exception(self, command_timeout):
+        return SessionCommandTimeoutException(
+            self.__class__.__name__,
+            "Command timeout exceeded, {} seconds".format(command_timeout),
+        )
+
+    @staticmethod
+    def _command_execution_exception(error):
+        """Exception for the matched error map pattern.
+
+        :param CommandExecutionException|str error: error map value
+        :rtype: CommandExecutionException
+        """
+        if isinstance(error, CommandExecutionException):
+            return error
+        return CommandExecutionException("Session returned '{}'".format(error))
 
     def reconnect(self, prompt, logger, timeout=None):
         """Recconnect implementation.
@@ -341,6 +1540,10 @@ class ExpectSession(Session, ABC):
         """
         logger.debug("Reconnect")
         timeout = timeout or self._reconnect_timeout
+        try:
+            self._wait_drain()
+        except ExpectedSessionException as e:
+            logger.debug(e)
 
         call_time = time.time()
         while time.time() - call_time < timeout:
@@ -355,8 +1558,49 @@ class ExpectSession(Session, ABC):
         )
 
 
+def split_lines(chunks):
+    """Join chunks and split them into lines.
+
+    :param collections.Iterable[str] chunks:
+    :rtype: collections.Iterable[str]
+    """
+    tail = ""
+    for chunk in chunks:
+        lines = (tail + chunk).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if tail:
+        yield tail
+
+
+def wait_readable(handle, timeout):
+    """Wait until data can be read from the handle.
+
+    poll is used where it's available, select can't wait on file descriptors
+    above FD_SETSIZE (1024) that busy processes with many sessions reach.
+
+    :param handle: socket, channel or other object with fileno()
+    :param float timeout: max time to wait, seconds
+    :rtype: bool
+    """
+    timeout = max(timeout, 0)
+    if hasattr(select, "poll"):
+        poller = select.poll()
+        poller.register(handle, select.POLLIN)
+        return bool(poller.poll(timeout * 1000))
+    readable, _, _ = select.select([handle], [], [], timeout)
+    return bool(readable)
+
+
 class ActionLoopDetector(object):
-    """Help to detect loops for action combinations."""
+    """Help to detect loops for action combinations.
+
+    Only the last max_loops * max_combination_length actions are kept. For every
+    combination length the detector counts how many of the last actions repeat
+    the action combination length positions before, a loop is a run covering all
+    the combinations but the first one.
+    """
 
     def __init__(self, max_loops, max_combination_length):
         """Help to detect loops for action combinations.
@@ -367,7 +1611,9 @@ class ActionLoopDetector(object):
         """
         self._max_action_loops = max_loops
         self._max_combination_length = max_combination_length
-        self._action_history = []
+        self._action_history = deque(maxlen=max(max_loops, 1) * max_combination_length)
+        self._actions_count = 0
+        self._repeats = [0] * (max_combination_length + 1)
 
     def loops_detected(self, action_key):
         """Add action key to the history and detect loops.
@@ -375,42 +1621,22 @@ class ActionLoopDetector(object):
         :param action_key:
         :return:
         """
-        # """Added action key to the history and detect for loops"""
+        history = self._action_history
         loops_detected = False
-        self._action_history.append(action_key)
+        self._actions_count += 1
         for combination_length in range(1, self._max_combination_length + 1):
-            if self._is_combination_compatible(combination_length):
-                if self._detect_loops_for_combination_length(combination_length):
-                    loops_detected = True
-                    break
+            if len(history) >= combination_length and (
+                history[-combination_length] == action_key
+            ):
+                self._repeats[combination_length] += 1
+            else:
+                self._repeats[combination_length] = 0
+            if (
+                not loops_detected
+                and self._actions_count >= self._max_action_loops * combination_length
+                and self._repeats[combination_length]
+                >= (self._max_action_loops - 1) * combination_length
+            ):
+                loops_detected = True
+        history.append(action_key)
         return loops_detected
-
-    def _is_combination_compatible(self, combination_length):
-        """Check if combinations may exist.
-
-        :param combination_length:
-        :return:
-        """
-        if len(self._action_history) / combination_length >= self._max_action_loops:
-            is_compatible = True
-        else:
-            is_compatible = False
-        return is_compatible
-
-    def _detect_loops_for_combination_length(self, combination_length):
-        """Detect loops for combination length.
-
-        :param combination_length:
-        :return:
-        """
-        reversed_history = self._action_history[::-1]
-        combinations = [
-            reversed_history[x : x + combination_length]
-            for x in range(0, len(reversed_history), combination_length)
-        ][: self._max_action_loops]
-        is_loops_exist = True
-        for x, y in [combinations[x : x + 2] for x in range(0, len(combinations) - 1)]:
-            if x != y:
-                is_loops_exist = False
-                break
-        return is_loops_exist
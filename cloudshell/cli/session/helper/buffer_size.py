@@ -0,0 +1,98 @@
+import struct
+
+try:
+    import fcntl
+    import termios
+except ImportError:
+    fcntl = None
+
+
+class AdaptiveBufferSize(object):
+    """Size of the session reads adapted to the received data.
+
+    The data already waiting in the channel or the socket is read at once up to
+    the max size. The size is doubled when a read fills the buffer and halved
+    after SHRINK_READS reads using less than a half of it.
+    """
+
+    MIN_SIZE = 512
+    MAX_SIZE = 1024 * 1024
+    SHRINK_READS = 4
+
+    def __init__(self, size, min_size=MIN_SIZE, max_size=MAX_SIZE):
+        """Size of the session reads adapted to the received data.
+
+        :param int size: initial read size
+        :param int min_size: lower bound of the read size
+        :param int max_size: upper bound of the read size
+        """
+        self._min_size = min(min_size, size)
+        self._max_size = max(max_size, size)
+        self._short_reads = 0
+        self.size = size
+        self.reads = 0
+        self.bytes_received = 0
+        self.grows = 0
+        self.shrinks = 0
+        self.max_read_size = 0
+
+    def read_size(self, available=0):
+        """Size of the next read.
+
+        :param int available: count of bytes known to be waiting
+        :rtype: int
+        """
+        return min(max(self.size, available), self._max_size)
+
+    def update(self, read_size, received):
+        """Adapt the size to the result of the read.
+
+        :param int read_size: size of the read
+        :param int received: count of bytes received
+        """
+        self.reads += 1
+        self.bytes_received += received
+        self.max_read_size = max(self.max_read_size, read_size)
+        if received >= read_size:
+            self._short_reads = 0
+            if self.size < self._max_size:
+                self.size = min(self.size * 2, self._max_size)
+                self.grows += 1
+        elif received * 2 < self.size:
+            self._short_reads += 1
+            if self._short_reads >= self.SHRINK_READS and self.size > self._min_size:
+                self.size = max(self.size // 2, self._min_size)
+                self.shrinks += 1
+                self._short_reads = 0
+        else:
+            self._short_reads = 0
+
+    def as_dict(self):
+        """Sizing values.
+
+        :rtype: dict
+        """
+        return {
+            "size": self.size,
+            "reads": self.reads,
+            "bytes_received": self.bytes_received,
+            "grows": self.grows,
+            "shrinks": self.shrinks,
+            "max_read_size": self.max_read_size,
+        }
+
+
+def socket_pending_bytes(sock):
+    """Count of bytes waiting in the socket receive buffer.
+
+    :param socket.socket sock:
+    :return: count of bytes, 0 if it can't be determined
+    :rtype: int
+    """
+    if fcntl is None:
+        return 0
+    try:
+        result = fcntl.ioctl(sock.fileno(), termios.FIONREAD, struct.pack("I", 0))
+    except (IOError, OSError, ValueError):
+        return 0
+    return struct.unpack("I", result)[0]
@@ -0,0 +1,47 @@
+from threading import Lock
+
+
+class DeviceCapabilities(object):
+    """Thread-safe registry of the features detected on the devices.
+
+    Detection usually costs a round trip to the device, so the result is kept
+    for the process lifetime and shared by all the sessions to the device.
+    """
+
+    def __init__(self):
+        self._capabilities = {}
+        self._lock = Lock()
+
+    def get(self, device, name, default=None):
+        """Get detected capability of the device.
+
+        :param tuple device: device key, session type, host and port
+        :param str name: capability name
+        :param default: value returned if the capability isn't detected yet
+        """
+        with self._lock:
+            return self._capabilities.get(device, {}).get(name, default)
+
+    def set(self, device, name, value):  # noqa: A003
+        """Save detected capability of the device.
+
+        :param tuple device: device key, session type, host and port
+        :param str name: capability name
+        :param value: capability value
+        """
+        with self._lock:
+            self._capabilities.setdefault(device, {})[name] = value
+
+    def clear(self, device=None):
+        """Forget detected capabilities.
+
+        :param tuple device: device key, None to forget all the devices
+        """
+        with self._lock:
+            if device is None:
+                self._capabilities.clear()
+            else:
+                self._capabilities.pop(device, None)
+
+
+DEVICE_CAPABILITIES = DeviceCapabilities()
@@ -0,0 +1,194 @@
+import re
+
+from cloudshell.cli.session.helper.pattern_cache import compile_pattern
+
+GROUP_NAME_PREFIX = "_expect_"
+# patterns that refer to their own groups can't be renumbered in the alternation
+GROUP_REFERENCE_PATTERN = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+# global inline flags apply to the whole alternation on older Python versions
+INLINE_FLAGS_PATTERN = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+class ExpectMatcher(object):
+    """Search prompt and action patterns in the data received from the session.
+
+    Only newly received data plus an overlap window with the previously scanned
+    data are searched, so the cost of every read doesn't depend on the size of
+    the output collected so far. Patterns that have to see the whole output can
+    be matched with full_buffer=True.
+
+    The prompt and action keys are compiled into one alternation with named
+    groups, so the data is scanned once however many action keys there are.
+    """
+
+    OVERLAP_WINDOW = 1024
+
+    def __init__(
+        self,
+        prompt,
+        action_keys=None,
+        overlap_window=OVERLAP_WINDOW,
+        full_buffer=False,
+        flags=re.DOTALL,
+    ):
+        """Search prompt and action patterns in the data received from the session.
+
+        :param str prompt: expected string, string or regular expression,
+            None to search action keys only
+        :param list action_keys: action map keys in the order of priority
+        :param int overlap_window: count of previously scanned characters
+            searched again together with new data
+        :param bool full_buffer: search the whole data received after the last
+            reset instead of the overlap window
+        :param int flags: regular expression flags
+        """
+        self._action_patterns = [
+            (action_key, compile_pattern(action_key, flags))
+            for action_key in action_keys or []
+        ]
+        patterns = [action_key for action_key, _ in self._action_patterns]
+        if prompt is None:
+            self._prompt_pattern = None
+        else:
+            self._prompt_pattern = compile_pattern(prompt, flags)
+            patterns.insert(0, prompt)
+        self._combined_pattern = self._combine_patterns(patterns, flags)
+        self._overlap_window = overlap_window
+        self._full_buffer = full_buffer
+        self._buffer = ""
+        self._offset = 0
+
+    @staticmethod
+    def _combine_patterns(patterns, flags):
+        """Compile patterns into one alternation with the group for every pattern.
+
+        :param list[str] patterns: patterns in the order of priority
+        :param int flags: regular expression flags
+        :return: combined pattern or None if patterns can't be combined
+        """
+        if len(patterns) < 2 or any(
+            GROUP_REFERENCE_PATTERN.search(pattern)
+            or INLINE_FLAGS_PATTERN.search(pattern)
+            for pattern in patterns
+        ):
+            return None
+
+        combined = "|".join(
+            "(?P<{}{}>{})".format(GROUP_NAME_PREFIX, index, pattern)
+            for index, pattern in enumerate(patterns)
+        )
+        try:
+            return compile_pattern(combined, flags)
+        except re.error:
+            return None
+
+    @property
+    def offset(self):
+        """Position of the scanned buffer start in the data fed after reset.
+
+        :rtype: int
+        """
+        return self._offset
+
+    def reset(self):
+        """Forget all the data fed before."""
+        self._buffer = ""
+        self._offset = 0
+
+    def feed(self, data, preview=""):
+        """Add received data and search patterns in it.
+
+        :param str data: normalized data received from the session
+        :param str preview: data that can still change, it's searched together
+            with the received data but isn't added to the buffer
+        :return: prompt match object or None, first matched action key or None
+        :rtype: tuple
+        """
+        buffer = self._buffer + data
+        self._buffer = buffer + preview
+        # first character of the overlap window is kept only as a context for
+        # lookbehind and word boundaries, it mustn't be matched by "^"
+        pos = 1 if self._offset else 0
+
+        if self._combined_pattern is None:
+            prompt_match, action_key = self._search_each(pos)
+        else:
+            prompt_match, action_key = self._search_combined(pos)
+
+        self._buffer = buffer
+
+        if not self._full_buffer:
+            self._trim()
+
+        return prompt_match, action_key
+
+    def _search_each(self, pos):
+        """Search every pattern separately.
+
+        :param int pos: position in the buffer to start the search from
+        :rtype: tuple
+        """
+        prompt_match = self._search_prompt(pos)
+        return prompt_match, self._search_action_key(pos, len(self._action_patterns))
+
+    def _search_combined(self, pos):
+        """Scan the buffer once with the combined pattern.
+
+        The leftmost match of the alternation tells which pattern fired first.
+        Patterns of a higher priority can't match before that position, so
+        they are searched only after it to keep the priority of the prompt and
+        the action map order. The fired pattern is confirmed on its own, every
+        pattern is searched separately if the alternation disagrees with it.
+
+        :param int pos: position in the buffer to start the search from
+        :rtype: tuple
+        """
+        match = self._combined_pattern.search(self._buffer, pos)
+        if not match:
+            return None, None
+
+        index = int(match.lastgroup[len(GROUP_NAME_PREFIX) :])
+        if self._prompt_pattern is not None:
+            index -= 1
+        start = match.start()
+        if index < 0:
+            prompt_match = self._prompt_pattern.match(self._buffer, start)
+            if not prompt_match:
+                return self._search_each(pos)
+            return prompt_match, self._search_action_key(
+                start, len(self._action_patterns)
+            )
+
+        if not self._action_patterns[index][1].match(self._buffer, start):
+            return self._search_each(pos)
+
+        prompt_match = self._search_prompt(start + 1)
+        action_key = self._search_action_key(start + 1, index)
+        if action_key is None:
+            action_key = self._action_patterns[index][0]
+        return prompt_match, action_key
+
+    def _search_prompt(self, pos):
+        """Search prompt in the buffer.
+
+        :param int pos: position in the buffer to start the search from
+        """
+        if self._prompt_pattern is not None:
+            return self._prompt_pattern.search(self._buffer, pos)
+
+    def _search_action_key(self, pos, count):
+        """Find the first action key from the first count ones matching the buffer.
+
+        :param int pos: position in the buffer to start the search from
+        :param int count: count of action keys to check
+        """
+        for action_key, pattern in self._action_patterns[:count]:
+            if pattern.search(self._buffer, pos):
+                return action_key
+
+    def _trim(self):
+        """Keep only the overlap window of the scanned data."""
+        extra = len(self._buffer) - self._overlap_window - 1
+        if extra > 0:
+            self._buffer = self._buffer[extra:]
+            self._offset += extra
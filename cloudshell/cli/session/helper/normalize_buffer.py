@@ -1,4 +1,21 @@
 import re
+from itertools import chain
+
+# 27 - ESC character
+COLOR_PATTERN = re.compile(r"\x1b|\[[0-9]+(?:;[0-9]+)?m")
+# end of the chunk that can become a color or CR LF with the next chunk
+INCOMPLETE_TAIL_PATTERN = re.compile(
+    r"\r?(?:\x1b|\[[0-9]+(?:;[0-9]+)?m)*(?:\[[0-9]*(?:;[0-9]*)?)?\Z"
+)
+INCOMPLETE_TAIL_WINDOW = 64
+# control characters and sequences handled by the terminal model, CR LF and
+# colors are removed the same way as by normalize_buffer
+TERMINAL_CONTROL_PATTERN = re.compile(r"\r(?!\n)|\x08|\x1b(?!\[[0-9;]*m)")
+TERMINAL_SEQUENCE_PATTERN = re.compile(r"\n|\r|\x08|\x1b\[([0-9;?]*)([@-~])|\x1b")
+INCOMPLETE_SEQUENCE_PATTERN = re.compile(r"\x1b(?:\[[0-9;?]*)?\Z")
+CONTROL_CHARACTERS = dict.fromkeys(
+    chain(range(0x00, 0x09), (0x0B, 0x0C), range(0x0E, 0x20), range(0x7F, 0x100))
+)
 
 
 def normalize_buffer(input_buffer):
@@ -7,22 +24,181 @@ def normalize_buffer(input_buffer):
     :param str input_buffer: input buffer string from device
     :return: str
     """
-    color_pattern = re.compile(
-        r"\[[0-9]+;{0,1}[0-9]+m|\[[0-9]+m|\b|" + chr(27)
-    )  # 27 - ESC character
+    result_buffer = COLOR_PATTERN.sub("", input_buffer)
+    result_buffer = result_buffer.replace("\r\n", "\n")
+    return result_buffer.translate(CONTROL_CHARACTERS)
 
-    result_buffer = ""
 
-    match_iter = color_pattern.finditer(input_buffer)
+class BufferNormalizer(object):
+    """Normalize data received from the session chunk by chunk.
 
-    current_index = 0
-    for match_color in match_iter:
-        match_range = match_color.span()
-        result_buffer += input_buffer[current_index : match_range[0]]
-        current_index = match_range[1]
+    Colors, escape characters and CR LF split between chunks are kept until the
+    next chunk, so the result is the same as normalization of the joined data.
+    """
 
-    result_buffer += input_buffer[current_index:]
+    def __init__(self):
+        self._pending = ""
 
-    result_buffer = result_buffer.replace("\r\n", "\n")
+    @property
+    def pending(self):
+        """Data kept until the next chunk.
+
+        :rtype: str
+        """
+        return self._pending
+
+    @property
+    def preview(self):
+        """Kept data as it's shown now, it's incomplete and isn't shown.
+
+        :rtype: str
+        """
+        return ""
+
+    def normalize(self, data):
+        """Normalize the chunk, keep its incomplete end.
+
+        :param str data: data received from the session
+        :rtype: str
+        """
+        data = self._pending + data
+        tail_start = INCOMPLETE_TAIL_PATTERN.search(
+            data, max(len(data) - INCOMPLETE_TAIL_WINDOW, 0)
+        ).start()
+        self._pending = data[tail_start:]
+        return normalize_buffer(data[:tail_start])
+
+    def flush(self):
+        """Normalize the data kept from the previous chunk.
+
+        :rtype: str
+        """
+        data, self._pending = self._pending, ""
+        return normalize_buffer(data)
+
+    def reset(self):
+        """Forget the data kept from the previous chunk."""
+        self._pending = ""
+
+
+class TerminalNormalizer(object):
+    """Normalize data received from the session as a terminal shows it.
+
+    Carriage return, backspace, erase line and cursor left and right sequences
+    are applied to the current line, so redrawn lines appear once. The current
+    line is returned when it's completed by a line feed or flushed, it can be
+    matched before that using the preview. Chunks without these control
+    characters are normalized with normalize_buffer at the same cost.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._line = ""
+        self._column = 0
+
+    @property
+    def pending(self):
+        """Incomplete escape sequence kept until the next chunk.
+
+        :rtype: str
+        """
+        return self._pending
+
+    @property
+    def preview(self):
+        """Current line as it's shown now.
+
+        :rtype: str
+        """
+        return self._line
+
+    def normalize(self, data):
+        """Apply the chunk to the current line and return completed lines.
+
+        :param str data: data received from the session
+        :rtype: str
+        """
+        data = self._pending + data
+        self._pending = ""
+        if self._column == len(self._line) and not TERMINAL_CONTROL_PATTERN.search(
+            data
+        ):
+            data = self._line + normalize_buffer(data)
+            line_start = data.rfind("\n") + 1
+            self._line = data[line_start:]
+            self._column = len(self._line)
+            return data[:line_start]
+
+        incomplete = INCOMPLETE_SEQUENCE_PATTERN.search(
+            data, max(len(data) - INCOMPLETE_TAIL_WINDOW, 0)
+        )
+        if incomplete:
+            self._pending = data[incomplete.start() :]
+            data = data[: incomplete.start()]
+
+        lines = []
+        position = 0
+        for match in TERMINAL_SEQUENCE_PATTERN.finditer(data):
+            self._write(data[position : match.start()])
+            position = match.end()
+            sequence = match.group()
+            if sequence == "\n":
+                lines.append(self._line + "\n")
+                self._line = ""
+                self._column = 0
+            elif sequence == "\r":
+                self._column = 0
+            elif sequence == "\x08":
+                self._column = max(self._column - 1, 0)
+            elif match.group(2) is not None:
+                self._apply_csi(match.group(1), match.group(2))
+        self._write(data[position:])
+        return "".join(lines)
+
+    def _write(self, text):
+        """Write text to the current line at the cursor.
+
+        :param str text:
+        """
+        text = normalize_buffer(text)
+        if not text:
+            return
+        line = self._line
+        end = self._column + len(text)
+        self._line = line[: self._column].ljust(self._column) + text + line[end:]
+        self._column = end
+
+    def _apply_csi(self, parameters, command):
+        """Apply control sequence to the current line.
+
+        :param str parameters: sequence parameters
+        :param str command: final character of the sequence
+        """
+        if command == "K":
+            if parameters in ("", "0"):
+                self._line = self._line[: self._column]
+            elif parameters == "1":
+                self._line = " " * self._column + self._line[self._column :]
+            elif parameters == "2":
+                self._line = ""
+        elif command in ("C", "D") and (parameters.isdigit() or not parameters):
+            count = int(parameters or 1)
+            if command == "C":
+                self._column += count
+            elif command == "D":
+                self._column = max(self._column - count, 0)
+
+    def flush(self):
+        """Return the current line and start a new one.
+
+        :rtype: str
+        """
+        data = self._line + normalize_buffer(self._pending)
+        self.reset()
+        return data
 
-    return re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\xff]", "", result_buffer)
+    def reset(self):
+        """Forget the current line and the kept data."""
+        self._pending = ""
+        self._line = ""
+        self._column = 0
@@ -0,0 +1,246 @@
+import codecs
+import mmap
+import tempfile
+
+from cloudshell.cli.session.helper.pattern_cache import compile_pattern
+
+
+class OutputBuffer(object):
+    """Collect chunks of the session output and join them only once.
+
+    Appending to a string copies everything collected so far, so the cost of
+    reading a big output in small chunks grows with the square of its size.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    __nonzero__ = __bool__
+
+    def write(self, data):
+        """Add chunk to the end of the buffer.
+
+        :param str data:
+        """
+        if data:
+            self._chunks.append(data)
+            self._length += len(data)
+
+    def extend(self, other):
+        """Add all chunks of the other buffer to the end of the buffer.
+
+        :param OutputBuffer other:
+        """
+        self._chunks.extend(other._chunks)
+        self._length += other._length
+
+    def getvalue(self):
+        """Join collected chunks.
+
+        :rtype: str
+        """
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def clear(self):
+        """Remove all collected data."""
+        self._chunks = []
+        self._length = 0
+
+
+class SpoolingOutputBuffer(OutputBuffer):
+    """Output buffer moving the data to a temporary file after the threshold."""
+
+    ENCODING = "utf-8"
+
+    def __init__(self, threshold, encoding=ENCODING):
+        """Output buffer moving the data to a temporary file after the threshold.
+
+        :param int threshold: count of characters kept in memory
+        :param str encoding: encoding of the data in the file
+        """
+        super(SpoolingOutputBuffer, self).__init__()
+        self._threshold = threshold
+        self._encoding = encoding
+        self._output = None
+
+    def write(self, data):
+        """Add chunk to the end of the buffer.
+
+        :param str data:
+        """
+        if self._output is not None:
+            self._output += data
+            self._length += len(data)
+            return
+
+        super(SpoolingOutputBuffer, self).write(data)
+        if self._length > self._threshold:
+            self._output = SpooledOutput(self._encoding)
+            for chunk in self._chunks:
+                self._output += chunk
+            self._chunks = []
+
+    def extend(self, other):
+        for chunk in other._chunks:
+            self.write(chunk)
+
+    def getvalue(self):
+        """Join collected chunks.
+
+        :return: string or the output kept in the temporary file
+        :rtype: str|SpooledOutput
+        """
+        if self._output is not None:
+            return self._output
+        return super(SpoolingOutputBuffer, self).getvalue()
+
+    def clear(self):
+        super(SpoolingOutputBuffer, self).clear()
+        self._output = None
+
+
+class SpooledOutput(object):
+    """Command output kept in a temporary file.
+
+    The file is memory-mapped on demand, so regular expressions can be searched
+    and slices taken without loading the whole output to memory. Patterns are
+    encoded and matched against bytes, str(output) loads the whole output.
+    """
+
+    # max count of bytes of one UTF-8 encoded character
+    MAX_CHARACTER_SIZE = 4
+
+    def __init__(self, encoding=SpoolingOutputBuffer.ENCODING):
+        """Command output kept in a temporary file.
+
+        :param str encoding: encoding of the data in the file
+        """
+        self._encoding = encoding
+        self._utf8 = codecs.lookup(encoding).name == "utf-8"
+        self._file = tempfile.TemporaryFile()
+        self._length = 0
+        self._size = 0
+        self._mmap = None
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        return self.mmap[:].decode(self._encoding)
+
+    def __repr__(self):
+        return "<{} length={}>".format(self.__class__.__name__, self._length)
+
+    def __iadd__(self, data):
+        """Add data to the end of the file."""
+        encoded = data.encode(self._encoding)
+        self._file.write(encoded)
+        self._length += len(data)
+        self._size += len(encoded)
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        return self
+
+    def __eq__(self, other):
+        if isinstance(other, SpooledOutput):
+            other = str(other)
+        return str(self) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __contains__(self, text):
+        return self.mmap.find(text.encode(self._encoding)) != -1
+
+    def __getitem__(self, key):
+        if self._size != self._length:
+            # positions of characters and bytes differ for non ASCII data
+            if self._is_tail_slice(key):
+                return self._tail(-key.start)
+            return str(self)[key]
+        if isinstance(key, slice):
+            return self.mmap[key].decode(self._encoding)
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("output index out of range")
+        return self.mmap[key : key + 1].decode(self._encoding)
+
+    def _is_tail_slice(self, key):
+        return (
+            self._utf8
+            and isinstance(key, slice)
+            and key.start is not None
+            and key.start < 0
+            and key.stop is None
+            and key.step in (None, 1)
+        )
+
+    def _tail(self, count):
+        """Decode the last characters of the UTF-8 output from the end of the file.
+
+        :param int count: count of characters
+        :rtype: str
+        """
+        start = max(self._size - count * self.MAX_CHARACTER_SIZE, 0)
+        data = self.mmap[start:]
+        if start:
+            # skip the continuation bytes of the character cut at the start
+            skip = 0
+            for byte in bytearray(data[: self.MAX_CHARACTER_SIZE]):
+                if byte & 0xC0 != 0x80:
+                    break
+                skip += 1
+            data = data[skip:]
+        return data.decode(self._encoding)[-count:]
+
+    @property
+    def mmap(self):
+        """Memory map of the file.
+
+        :rtype: mmap.mmap
+        """
+        if self._mmap is None:
+            self._file.flush()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def search(self, pattern, flags=0):
+        """Search regular expression in the output.
+
+        :param str pattern: regular expression
+        :param int flags: regular expression flags
+        :return: match object of the bytes pattern
+        """
+        return self._compile(pattern, flags).search(self.mmap)
+
+    def finditer(self, pattern, flags=0):
+        """Iterate over all the matches of the regular expression in the output.
+
+        :param str pattern: regular expression
+        :param int flags: regular expression flags
+        :return: match objects of the bytes pattern
+        """
+        return self._compile(pattern, flags).finditer(self.mmap)
+
+    def _compile(self, pattern, flags):
+        return compile_pattern(pattern.encode(self._encoding), flags)
+
+    def close(self):
+        """Remove the temporary file."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
@@ -0,0 +1,80 @@
+import re
+from collections import OrderedDict
+from threading import Lock
+
+
+class PatternCache(object):
+    """Thread-safe LRU cache of compiled regular expressions."""
+
+    MAX_SIZE = 1024
+
+    def __init__(self, max_size=MAX_SIZE):
+        """Thread-safe LRU cache of compiled regular expressions.
+
+        :param int max_size: max count of compiled patterns kept in the cache
+        """
+        self._max_size = max_size
+        self._patterns = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def compile(self, pattern, flags=0):  # noqa: A003
+        """Get compiled pattern from the cache or compile and cache it.
+
+        :param str pattern: regular expression
+        :param int flags: regular expression flags
+        :rtype: typing.Pattern
+        """
+        key = (pattern, flags)
+        with self._lock:
+            compiled = self._patterns.pop(key, None)
+            if compiled is not None:
+                self.hits += 1
+                self._patterns[key] = compiled
+                return compiled
+            self.misses += 1
+
+        compiled = re.compile(pattern, flags)
+
+        with self._lock:
+            self._patterns[key] = compiled
+            while len(self._patterns) > self._max_size:
+                self._patterns.popitem(last=False)
+        return compiled
+
+    def clear(self):
+        """Remove all the patterns and reset counters."""
+        with self._lock:
+            self._patterns.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Cache usage statistics.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "size": len(self._patterns),
+                "max_size": self._max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+PATTERN_CACHE = PatternCache()
+
+
+def compile_pattern(pattern, flags=0):
+    """Get compiled pattern from the process-wide pattern cache.
+
+    :param str pattern: regular expression
+    :param int flags: regular expression flags
+    :rtype: typing.Pattern
+    """
+    return PATTERN_CACHE.compile(pattern, flags)
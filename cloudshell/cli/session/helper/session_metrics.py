@@ -0,0 +1,134 @@
+class SessionMetrics(object):
+    """Measurements of the session used to tune reading of the output.
+
+    Gaps between the chunks of the command output are smoothed with an
+    exponentially weighted moving average, the idle window after which the
+    output is treated as complete is a multiple of the average gap. The read size
+    adapted by the session is kept in buffer_size.
+    """
+
+    IDLE_WINDOW = 0.1
+    MIN_IDLE_WINDOW = 0.005
+    MAX_IDLE_WINDOW = 1.0
+    IDLE_GAP_FACTOR = 4
+    SMOOTHING_FACTOR = 0.2
+
+    def __init__(
+        self,
+        idle_window=IDLE_WINDOW,
+        min_idle_window=MIN_IDLE_WINDOW,
+        max_idle_window=MAX_IDLE_WINDOW,
+        buffer_size=None,
+    ):
+        """Measurements of the session used to tune reading of the output.
+
+        :param float idle_window: idle window used before any gap is measured
+        :param float min_idle_window: lower bound of the learned idle window
+        :param float max_idle_window: upper bound of the learned idle window
+        :param AdaptiveBufferSize buffer_size: read size of the session
+        """
+        self._idle_window = idle_window
+        self._min_idle_window = min_idle_window
+        self._max_idle_window = max_idle_window
+        self.chunk_gap = None
+        self.chunk_gaps = 0
+        self.completions = 0
+        self.late_completions = 0
+        self.buffer_size = buffer_size
+
+    @property
+    def idle_window(self):
+        """Time without new data after which the output is complete, seconds.
+
+        :rtype: float
+        """
+        if self.chunk_gap is None:
+            return self._idle_window
+        return min(
+            max(self.chunk_gap * self.IDLE_GAP_FACTOR, self._min_idle_window),
+            self._max_idle_window,
+        )
+
+    def add_chunk_gap(self, gap):
+        """Add time between two chunks of the command output.
+
+        :param float gap: seconds
+        """
+        if self.chunk_gap is None:
+            self.chunk_gap = gap
+        else:
+            self.chunk_gap += self.SMOOTHING_FACTOR * (gap - self.chunk_gap)
+        self.chunk_gaps += 1
+
+    def add_completion(self, late_data):
+        """Count the output completed after the idle window.
+
+        :param bool late_data: data was received after the expected string
+        """
+        self.completions += 1
+        if late_data:
+            self.late_completions += 1
+
+    def as_dict(self):
+        """Metrics values.
+
+        :rtype: dict
+        """
+        return {
+            "idle_window": self.idle_window,
+            "chunk_gap": self.chunk_gap,
+            "chunk_gaps": self.chunk_gaps,
+            "completions": self.completions,
+            "late_completions": self.late_completions,
+            "buffer_size": self.buffer_size.as_dict() if self.buffer_size else None,
+        }
+
+
+class CommandTiming(object):
+    """Time spent in the phases of a command, seconds.
+
+    Time to the first byte and to the prompt match is counted from the end of
+    the send, they are None if the phase wasn't reached.
+    """
+
+    def __init__(self, command):
+        """Time spent in the phases of a command, seconds.
+
+        :param str command: command sent to the session
+        """
+        self.command = command
+        self.clear_buffer = 0.0
+        self.send = 0.0
+        self.first_byte = None
+        self.prompt_match = None
+        self.actions = 0.0
+        self.drain = 0.0
+        self.total = None
+        self.bytes_received = 0
+        self.chunks = 0
+
+    def __repr__(self):
+        return "<{} {}>".format(
+            self.__class__.__name__,
+            " ".join(
+                "{}={!r}".format(key, value) for key, value in self.as_dict().items()
+            ),
+        )
+
+    def as_dict(self):
+        """Timing values.
+
+        :rtype: dict
+        """
+        return {
+            "command": self.command,
+            "clear_buffer": self.clear_buffer,
+            "send": self.send,
+            "first_byte": self.first_byte,
+            "prompt_match": self.prompt_match,
+            "actions": self.actions,
+            "drain": self.drain,
+            "total": self.total,
+            "bytes_received": self.bytes_received,
+            "chunks": self.chunks,
+        }
@@ -0,0 +1,166 @@
+import hashlib
+import io
+import os
+from threading import Lock
+
+import paramiko
+
+
+def _file_mtime(path):
+    """Modification time of the file or None if it doesn't exist.
+
+    :param str path:
+    :rtype: float
+    """
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class HostKeyStore(object):
+    """Known hosts file parsed once per process.
+
+    The file is parsed again only when its modification time changes. The
+    parsed keys are shared by all the connections and must not be modified.
+    """
+
+    KNOWN_HOSTS_PATH = os.path.join("~", ".ssh", "known_hosts")
+
+    def __init__(self, path=KNOWN_HOSTS_PATH):
+        """Known hosts file parsed once per process.
+
+        :param str path: known hosts file, the user's one by default
+        """
+        self._path = os.path.expanduser(path)
+        self._lock = Lock()
+        self._host_keys = paramiko.HostKeys()
+        self._mtime = None
+        self.loads = 0
+
+    def get(self):
+        """Parsed host keys, reloaded if the file was modified.
+
+        :rtype: paramiko.HostKeys
+        """
+        mtime = _file_mtime(self._path)
+        with self._lock:
+            if mtime != self._mtime:
+                host_keys = paramiko.HostKeys()
+                if mtime is not None:
+                    try:
+                        host_keys.load(self._path)
+                    except IOError:
+                        mtime = None
+                self._host_keys = host_keys
+                self._mtime = mtime
+                self.loads += 1
+            return self._host_keys
+
+    def apply(self, client):
+        """Use the parsed keys as the system host keys of the client.
+
+        Replaces SSHClient.load_system_host_keys which parses the file on every
+        call.
+
+        :param paramiko.SSHClient client:
+        """
+        # paramiko only reads the system host keys, sharing them is safe
+        client._system_host_keys = self.get()
+
+
+class PrivateKeyCache(object):
+    """Private keys parsed once per process.
+
+    Keys are cached by the fingerprint of the key text and the passphrase, key
+    files by the path and the passphrase and parsed again when the file is
+    modified.
+    """
+
+    KEY_CLASSES = (
+        paramiko.RSAKey,
+        paramiko.ECDSAKey,
+        paramiko.Ed25519Key,
+        paramiko.DSSKey,
+    )
+
+    def __init__(self):
+        self._lock = Lock()
+        self._keys = {}
+        self._files = {}
+
+    @staticmethod
+    def _fingerprint(key_text, password):
+        fingerprint = hashlib.sha256()
+        for value in (key_text, password or ""):
+            if not isinstance(value, bytes):
+                value = value.encode("utf-8")
+            fingerprint.update(value)
+            fingerprint.update(b"\0")
+        return fingerprint.hexdigest()
+
+    def from_string(self, key_text, password=None):
+        """Parse the private key or get it from the cache.
+
+        :param str key_text: private key in the PEM or OpenSSH format
+        :param str password: passphrase of the encrypted key
+        :rtype: paramiko.PKey
+        """
+        if isinstance(key_text, bytes):
+            # byte string on Python 2, StringIO accepts text only
+            key_text = key_text.decode("utf-8")
+        cache_key = self._fingerprint(key_text, password)
+        with self._lock:
+            pkey = self._keys.get(cache_key)
+        if pkey is None:
+            pkey = self._parse(key_text, password)
+            with self._lock:
+                self._keys[cache_key] = pkey
+        return pkey
+
+    def from_file(self, path, password=None):
+        """Parse the private key file or get it from the cache.
+
+        :param str path:
+        :param str password: passphrase of the encrypted key
+        :rtype: paramiko.PKey
+        """
+        path = os.path.abspath(os.path.expanduser(path))
+        cache_key = self._fingerprint(path, password)
+        mtime = _file_mtime(path)
+        with self._lock:
+            entry = self._files.get(cache_key)
+        if entry is not None and mtime is not None and entry[0] == mtime:
+            return entry[1]
+
+        with io.open(path, encoding="utf-8") as key_file:
+            pkey = self._parse(key_file.read(), password)
+        with self._lock:
+            self._files[cache_key] = (mtime, pkey)
+        return pkey
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            self._files.clear()
+
+    def _parse(self, key_text, password):
+        """Parse the key trying the key types supported by paramiko.
+
+        :param str key_text:
+        :param str password:
+        :rtype: paramiko.PKey
+        """
+        error = None
+        for key_class in self.KEY_CLASSES:
+            try:
+                return key_class.from_private_key(io.StringIO(key_text), password)
+            except paramiko.PasswordRequiredException:
+                raise
+            except (paramiko.SSHException, ValueError) as e:
+                error = e
+        raise paramiko.SSHException("Unable to parse the private key: {}".format(error))
+
+
+HOST_KEYS = HostKeyStore()
+PRIVATE_KEYS = PrivateKeyCache()
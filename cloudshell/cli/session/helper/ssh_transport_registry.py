@@ -0,0 +1,109 @@
+import hashlib
+from threading import Lock
+
+
+class SSHTransportRegistry(object):
+    """Authenticated SSH clients shared by the sessions to the same device.
+
+    Every session opens its own channel on the shared transport, the client is
+    closed when the last session releases it. Devices rejecting additional
+    channels are marked, the sessions to them connect separately.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._clients = {}
+        self._not_shareable = set()
+
+    @staticmethod
+    def make_key(host, port, username, password=None, pkey=None, profile=None):
+        """Key of the shared transport.
+
+        Credentials are kept as a fingerprint, not the password itself.
+
+        :param str host:
+        :param int port:
+        :param str username:
+        :param str password:
+        :param paramiko.PKey pkey:
+        :param cloudshell.cli.session.helper.ssh_tuning_profile.SSHTuningProfile profile:  # noqa: E501
+            transports tuned differently are not shared
+        :rtype: tuple
+        """
+        fingerprint = hashlib.sha256()
+        fingerprint.update((password or "").encode("utf-8"))
+        if pkey is not None:
+            fingerprint.update(pkey.get_fingerprint())
+        return host, port, username, fingerprint.hexdigest(), profile
+
+    def shareable(self, key):
+        """Check if the device accepts several channels on one transport.
+
+        :param tuple key:
+        :rtype: bool
+        """
+        return key not in self._not_shareable
+
+    def set_not_shareable(self, key):
+        """Connect the next sessions to the device separately.
+
+        :param tuple key:
+        """
+        with self._lock:
+            self._not_shareable.add(key)
+
+    def acquire(self, key, connect):
+        """Get the shared client or connect a new one.
+
+        :param tuple key:
+        :param connect: function returning connected paramiko.SSHClient, it's
+            called without the lock held
+        :return: client and True if it was already used by another session
+        :rtype: tuple[paramiko.SSHClient, bool]
+        """
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None and self._is_active(entry[0]):
+                entry[1] += 1
+                return entry[0], True
+
+        client = connect()
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None or not self._is_active(entry[0]):
+                self._clients[key] = [client, 1]
+        return client, False
+
+    def release(self, key, client):
+        """Release the client, close it when no session uses it.
+
+        :param tuple key:
+        :param paramiko.SSHClient client:
+        """
+        with self._lock:
+            entry = self._clients.get(key)
+            # a client connected in parallel to the shared one isn't registered
+            if entry is not None and entry[0] is client:
+                entry[1] -= 1
+                if entry[1] > 0:
+                    return
+                del self._clients[key]
+        client.close()
+
+    def references(self, key):
+        """Count of the sessions using the shared client.
+
+        :param tuple key:
+        :rtype: int
+        """
+        with self._lock:
+            entry = self._clients.get(key)
+            return entry[1] if entry is not None else 0
+
+    @staticmethod
+    def _is_active(client):
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+
+SSH_TRANSPORTS = SSHTransportRegistry()
@@ -0,0 +1,148 @@
+import paramiko
+
+
+class SSHTuningProfile(object):
+    """Transport settings of the SSH connections.
+
+    Compression helps slow WAN links with large outputs, cheaper ciphers and
+    bigger windows help LAN links. Paramiko negotiates the algorithms in its
+    own order of preference, the ciphers and KEX algorithms missing from the
+    profile lists are disabled.
+    """
+
+    BANNER_TIMEOUT = 30
+
+    def __init__(
+        self,
+        compression=False,
+        ciphers=None,
+        kex=None,
+        window_size=None,
+        max_packet_size=None,
+        keepalive_interval=0,
+        connect_timeout=None,
+        banner_timeout=BANNER_TIMEOUT,
+        auth_timeout=None,
+    ):
+        """Transport settings of the SSH connections.
+
+        :param bool compression: enable zlib compression of the transport
+        :param list[str] ciphers: allowed ciphers, all supported by default
+        :param list[str] kex: allowed key exchange algorithms, all supported by
+            default
+        :param int window_size: channel window size in bytes, paramiko default
+            if None
+        :param int max_packet_size: channel max packet size in bytes, paramiko
+            default if None
+        :param int keepalive_interval: seconds between keepalive packets, 0
+            disables them
+        :param float connect_timeout: TCP connect timeout, the session timeout
+            if None
+        :param float banner_timeout: time to wait for the SSH banner
+        :param float auth_timeout: time to wait for the authentication response,
+            paramiko default if None
+        """
+        self.compression = compression
+        self.ciphers = tuple(ciphers) if ciphers is not None else None
+        self.kex = tuple(kex) if kex is not None else None
+        self.window_size = window_size
+        self.max_packet_size = max_packet_size
+        self.keepalive_interval = keepalive_interval
+        self.connect_timeout = connect_timeout
+        self.banner_timeout = banner_timeout
+        self.auth_timeout = auth_timeout
+        self._validate(self.ciphers, paramiko.Transport._preferred_ciphers, "cipher")
+        self._validate(self.kex, paramiko.Transport._preferred_kex, "KEX")
+
+    @staticmethod
+    def _validate(allowed, supported, name):
+        if allowed is None:
+            return
+        unsupported = set(allowed) - set(supported)
+        if unsupported:
+            raise ValueError(
+                "Unsupported {} algorithms: {}".format(
+                    name, ", ".join(sorted(unsupported))
+                )
+            )
+        if not allowed:
+            raise ValueError("At least one {} algorithm is required".format(name))
+
+    def _key(self):
+        return (
+            self.compression,
+            self.ciphers,
+            self.kex,
+            self.window_size,
+            self.max_packet_size,
+            self.keepalive_interval,
+            self.connect_timeout,
+            self.banner_timeout,
+            self.auth_timeout,
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, SSHTuningProfile) and self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return "{}(compression={}, ciphers={}, kex={}, window_size={})".format(
+            type(self).__name__,
+            self.compression,
+            self.ciphers,
+            self.kex,
+            self.window_size,
+        )
+
+    @property
+    def disabled_algorithms(self):
+        """Algorithms excluded from the negotiation.
+
+        :rtype: dict
+        """
+        disabled = {}
+        if self.ciphers is not None:
+            disabled["ciphers"] = [
+                cipher
+                for cipher in paramiko.Transport._preferred_ciphers
+                if cipher not in self.ciphers
+            ]
+        if self.kex is not None:
+            disabled["kex"] = [
+                kex for kex in paramiko.Transport._preferred_kex if kex not in self.kex
+            ]
+        return disabled
+
+    def connect_kwargs(self, timeout):
+        """Arguments of paramiko.SSHClient.connect.
+
+        :param float timeout: session timeout, used if connect timeout isn't set
+        :rtype: dict
+        """
+        return {
+            "timeout": self.connect_timeout or timeout,
+            "banner_timeout": self.banner_timeout,
+            "auth_timeout": self.auth_timeout,
+            "compress": self.compression,
+            "disabled_algorithms": self.disabled_algorithms or None,
+        }
+
+    def apply(self, transport):
+        """Tune the connected transport before the channels are opened.
+
+        :param paramiko.Transport transport:
+        """
+        if self.window_size is not None:
+            transport.default_window_size = self.window_size
+        if self.max_packet_size is not None:
+            transport.default_max_packet_size = self.max_packet_size
+        if self.keepalive_interval:
+            transport.set_keepalive(self.keepalive_interval)
+
+
+DEFAULT_SSH_TUNING_PROFILE = SSHTuningProfile()
@@ -0,0 +1,225 @@
+import itertools
+import json
+import time
+from threading import Lock, current_thread, local
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+
+class NoopSpan(object):
+    """Span that records nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class NoopTracer(object):
+    """Tracer used by default, the same span is returned for every call."""
+
+    def span(self, name, **attributes):
+        """Span of the operation.
+
+        :param str name: operation name
+        :param attributes: attributes of the operation
+        :rtype: NoopSpan
+        """
+        return NOOP_SPAN
+
+
+class Span(object):
+    """Operation measured by SpanTracer."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, tracer, name, attributes):
+        """Operation measured by SpanTracer.
+
+        :param SpanTracer tracer: tracer exporting the span
+        :param str name: operation name
+        :param dict attributes: attributes of the operation
+        """
+        self._tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(self._ids)
+        self.parent_id = None
+        self.trace_id = self.span_id
+        self.thread = current_thread().name
+        self.start_time = None
+        self.duration = None
+        self.error = None
+        self._start = None
+
+    def __enter__(self):
+        parent = self._tracer._push(self)
+        if parent is not None:
+            self.parent_id = parent.span_id
+            self.trace_id = parent.trace_id
+        self.start_time = time.time()
+        self._start = monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.duration = monotonic() - self._start
+        if exc_type is not None:
+            self.error = "{}: {}".format(exc_type.__name__, exc_val)
+        self._tracer._pop(self)
+        return False
+
+    def set_attribute(self, key, value):
+        """Add attribute to the span.
+
+        :param str key:
+        :param value:
+        """
+        self.attributes[key] = value
+
+    def as_dict(self):
+        """Span values.
+
+        :rtype: dict
+        """
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "trace_id": self.trace_id,
+            "thread": self.thread,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class SpanTracer(object):
+    """Tracer measuring nested operations of every thread as spans.
+
+    Completed spans are passed to the exporter, e.g. JsonExporter.
+    """
+
+    def __init__(self, exporter):
+        """Tracer measuring nested operations of every thread as spans.
+
+        :param exporter: object with export(span) method
+        """
+        self._exporter = exporter
+        self._local = local()
+
+    def span(self, name, **attributes):
+        """Span of the operation, use it as a context manager.
+
+        :param str name: operation name
+        :param attributes: attributes of the operation
+        :rtype: Span
+        """
+        return Span(self, name, attributes)
+
+    def _push(self, span):
+        """Make the span current for the thread.
+
+        :param Span span:
+        :return: parent span or None
+        :rtype: Span
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        parent = stack[-1] if stack else None
+        stack.append(span)
+        return parent
+
+    def _pop(self, span):
+        """Complete the span and export it.
+
+        :param Span span:
+        """
+        stack = self._local.stack
+        if stack and stack[-1] is span:
+            stack.pop()
+        self._exporter.export(span)
+
+
+class JsonExporter(object):
+    """Write spans to the file as JSON, one span per line."""
+
+    def __init__(self, file_obj):
+        """Write spans to the file as JSON, one span per line.
+
+        :param file_obj: file opened for writing text
+        """
+        self._file = file_obj
+        self._lock = Lock()
+
+    def export(self, span):
+        """Write the span.
+
+        :param Span span:
+        """
+        line = json.dumps(span.as_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+
+class OpenTelemetryTracer(object):
+    """Tracer reporting spans to OpenTelemetry.
+
+    Requires opentelemetry-api, spans are exported by the configured SDK.
+    """
+
+    def __init__(self, tracer=None):
+        """Tracer reporting spans to OpenTelemetry.
+
+        :param tracer: OpenTelemetry tracer, the tracer of the package by default
+        """
+        if tracer is None:
+            if otel_trace is None:
+                raise ImportError("OpenTelemetryTracer requires opentelemetry-api")
+            tracer = otel_trace.get_tracer("cloudshell.cli")
+        self._tracer = tracer
+
+    def span(self, name, **attributes):
+        """Span of the operation, use it as a context manager.
+
+        :param str name: operation name
+        :param attributes: attributes of the operation
+        """
+        return self._tracer.start_as_current_span(name, attributes=attributes)
+
+
+_tracer = NoopTracer()
+
+
+def get_tracer():
+    """Tracer used by the sessions, pools and command modes.
+
+    :rtype: NoopTracer|SpanTracer|OpenTelemetryTracer
+    """
+    return _tracer
+
+
+def set_tracer(tracer):
+    """Set tracer used by the sessions, pools and command modes.
+
+    :param tracer: tracer or None to disable tracing
+    """
+    global _tracer
+    _tracer = tracer if tracer is not None else NoopTracer()
@@ -0,0 +1,96 @@
+import io
+import time
+from collections import deque
+from threading import Lock, Thread
+
+
+class TranscriptRecorder(object):
+    """Keep the last data sent to and received from the session in memory.
+
+    The data is only referenced when it's recorded, it's formatted and written
+    to the file in a thread when the transcript is flushed, usually when a
+    command fails. The oldest entries are dropped when max_size characters are
+    exceeded.
+    """
+
+    MAX_SIZE = 1024 * 1024
+    SENT = ">"
+    RECEIVED = "<"
+
+    def __init__(self, path=None, max_size=MAX_SIZE):
+        """Keep the last data sent to and received from the session in memory.
+
+        :param str path: file the transcript is appended to when it's flushed
+        :param int max_size: count of characters kept in memory
+        """
+        self._path = path
+        self._max_size = max_size
+        self._entries = deque()
+        self._size = 0
+        self._lock = Lock()
+        self._write_lock = Lock()
+        self._flush_thread = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def record(self, direction, data):
+        """Add data to the transcript.
+
+        :param str direction: SENT or RECEIVED
+        :param str data:
+        """
+        with self._lock:
+            self._entries.append((time.time(), direction, data))
+            self._size += len(data)
+            while self._size > self._max_size and len(self._entries) > 1:
+                self._size -= len(self._entries.popleft()[2])
+
+    def getvalue(self):
+        """Format the transcript kept in memory.
+
+        :rtype: str
+        """
+        with self._lock:
+            entries = list(self._entries)
+        return self._format(entries)
+
+    @staticmethod
+    def _format(entries):
+        # unicode on Python 2, the file opened by io.open accepts text only
+        return u"".join(
+            u"{:.6f} {} {!r}\n".format(timestamp, direction, data)
+            for timestamp, direction, data in entries
+        )
+
+    def flush(self, path=None):
+        """Append the transcript to the file in a thread and clear it.
+
+        :param str path: file to write to, the path of the recorder by default
+        :return: thread writing the file or None if there is no file
+        :rtype: threading.Thread
+        """
+        path = path or self._path
+        if not path:
+            return None
+        with self._lock:
+            entries = list(self._entries)
+            self._entries.clear()
+            self._size = 0
+        self._flush_thread = Thread(target=self._write, args=(path, entries))
+        self._flush_thread.daemon = True
+        self._flush_thread.start()
+        return self._flush_thread
+
+    def _write(self, path, entries):
+        with self._write_lock:
+            with io.open(path, "a", encoding="utf-8") as transcript_file:
+                transcript_file.write(self._format(entries))
+
+    def wait(self, timeout=None):
+        """Wait until the last flush is written.
+
+        :param float timeout: seconds
+        """
+        if self._flush_thread is not None:
+            self._flush_thread.join(timeout)
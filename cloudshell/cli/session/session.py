@@ -5,6 +5,9 @@ ABC = ABCMeta("ABC", (object,), {"__slots__": ()})
 
 
 class Session(ABC):
+    # False if the session can't keep a command mode between the commands
+    COMMAND_MODES = True
+
     @abstractmethod
     def connect(self, prompt, logger):
         pass
@@ -14,6 +14,10 @@ class SessionLoopDetectorException(ExpectedSessionException):
     pass
 
 
+class SessionCommandTimeoutException(ExpectedSessionException):
+    pass
+
+
 class CommandExecutionException(ExpectedSessionException):
     pass
 
@@ -0,0 +1,200 @@
+from collections import OrderedDict, namedtuple
+from threading import Lock, Thread
+
+from cloudshell.cli.session.expect_session import wait_readable
+from cloudshell.cli.session.ssh_session import SSHSession
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+ExecResult = namedtuple("ExecResult", ["stdout", "stderr", "exit_status"])
+
+
+class SSHExecSession(SSHSession):
+    """SSH session running every command in its own exec channel.
+
+    Commands return clean stdout, stderr and exit status, no prompt is matched
+    and no shell is opened. A mode entered in one channel doesn't apply to the
+    next one, so the CLI service doesn't send the commands entering the command
+    modes and their enter actions. Independent commands run concurrently on the
+    channels of one transport, up to max_channels at once, devices limit the
+    count of channels per connection.
+    """
+
+    SESSION_TYPE = "SSH_EXEC"
+    COMMAND_MODES = False
+    MAX_CHANNELS = 4
+
+    def __init__(self, *args, **kwargs):
+        """SSH session running every command in its own exec channel.
+
+        Takes the arguments of SSHSession.
+
+        :param int max_channels: count of the commands run at once, keyword only
+        """
+        max_channels = kwargs.pop("max_channels", self.MAX_CHANNELS)
+        super(SSHExecSession, self).__init__(*args, **kwargs)
+        self._max_channels = max_channels
+
+    def _initialize_session(self, prompt, logger):
+        """Connect to the device, channels are opened for every command.
+
+        :param str prompt:
+        :param logging.Logger logger:
+        """
+        self._connect_handler(logger)
+
+    def _connect_actions(self, prompt, logger):
+        self._on_session_start(logger)
+
+    def probe_for_prompt(self, expected_string, logger):
+        return ""
+
+    def match_prompt(self, prompt, match_string, logger):
+        """Exec session has no prompt, any mode matches it.
+
+        :rtype: bool
+        """
+        return True
+
+    def exec_command(self, command, logger, timeout=None):
+        """Run the command in a new exec channel.
+
+        :param str command:
+        :param logging.Logger logger:
+        :param float timeout: max time to get the result, session timeout by default
+        :rtype: ExecResult
+        """
+        timeout = timeout or self._timeout
+        deadline = monotonic() + timeout
+        logger.debug("Exec command: %s", command)
+        channel = self._handler.get_transport().open_session(timeout=timeout)
+        try:
+            channel.exec_command(command)
+            stdout = bytearray()
+            stderr = bytearray()
+            read_size = self._buffer_size.size
+            while True:
+                if channel.recv_ready():
+                    stdout += channel.recv(read_size)
+                elif channel.recv_stderr_ready():
+                    stderr += channel.recv_stderr(read_size)
+                elif channel.eof_received or channel.exit_status_ready():
+                    # the output is received before the exit status
+                    break
+                else:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        raise self._command_timeout_exception(timeout)
+                    # exit status doesn't wake up the wait, it's polled
+                    wait_readable(channel, min(remaining, self.READ_POLL_TIMEOUT))
+            channel.status_event.wait(max(deadline - monotonic(), 0))
+            exit_status = channel.exit_status
+        finally:
+            channel.close()
+        return ExecResult(
+            stdout.decode(self._encoding, self._decode_errors),
+            stderr.decode(self._encoding, self._decode_errors),
+            exit_status,
+        )
+
+    def exec_commands(self, commands, logger, timeout=None, max_channels=None):
+        """Run the commands concurrently, each in its own exec channel.
+
+        :param list[str] commands:
+        :param logging.Logger logger:
+        :param float timeout: max time to get the result of every command
+        :param int max_channels: count of the commands run at once, default
+            value is set for the session
+        :return: results in the order of the commands
+        :rtype: list[ExecResult]
+        """
+        max_channels = max(max_channels or self._max_channels, 1)
+        results = [None] * len(commands)
+        errors = [None] * len(commands)
+        pending = iter(enumerate(commands))
+        lock = Lock()
+
+        def run():
+            while True:
+                with lock:
+                    index, command = next(pending, (None, None))
+                if index is None:
+                    return
+                try:
+                    results[index] = self.exec_command(command, logger, timeout)
+                except Exception as e:
+                    errors[index] = e
+
+        threads = [Thread(target=run) for _ in range(min(max_channels, len(commands)))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for error in errors:
+            if error is not None:
+                raise error
+        return results
+
+    def hardware_expect(
+        self,
+        command,
+        expected_string,
+        logger,
+        action_map=None,
+        error_map=None,
+        timeout=None,
+        *args,
+        **optional_args
+    ):
+        """Run the command, the expected string and the actions aren't used.
+
+        :param command: command to run
+        :param expected_string: not used
+        :param logger: logger
+        :param action_map: not used
+        :param error_map: expected error map with subclass of CommandExecutionException
+            or str, searched in stdout and stderr
+        :param timeout: max time to get the result
+        :return: stdout followed by stderr
+        :rtype: str
+        """
+        result = self.exec_command(command, logger, timeout)
+        output = result.stdout + result.stderr
+        self._check_error_map(output, error_map or OrderedDict())
+        return output
+
+    def send_commands(
+        self,
+        commands,
+        expected_string,
+        logger,
+        error_map=None,
+        error_maps=None,
+        timeout=None,
+        *args,
+        **optional_args
+    ):
+        """Run the commands concurrently and check their error maps.
+
+        :param list[str] commands: commands to run
+        :param expected_string: not used
+        :param logger: logger
+        :param error_map: error map common for all the commands
+        :param list[dict] error_maps: error map of every command
+        :param timeout: max time to get the result of every command
+        :return: stdout followed by stderr of every command
+        :rtype: list[str]
+        """
+        command_error_maps = self._merge_error_maps(commands, error_map, error_maps)
+        outputs = []
+        for result, command_error_map in zip(
+            self.exec_commands(commands, logger, timeout), command_error_maps
+        ):
+            output = result.stdout + result.stderr
+            self._check_error_map(output, command_error_map)
+            outputs.append(output)
+        return outputs
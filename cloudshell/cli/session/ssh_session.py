@@ -5,6 +5,11 @@ from scp import SCPClient
 
 from cloudshell.cli.session.connection_params import ConnectionParams
 from cloudshell.cli.session.expect_session import ExpectSession
+from cloudshell.cli.session.helper.ssh_key_cache import HOST_KEYS, PRIVATE_KEYS
+from cloudshell.cli.session.helper.ssh_transport_registry import SSH_TRANSPORTS
+from cloudshell.cli.session.helper.ssh_tuning_profile import (
+    DEFAULT_SSH_TUNING_PROFILE,
+)
 from cloudshell.cli.session.session_exceptions import (
     SessionException,
     SessionReadEmptyData,
@@ -19,6 +24,8 @@ class SSHSessionException(SessionException):
 class SSHSession(ExpectSession, ConnectionParams):
     SESSION_TYPE = "SSH"
     BUFFER_SIZE = 512
+    SHARE_TRANSPORT = False
+    TUNING_PROFILE = DEFAULT_SSH_TUNING_PROFILE
 
     def __init__(
         self,
@@ -31,6 +38,27 @@ class SSHSession(ExpectSession, ConnectionParams):
         *args,
         **kwargs
     ):
+        """SSH session.
+
+        :param str host:
+        :param str username:
+        :param str password:
+        :param int port:
+        :param on_session_start:
+        :param paramiko.PKey|str pkey: parsed key or the private key text, the
+            text is parsed once per process
+        :param str pkey_password: passphrase of the private key text, keyword
+            only
+        :param bool share_transport: open the shell channel on the transport
+            already connected to the device by another session with the same
+            credentials, keyword only
+        :param cloudshell.cli.session.helper.ssh_tuning_profile.SSHTuningProfile tuning_profile:  # noqa: E501
+            compression, algorithms, window size and timeouts of the transport,
+            keyword only
+        """
+        share_transport = kwargs.pop("share_transport", self.SHARE_TRANSPORT)
+        pkey_password = kwargs.pop("pkey_password", None)
+        tuning_profile = kwargs.pop("tuning_profile", None) or self.TUNING_PROFILE
         ConnectionParams.__init__(
             self, host, port=port, on_session_start=on_session_start, pkey=pkey
         )
@@ -42,10 +70,13 @@ class SSHSession(ExpectSession, ConnectionParams):
         self.username = username
         self.password = password
         self.pkey = pkey
+        self._pkey_password = pkey_password
 
         self._handler = None
         self._current_channel = None
-        self._buffer_size = self.BUFFER_SIZE
+        self._share_transport = share_transport
+        self._transport_key = None
+        self._tuning_profile = tuning_profile
 
     def __eq__(self, other):
         """Is equal.
@@ -66,15 +97,58 @@ class SSHSession(ExpectSession, ConnectionParams):
 
     def _create_handler(self):
         self._handler = paramiko.SSHClient()
-        self._handler.load_system_host_keys()
+        HOST_KEYS.apply(self._handler)
         self._handler.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
+    def _get_pkey(self):
+        """Parsed private key.
+
+        :rtype: paramiko.PKey
+        """
+        if self.pkey is None or isinstance(self.pkey, paramiko.PKey):
+            return self.pkey
+        return PRIVATE_KEYS.from_string(self.pkey, self._pkey_password)
+
     def _initialize_session(self, prompt, logger):
         """Initialize session.
 
         :param str prompt:
         :param logging.Logger logger:
         """
+        transport_key = SSH_TRANSPORTS.make_key(
+            self.host,
+            self.port,
+            self.username,
+            self.password,
+            self._get_pkey(),
+            self._tuning_profile,
+        )
+        if self._share_transport and SSH_TRANSPORTS.shareable(transport_key):
+            self._handler, shared = SSH_TRANSPORTS.acquire(
+                transport_key, lambda: self._connect_handler(logger)
+            )
+            self._transport_key = transport_key
+            try:
+                self._current_channel = self._handler.invoke_shell()
+            except paramiko.SSHException:
+                self._release_handler()
+                if not shared:
+                    raise
+                logger.debug("Device rejected additional channel, connecting")
+                SSH_TRANSPORTS.set_not_shareable(transport_key)
+                self._connect_handler(logger)
+                self._current_channel = self._handler.invoke_shell()
+        else:
+            self._connect_handler(logger)
+            self._current_channel = self._handler.invoke_shell()
+        self._current_channel.settimeout(self._timeout)
+
+    def _connect_handler(self, logger):
+        """Create handler and connect to the device.
+
+        :param logging.Logger logger:
+        :rtype: paramiko.SSHClient
+        """
         self._create_handler()
         try:
             self._handler.connect(
@@ -82,20 +156,26 @@ class SSHSession(ExpectSession, ConnectionParams):
                 self.port,
                 self.username,
                 self.password,
-                timeout=self._timeout,
-                banner_timeout=30,
                 allow_agent=False,
                 look_for_keys=False,
-                pkey=self.pkey,
+                pkey=self._get_pkey(),
+                **self._tuning_profile.connect_kwargs(self._timeout)
             )
+            self._tuning_profile.apply(self._handler.get_transport())
         except Exception as e:
             logger.exception("Failed to initialize session:")
             raise SSHSessionException(
                 "Failed to open connection to device: {}".format(e)
             )
+        return self._handler
 
-        self._current_channel = self._handler.invoke_shell()
-        self._current_channel.settimeout(self._timeout)
+    def _release_handler(self):
+        """Close the channel and release the shared handler."""
+        if self._current_channel is not None:
+            self._current_channel.close()
+        SSH_TRANSPORTS.release(self._transport_key, self._handler)
+        self._transport_key = None
+        self._handler = None
 
     def _connect_actions(self, prompt, logger):
         """Connect actions.
@@ -110,7 +190,9 @@ class SSHSession(ExpectSession, ConnectionParams):
 
     def disconnect(self):
         """Disconnect from device."""
-        if self._handler:
+        if self._transport_key is not None:
+            self._release_handler()
+        elif self._handler:
             self._handler.close()
         self._active = False
 
@@ -120,23 +202,32 @@ class SSHSession(ExpectSession, ConnectionParams):
         :param str command:
         :param logging.Logger logger:
         """
-        self._current_channel.send(command)
+        self._current_channel.send(self._encode(command))
+
+    def _select_handle(self):
+        return self._current_channel
+
+    def _has_pending_data(self):
+        return self._current_channel.recv_ready()
 
-    def _receive(self, timeout, logger):
+    def _receive_bytes(self, timeout, logger):
         """Read session buffer.
 
         :param int timeout: time between retries
         :param logging.Logger logger:
+        :rtype: bytes
         """
         # Set the channel timeout
         timeout = timeout if timeout else self._timeout
-        self._current_channel.settimeout(timeout)
+        self._set_socket_timeout(self._current_channel, timeout)
 
+        # read everything the channel already received at once
+        read_size = self._buffer_size.read_size(len(self._current_channel.in_buffer))
         try:
-            byte_data = self._current_channel.recv(self._buffer_size)
-            data = byte_data.decode()
+            data = self._current_channel.recv(read_size)
         except socket.timeout:
             raise SessionReadTimeout()
+        self._buffer_size.update(read_size, len(data))
 
         if not data:
             raise SessionReadEmptyData()
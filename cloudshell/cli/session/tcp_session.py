@@ -2,6 +2,7 @@ import socket
 
 from cloudshell.cli.session.connection_params import ConnectionParams
 from cloudshell.cli.session.expect_session import ExpectSession
+from cloudshell.cli.session.helper.buffer_size import socket_pending_bytes
 from cloudshell.cli.session.session_exceptions import (
     SessionReadEmptyData,
     SessionReadTimeout,
@@ -19,7 +20,6 @@ class TCPSession(ExpectSession, ConnectionParams):
         )
         ExpectSession.__init__(self, *args, **kwargs)
 
-        self._buffer_size = self.BUFFER_SIZE
         self._handler = None
 
     def _initialize_session(self, prompt, logger):
@@ -47,17 +47,26 @@ class TCPSession(ExpectSession, ConnectionParams):
         :param command: message/command to send
         :return:
         """
-        self._handler.sendall(command)
+        self._handler.sendall(self._encode(command))
 
-    def _receive(self, timeout, logger):
-        """Read session buffer."""
+    def _select_handle(self):
+        return self._handler
+
+    def _receive_bytes(self, timeout, logger):
+        """Read session buffer.
+
+        :rtype: bytes
+        """
         timeout = timeout if timeout else self._timeout
-        self._handler.settimeout(timeout)
+        self._set_socket_timeout(self._handler, timeout)
 
+        # read everything the socket already received at once
+        read_size = self._buffer_size.read_size(socket_pending_bytes(self._handler))
         try:
-            data = self._handler.recv(self._buffer_size)
+            data = self._handler.recv(read_size)
         except socket.timeout:
             raise SessionReadTimeout()
+        self._buffer_size.update(read_size, len(data))
 
         if not data:
             raise SessionReadEmptyData()
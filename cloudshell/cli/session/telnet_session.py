@@ -97,21 +97,28 @@ class TelnetSession(ExpectSession, ConnectionParams):
         :param command: message / command to send
         :type command: str
         """
-        byte_command = command.encode()
-        self._handler.write(byte_command)
+        self._handler.write(self._encode(command))
 
-    def _receive(self, timeout, logger):
-        """Read session buffer."""
+    def _select_handle(self):
+        return self._handler.get_socket()
+
+    def _has_pending_data(self):
+        return bool(self._handler.cookedq or self._handler.rawq)
+
+    def _receive_bytes(self, timeout, logger):
+        """Read session buffer.
+
+        :rtype: bytes
+        """
         timeout = timeout if timeout else self._timeout
-        self._handler.get_socket().settimeout(timeout)
+        self._set_socket_timeout(self._handler.get_socket(), timeout)
 
         try:
-            byte_data = self._handler.read_some()
+            data = self._handler.read_some()
         except socket.timeout:
             raise SessionReadTimeout()
 
-        if not byte_data:
+        if not data:
             raise SessionReadEmptyData()
 
-        data = byte_data.decode()
         return data
@@ -0,0 +1,62 @@
+import socket
+from unittest import TestCase
+
+from cloudshell.cli.session.helper.buffer_size import (
+    AdaptiveBufferSize,
+    socket_pending_bytes,
+)
+from cloudshell.cli.session.helper.session_metrics import SessionMetrics
+
+
+class TestAdaptiveBufferSize(TestCase):
+    def setUp(self):
+        self._instance = AdaptiveBufferSize(1024, min_size=512, max_size=4096)
+
+    def test_read_available_data(self):
+        self.assertEqual(self._instance.read_size(), 1024)
+        self.assertEqual(self._instance.read_size(2048), 2048)
+        self.assertEqual(self._instance.read_size(10000), 4096)
+
+    def test_grow_on_full_reads(self):
+        for _ in range(3):
+            self._instance.update(self._instance.size, self._instance.size)
+        self.assertEqual(self._instance.size, 4096)
+        self.assertEqual(self._instance.grows, 2)
+        self.assertEqual(self._instance.bytes_received, 1024 + 2048 + 4096)
+
+    def test_shrink_after_short_reads(self):
+        for _ in range(AdaptiveBufferSize.SHRINK_READS - 1):
+            self._instance.update(1024, 100)
+        self.assertEqual(self._instance.size, 1024)
+        self._instance.update(1024, 100)
+        self.assertEqual(self._instance.size, 512)
+        for _ in range(AdaptiveBufferSize.SHRINK_READS):
+            self._instance.update(512, 10)
+        self.assertEqual(self._instance.size, 512)
+        self.assertEqual(self._instance.shrinks, 1)
+
+    def test_metrics(self):
+        self._instance.update(2048, 2048)
+        metrics = SessionMetrics(buffer_size=self._instance).as_dict()
+        self.assertEqual(
+            metrics["buffer_size"],
+            {
+                "size": 2048,
+                "reads": 1,
+                "bytes_received": 2048,
+                "grows": 1,
+                "shrinks": 0,
+                "max_read_size": 2048,
+            },
+        )
+
+
+class TestSocketPendingBytes(TestCase):
+    def test_pending_bytes(self):
+        local, remote = socket.socketpair()
+        self.addCleanup(local.close)
+        self.addCleanup(remote.close)
+        self.assertEqual(socket_pending_bytes(local), 0)
+        remote.sendall(b"test data")
+        pending = socket_pending_bytes(local)
+        self.assertIn(pending, (0, 9))
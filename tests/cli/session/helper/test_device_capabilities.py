@@ -0,0 +1,26 @@
+from unittest import TestCase
+
+from cloudshell.cli.session.helper.device_capabilities import DeviceCapabilities
+
+
+class TestDeviceCapabilities(TestCase):
+    def setUp(self):
+        self._instance = DeviceCapabilities()
+        self._device = ("SSH", "host", 22)
+
+    def test_get_default(self):
+        self.assertIsNone(self._instance.get(self._device, "capability"))
+        self.assertTrue(self._instance.get(self._device, "capability", True))
+
+    def test_set(self):
+        self._instance.set(self._device, "capability", False)
+        self.assertFalse(self._instance.get(self._device, "capability", True))
+        self.assertIsNone(self._instance.get(("SSH", "host", 2222), "capability"))
+
+    def test_clear_device(self):
+        other_device = ("SSH", "other", 22)
+        self._instance.set(self._device, "capability", False)
+        self._instance.set(other_device, "capability", False)
+        self._instance.clear(self._device)
+        self.assertIsNone(self._instance.get(self._device, "capability"))
+        self.assertFalse(self._instance.get(other_device, "capability"))
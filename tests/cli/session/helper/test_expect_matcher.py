@@ -0,0 +1,113 @@
+import re
+from random import Random
+from unittest import TestCase
+
+from cloudshell.cli.session.helper.expect_matcher import ExpectMatcher
+
+
+class TestExpectMatcher(TestCase):
+    def test_prompt_match(self):
+        matcher = ExpectMatcher(r"#\s*$")
+        prompt_match, action_key = matcher.feed("output\nswitch# ")
+        self.assertIsNotNone(prompt_match)
+        self.assertIsNone(action_key)
+
+    def test_prompt_split_between_chunks(self):
+        matcher = ExpectMatcher(r"switch#")
+        self.assertIsNone(matcher.feed("output\nswi")[0])
+        self.assertIsNotNone(matcher.feed("tch#")[0])
+
+    def test_action_key_priority(self):
+        matcher = ExpectMatcher(r"#$", ["[Pp]assword:", "[Ll]ogin:"])
+        prompt_match, action_key = matcher.feed("Login: Password:")
+        self.assertIsNone(prompt_match)
+        self.assertEqual(action_key, "[Pp]assword:")
+
+    def test_old_data_out_of_window_not_matched(self):
+        matcher = ExpectMatcher(r"#$", ["Login:"], overlap_window=10)
+        self.assertEqual(matcher.feed("Login: ")[1], "Login:")
+        matcher.feed("x" * 20)
+        self.assertIsNone(matcher.feed("y")[1])
+        self.assertEqual(matcher.offset, 17)
+
+    def test_full_buffer_match(self):
+        matcher = ExpectMatcher(r"^start.*end$", overlap_window=10, full_buffer=True)
+        matcher.feed("start" + "x" * 20)
+        self.assertIsNotNone(matcher.feed("end")[0])
+
+    def test_line_start_not_matched_inside_window(self):
+        matcher = ExpectMatcher(r"^x+#", overlap_window=5)
+        matcher.feed("a" * 20 + "x" * 10)
+        self.assertIsNone(matcher.feed("#")[0])
+
+    def test_reset(self):
+        matcher = ExpectMatcher(r"#$", ["Login:"])
+        matcher.feed("Login:")
+        matcher.reset()
+        self.assertEqual(matcher.feed("output")[1], None)
+        self.assertEqual(matcher.offset, 0)
+
+    def test_combined_match_keeps_priority(self):
+        matcher = ExpectMatcher(r"#$", ["Login:", "[Pp]assword:"])
+        prompt_match, action_key = matcher.feed("Password: Login: #")
+        self.assertIsNotNone(prompt_match)
+        self.assertEqual(prompt_match.group(), "#")
+        self.assertEqual(action_key, "Login:")
+
+    def test_patterns_with_group_references_searched_separately(self):
+        matcher = ExpectMatcher(r"(\w)\1#", ["(a)b"])
+        self.assertIsNone(matcher._combined_pattern)
+        self.assertEqual(matcher.feed("ab xx#")[1], "(a)b")
+
+    def test_patterns_with_inline_flags_searched_separately(self):
+        matcher = ExpectMatcher(r"Router#", [r"\[Confirm\]", "(?i)password:"])
+        self.assertIsNone(matcher._combined_pattern)
+        self.assertEqual(matcher.feed("output [CONFIRM] text\nRouter#")[1], None)
+        self.assertEqual(matcher.feed(" PASSWORD:")[1], "(?i)password:")
+
+    def test_combined_match_confirmed_by_pattern(self):
+        matcher = ExpectMatcher(r"Router#", [r"\[Confirm\]"])
+        # alternation matching differently than the patterns on their own
+        matcher._combined_pattern = re.compile(
+            matcher._combined_pattern.pattern, re.DOTALL | re.IGNORECASE
+        )
+        prompt_match, action_key = matcher.feed(
+            "show run | i router#\nrouter# [CONFIRM]\nRouter#"
+        )
+        self.assertEqual(prompt_match.start(), 39)
+        self.assertIsNone(action_key)
+
+    def test_combined_and_separate_search_results_are_equal(self):
+        random = Random(1)
+        prompt = r"[ab]{2}#"
+        action_keys = ["a+b", "b#", "^ab", "(ba|aa)$", "a#"]
+        for _ in range(500):
+            data = "".join(random.choice("ab# ") for _ in range(random.randint(0, 12)))
+            combined = ExpectMatcher(prompt, action_keys)
+            self.assertIsNotNone(combined._combined_pattern)
+            separate = ExpectMatcher(prompt, action_keys)
+            separate._combined_pattern = None
+
+            combined_prompt, combined_key = combined.feed(data)
+            separate_prompt, separate_key = separate.feed(data)
+
+            self.assertEqual(combined_key, separate_key, data)
+            self.assertEqual(
+                combined_prompt and combined_prompt.span(),
+                separate_prompt and separate_prompt.span(),
+                data,
+            )
+
+    def test_action_keys_without_prompt(self):
+        matcher = ExpectMatcher(None, ["[Ee]rror", "[Ii]nvalid"])
+        self.assertEqual(matcher.feed("Invalid input"), (None, "[Ii]nvalid"))
+        self.assertEqual(matcher.feed(" Error"), (None, "[Ee]rror"))
+
+    def test_preview_searched_but_not_kept(self):
+        matcher = ExpectMatcher(r"switch#\s*$", ["--More--"])
+        prompt_match, action_key = matcher.feed("output\n", "--More--")
+        self.assertIsNone(prompt_match)
+        self.assertEqual(action_key, "--More--")
+        prompt_match, action_key = matcher.feed("output\n", "switch#")
+        self.assertIsNotNone(prompt_match)
+        self.assertIsNone(action_key)
@@ -0,0 +1,126 @@
+import re
+from random import Random
+from unittest import TestCase
+
+from cloudshell.cli.session.helper.normalize_buffer import (
+    BufferNormalizer,
+    TerminalNormalizer,
+    normalize_buffer,
+)
+
+
+def original_normalize_buffer(input_buffer):
+    color_pattern = re.compile(r"\[[0-9]+;{0,1}[0-9]+m|\[[0-9]+m|\b|" + chr(27))
+    result_buffer = ""
+    current_index = 0
+    for match_color in color_pattern.finditer(input_buffer):
+        match_range = match_color.span()
+        result_buffer += input_buffer[current_index : match_range[0]]
+        current_index = match_range[1]
+    result_buffer += input_buffer[current_index:]
+    result_buffer = result_buffer.replace("\r\n", "\n")
+    return re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\xff]", "", result_buffer)
+
+
+def random_data(random, size):
+    alphabet = ["a", "#", " ", "1", "12", ";", "m", "[", "\x1b", "\x1b[3", "\r"]
+    alphabet += ["\n", "\r\n", "\x00", "\x7f", "\xe9", "\t", "\x1b[1;32m", "\x1b[0m"]
+    return "".join(random.choice(alphabet) for _ in range(size))
+
+
+class TestNormalizeBuffer(TestCase):
+    def test_remove_colors_and_control_characters(self):
+        self.assertEqual(
+            normalize_buffer("\x1b[1;32mup\x1b[0m\r\nswitch#\x07\x00 "),
+            "up\nswitch# ",
+        )
+
+    def test_same_as_original(self):
+        random = Random(1)
+        for _ in range(500):
+            data = random_data(random, 30)
+            self.assertEqual(normalize_buffer(data), original_normalize_buffer(data))
+
+
+class TestBufferNormalizer(TestCase):
+    def setUp(self):
+        self._instance = BufferNormalizer()
+
+    def test_keep_split_escape_sequence(self):
+        self.assertEqual(self._instance.normalize("up\x1b[3"), "up")
+        self.assertEqual(self._instance.pending, "\x1b[3")
+        self.assertEqual(self._instance.normalize("2mdown"), "down")
+        self.assertEqual(self._instance.pending, "")
+
+    def test_keep_split_crlf(self):
+        self.assertEqual(self._instance.normalize("line\r"), "line")
+        self.assertEqual(self._instance.normalize("\nswitch#"), "\nswitch#")
+
+    def test_flush(self):
+        self._instance.normalize("switch#\r")
+        self.assertEqual(self._instance.flush(), "\r")
+        self.assertEqual(self._instance.pending, "")
+
+    def test_reset(self):
+        self._instance.normalize("switch#\x1b")
+        self._instance.reset()
+        self.assertEqual(self._instance.flush(), "")
+
+    def test_chunks_same_as_joined_data(self):
+        random = Random(1)
+        for _ in range(500):
+            data = random_data(random, 30)
+            positions = sorted(random.sample(range(len(data) + 1), 3))
+            chunks = [
+                data[start:end]
+                for start, end in zip([0] + positions, positions + [len(data)])
+            ]
+            result = "".join(self._instance.normalize(chunk) for chunk in chunks)
+            result += self._instance.flush()
+            self.assertEqual(result, normalize_buffer(data))
+
+
+class TestTerminalNormalizer(TestCase):
+    def setUp(self):
+        self._instance = TerminalNormalizer()
+
+    def test_plain_stream(self):
+        self.assertEqual(self._instance.normalize("line 1\nline"), "line 1\n")
+        self.assertEqual(self._instance.preview, "line")
+        self.assertEqual(self._instance.normalize(" 2\nswitch#"), "line 2\n")
+        self.assertEqual(self._instance.flush(), "switch#")
+        self.assertEqual(self._instance.preview, "")
+
+    def test_carriage_return_overwrite(self):
+        self.assertEqual(
+            self._instance.normalize("Progress 10%\rProgress 100%\r\n"),
+            "Progress 100%\n",
+        )
+
+    def test_backspace(self):
+        self._instance.normalize("--More--\x08\x08\x08\x08\x08\x08\x08\x08")
+        self.assertEqual(self._instance.preview, "--More--")
+        self._instance.normalize("        \x08\x08\x08\x08\x08\x08\x08\x08next")
+        self.assertEqual(self._instance.preview, "next    ")
+
+    def test_erase_line(self):
+        self.assertEqual(
+            self._instance.normalize("--More--\r\x1b[Kinterface\n"), "interface\n"
+        )
+        self._instance.normalize("abcdef\x1b[3D\x1b[1K")
+        self.assertEqual(self._instance.preview, "   def")
+        self._instance.normalize("\x1b[2Kxyz")
+        self.assertEqual(self._instance.preview, "   xyz")
+
+    def test_cursor_movement(self):
+        self._instance.normalize("abcdef\x1b[4DX\x1b[2CY")
+        self.assertEqual(self._instance.preview, "abXdeY")
+
+    def test_colors_removed(self):
+        self.assertEqual(self._instance.normalize("\x1b[1;32mup\x1b[0m\r\n"), "up\n")
+
+    def test_split_escape_sequence(self):
+        self._instance.normalize("abc\x1b[")
+        self.assertEqual(self._instance.pending, "\x1b[")
+        self._instance.normalize("2Dx")
+        self.assertEqual(self._instance.preview, "axc")
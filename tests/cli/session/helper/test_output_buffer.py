@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import re
+from unittest import TestCase
+
+from cloudshell.cli.session.helper.output_buffer import (
+    OutputBuffer,
+    SpooledOutput,
+    SpoolingOutputBuffer,
+)
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+
+class TestOutputBuffer(TestCase):
+    def setUp(self):
+        self._instance = OutputBuffer()
+
+    def test_getvalue(self):
+        self._instance.write("abc")
+        self._instance.write("")
+        self._instance.write("def")
+        self.assertEqual(self._instance.getvalue(), "abcdef")
+        self.assertEqual(len(self._instance), 6)
+
+    def test_empty(self):
+        self.assertFalse(self._instance)
+        self.assertEqual(self._instance.getvalue(), "")
+
+    def test_extend(self):
+        other = OutputBuffer()
+        other.write("def")
+        self._instance.write("abc")
+        self._instance.extend(other)
+        other.clear()
+        self.assertEqual(self._instance.getvalue(), "abcdef")
+        self.assertEqual(other.getvalue(), "")
+
+
+class TestSpoolingOutputBuffer(TestCase):
+    def test_output_below_threshold_kept_in_memory(self):
+        instance = SpoolingOutputBuffer(10)
+        instance.write("abcdef")
+        self.assertEqual(instance.getvalue(), "abcdef")
+
+    def test_output_above_threshold_moved_to_file(self):
+        instance = SpoolingOutputBuffer(5)
+        instance.write("abc")
+        instance.write("def\n")
+        instance.write("switch#")
+        output = instance.getvalue()
+        self.assertIsInstance(output, SpooledOutput)
+        self.assertEqual(len(output), 14)
+        self.assertEqual(str(output), "abcdef\nswitch#")
+
+
+class TestSpooledOutput(TestCase):
+    def setUp(self):
+        self._instance = SpooledOutput()
+        self._instance += "show version\n"
+        self._instance += "Version 1.0\nswitch#"
+
+    def tearDown(self):
+        self._instance.close()
+
+    def test_slicing(self):
+        self.assertEqual(self._instance[:4], "show")
+        self.assertEqual(self._instance[-7:], "switch#")
+        self.assertEqual(self._instance[-1], "#")
+        with self.assertRaises(IndexError):
+            self._instance[100]
+
+    def test_slicing_non_ascii(self):
+        self._instance += u"é!"
+        self.assertEqual(self._instance[-2:], u"é!")
+
+    def test_tail_slicing_non_ascii_not_loaded(self):
+        self._instance += "\u0442\u0435\u0441\u0442" * 100 + "\nswitch#"
+        expected = str(self._instance)
+        with patch.object(SpooledOutput, "__str__") as to_str:
+            for count in (1, 8, 9, 10, 11, 100, 1000):
+                self.assertEqual(self._instance[-count:], expected[-count:])
+        to_str.assert_not_called()
+
+    def test_search(self):
+        match = self._instance.search(r"Version (\S+)", re.DOTALL)
+        self.assertEqual(match.group(1), b"1.0")
+        self.assertIsNone(self._instance.search(r"[Ee]rror"))
+
+    def test_contains_and_equal(self):
+        self.assertIn("Version", self._instance)
+        self.assertNotIn("Error", self._instance)
+        self.assertEqual(self._instance, "show version\nVersion 1.0\nswitch#")
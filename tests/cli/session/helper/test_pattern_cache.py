@@ -0,0 +1,55 @@
+import re
+import threading
+from unittest import TestCase
+
+from cloudshell.cli.session.helper.pattern_cache import PatternCache
+
+
+class TestPatternCache(TestCase):
+    def setUp(self):
+        self._instance = PatternCache(max_size=2)
+
+    def test_compile_returns_cached_pattern(self):
+        pattern = self._instance.compile(r"#\s*$", re.DOTALL)
+        self.assertIs(pattern, self._instance.compile(r"#\s*$", re.DOTALL))
+        self.assertEqual(self._instance.hits, 1)
+        self.assertEqual(self._instance.misses, 1)
+
+    def test_flags_are_part_of_key(self):
+        pattern = self._instance.compile(r"#")
+        self.assertIsNot(pattern, self._instance.compile(r"#", re.MULTILINE))
+        self.assertEqual(self._instance.misses, 2)
+
+    def test_least_recently_used_pattern_removed(self):
+        self._instance.compile("a")
+        self._instance.compile("b")
+        self._instance.compile("a")
+        self._instance.compile("c")
+        self.assertEqual(len(self._instance), 2)
+        self._instance.compile("a")
+        self.assertEqual(self._instance.hits, 2)
+        self._instance.compile("b")
+        self.assertEqual(self._instance.misses, 4)
+
+    def test_clear(self):
+        self._instance.compile("a")
+        self._instance.clear()
+        self.assertEqual(
+            self._instance.stats(), {"size": 0, "max_size": 2, "hits": 0, "misses": 0}
+        )
+
+    def test_concurrent_compile(self):
+        instance = PatternCache(max_size=10)
+
+        def compile_patterns():
+            for i in range(200):
+                instance.compile("pattern{}".format(i % 20))
+
+        threads = [threading.Thread(target=compile_patterns) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(instance), 10)
+        self.assertEqual(instance.hits + instance.misses, 800)
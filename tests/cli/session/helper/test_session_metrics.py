@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+from cloudshell.cli.session.helper.session_metrics import (
+    CommandTiming,
+    SessionMetrics,
+)
+
+
+class TestSessionMetrics(TestCase):
+    def setUp(self):
+        self._instance = SessionMetrics(
+            idle_window=0.1, min_idle_window=0.01, max_idle_window=1
+        )
+
+    def test_default_idle_window(self):
+        self.assertEqual(self._instance.idle_window, 0.1)
+
+    def test_idle_window_learned_from_gaps(self):
+        self._instance.add_chunk_gap(0.01)
+        self.assertAlmostEqual(self._instance.idle_window, 0.04)
+        self._instance.add_chunk_gap(0.06)
+        self.assertAlmostEqual(self._instance.chunk_gap, 0.02)
+        self.assertAlmostEqual(self._instance.idle_window, 0.08)
+
+    def test_idle_window_bounds(self):
+        self._instance.add_chunk_gap(0)
+        self.assertEqual(self._instance.idle_window, 0.01)
+        self._instance.add_chunk_gap(100)
+        self.assertEqual(self._instance.idle_window, 1)
+
+    def test_completions(self):
+        self._instance.add_completion(False)
+        self._instance.add_completion(True)
+        metrics = self._instance.as_dict()
+        self.assertEqual(metrics["completions"], 2)
+        self.assertEqual(metrics["late_completions"], 1)
+
+
+class TestCommandTiming(TestCase):
+    def test_as_dict(self):
+        timing = CommandTiming("show version")
+        timing.first_byte = 0.1
+        timing.chunks = 2
+        self.assertEqual(
+            timing.as_dict(),
+            {
+                "command": "show version",
+                "clear_buffer": 0.0,
+                "send": 0.0,
+                "first_byte": 0.1,
+                "prompt_match": None,
+                "actions": 0.0,
+                "drain": 0.0,
+                "total": None,
+                "bytes_received": 0,
+                "chunks": 2,
+            },
+        )
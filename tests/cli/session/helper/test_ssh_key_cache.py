@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import TestCase
+
+import paramiko
+
+from cloudshell.cli.session.helper.ssh_key_cache import HostKeyStore, PrivateKeyCache
+
+try:
+    from unittest.mock import Mock
+except ImportError:
+    from mock import Mock
+
+
+def _key_text(pkey):
+    key_file = StringIO()
+    pkey.write_private_key(key_file)
+    return key_file.getvalue()
+
+
+class TestHostKeyStore(TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self._dir)
+        self._path = os.path.join(self._dir, "known_hosts")
+        self._host_key = paramiko.RSAKey.generate(1024)
+
+    def _write(self, host, mtime):
+        with open(self._path, "w") as known_hosts:
+            known_hosts.write(
+                "{} {} {}\n".format(
+                    host, self._host_key.get_name(), self._host_key.get_base64()
+                )
+            )
+        os.utime(self._path, (mtime, mtime))
+
+    def test_get(self):
+        self._write("host1", 1000)
+        instance = HostKeyStore(self._path)
+        host_keys = instance.get()
+        self.assertIn("host1", host_keys)
+        self.assertIs(instance.get(), host_keys)
+        self.assertEqual(instance.loads, 1)
+
+    def test_get_modified(self):
+        self._write("host1", 1000)
+        instance = HostKeyStore(self._path)
+        instance.get()
+        self._write("host2", 2000)
+        host_keys = instance.get()
+        self.assertIn("host2", host_keys)
+        self.assertNotIn("host1", host_keys)
+        self.assertEqual(instance.loads, 2)
+
+    def test_get_missing_file(self):
+        instance = HostKeyStore(self._path)
+        self.assertEqual(len(instance.get()), 0)
+        self._write("host1", 1000)
+        self.assertIn("host1", instance.get())
+
+    def test_apply(self):
+        self._write("host1", 1000)
+        instance = HostKeyStore(self._path)
+        client = paramiko.SSHClient()
+        instance.apply(client)
+        self.assertIs(client._system_host_keys, instance.get())
+
+
+class TestPrivateKeyCache(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._pkey = paramiko.RSAKey.generate(1024)
+
+    def setUp(self):
+        self._instance = PrivateKeyCache()
+
+    def test_from_string(self):
+        key_text = _key_text(self._pkey)
+        pkey = self._instance.from_string(key_text)
+        self.assertEqual(pkey, self._pkey)
+        self.assertIs(self._instance.from_string(key_text), pkey)
+
+    def test_from_bytes(self):
+        key_text = _key_text(self._pkey)
+        pkey = self._instance.from_string(key_text.encode("utf-8"))
+        self.assertEqual(pkey, self._pkey)
+        self.assertIs(self._instance.from_string(key_text), pkey)
+
+    def test_from_string_password(self):
+        key_file = StringIO()
+        self._pkey.write_private_key(key_file, password="secret")
+        key_text = key_file.getvalue()
+        with self.assertRaises(paramiko.PasswordRequiredException):
+            self._instance.from_string(key_text)
+        self.assertEqual(self._instance.from_string(key_text, "secret"), self._pkey)
+
+    def test_from_string_invalid(self):
+        with self.assertRaises(paramiko.SSHException):
+            self._instance.from_string("invalid key")
+
+    def test_from_file(self):
+        key_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, key_dir)
+        path = os.path.join(key_dir, "key.pem")
+        self._pkey.write_private_key_file(path)
+        os.utime(path, (1000, 1000))
+
+        pkey = self._instance.from_file(path)
+        self.assertEqual(pkey, self._pkey)
+        self.assertIs(self._instance.from_file(path), pkey)
+
+        new_pkey = paramiko.RSAKey.generate(1024)
+        new_pkey.write_private_key_file(path)
+        os.utime(path, (2000, 2000))
+        self.assertEqual(self._instance.from_file(path), new_pkey)
+
+    def test_clear(self):
+        key_text = _key_text(self._pkey)
+        pkey = self._instance.from_string(key_text)
+        self._instance.clear()
+        self._instance._parse = Mock(return_value=Mock())
+        self.assertIsNot(self._instance.from_string(key_text), pkey)
+        self._instance._parse.assert_called_once_with(key_text, None)
@@ -0,0 +1,67 @@
+from unittest import TestCase
+
+from cloudshell.cli.session.helper.ssh_transport_registry import (
+    SSHTransportRegistry,
+)
+from cloudshell.cli.session.helper.ssh_tuning_profile import SSHTuningProfile
+
+try:
+    from unittest.mock import Mock
+except ImportError:
+    from mock import Mock
+
+
+class TestSSHTransportRegistry(TestCase):
+    def setUp(self):
+        self._instance = SSHTransportRegistry()
+        self._key = SSHTransportRegistry.make_key("host", 22, "user", "password")
+
+    def test_make_key(self):
+        pkey = Mock()
+        pkey.get_fingerprint.return_value = b"fingerprint"
+        self.assertEqual(self._key[:3], ("host", 22, "user"))
+        self.assertNotIn("password", self._key)
+        self.assertNotEqual(
+            self._key, SSHTransportRegistry.make_key("host", 22, "user", "other")
+        )
+        self.assertNotEqual(
+            self._key,
+            SSHTransportRegistry.make_key("host", 22, "user", "password", pkey),
+        )
+        self.assertNotEqual(
+            self._key,
+            SSHTransportRegistry.make_key(
+                "host", 22, "user", "password", profile=SSHTuningProfile(True)
+            ),
+        )
+
+    def test_share_client(self):
+        client = Mock()
+        connect = Mock(return_value=client)
+        self.assertEqual(self._instance.acquire(self._key, connect), (client, False))
+        self.assertEqual(self._instance.acquire(self._key, connect), (client, True))
+        connect.assert_called_once_with()
+        self.assertEqual(self._instance.references(self._key), 2)
+        self._instance.release(self._key, client)
+        client.close.assert_not_called()
+        self._instance.release(self._key, client)
+        client.close.assert_called_once_with()
+        self.assertEqual(self._instance.references(self._key), 0)
+
+    def test_reconnect_inactive_client(self):
+        client = Mock()
+        client.get_transport.return_value.is_active.return_value = False
+        new_client = Mock()
+        self._instance.acquire(self._key, Mock(return_value=client))
+        self.assertEqual(
+            self._instance.acquire(self._key, Mock(return_value=new_client)),
+            (new_client, False),
+        )
+        self._instance.release(self._key, client)
+        client.close.assert_called_once_with()
+        self.assertEqual(self._instance.references(self._key), 1)
+
+    def test_not_shareable(self):
+        self.assertTrue(self._instance.shareable(self._key))
+        self._instance.set_not_shareable(self._key)
+        self.assertFalse(self._instance.shareable(self._key))
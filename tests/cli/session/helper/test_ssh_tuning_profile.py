@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+import paramiko
+
+from cloudshell.cli.session.helper.ssh_tuning_profile import SSHTuningProfile
+
+try:
+    from unittest.mock import Mock
+except ImportError:
+    from mock import Mock
+
+
+class TestSSHTuningProfile(TestCase):
+    def test_connect_kwargs_default(self):
+        self.assertEqual(
+            SSHTuningProfile().connect_kwargs(30),
+            {
+                "timeout": 30,
+                "banner_timeout": 30,
+                "auth_timeout": None,
+                "compress": False,
+                "disabled_algorithms": None,
+            },
+        )
+
+    def test_connect_kwargs(self):
+        instance = SSHTuningProfile(
+            compression=True,
+            ciphers=["aes128-ctr"],
+            kex=["ecdh-sha2-nistp256"],
+            connect_timeout=5,
+            banner_timeout=10,
+            auth_timeout=15,
+        )
+        kwargs = instance.connect_kwargs(30)
+        self.assertEqual(kwargs["timeout"], 5)
+        self.assertEqual(kwargs["banner_timeout"], 10)
+        self.assertEqual(kwargs["auth_timeout"], 15)
+        self.assertTrue(kwargs["compress"])
+        disabled = kwargs["disabled_algorithms"]
+        self.assertEqual(
+            set(disabled["ciphers"]),
+            set(paramiko.Transport._preferred_ciphers) - {"aes128-ctr"},
+        )
+        self.assertEqual(
+            set(disabled["kex"]),
+            set(paramiko.Transport._preferred_kex) - {"ecdh-sha2-nistp256"},
+        )
+
+    def test_unsupported_algorithm(self):
+        with self.assertRaises(ValueError):
+            SSHTuningProfile(ciphers=["unknown-cipher"])
+        with self.assertRaises(ValueError):
+            SSHTuningProfile(kex=[])
+
+    def test_apply(self):
+        transport = Mock()
+        SSHTuningProfile(
+            window_size=4194304, max_packet_size=65536, keepalive_interval=60
+        ).apply(transport)
+        self.assertEqual(transport.default_window_size, 4194304)
+        self.assertEqual(transport.default_max_packet_size, 65536)
+        transport.set_keepalive.assert_called_once_with(60)
+
+    def test_apply_default(self):
+        transport = Mock(spec=["set_keepalive"])
+        SSHTuningProfile().apply(transport)
+        transport.set_keepalive.assert_not_called()
+
+    def test_eq(self):
+        self.assertEqual(
+            SSHTuningProfile(ciphers=["aes128-ctr"]),
+            SSHTuningProfile(ciphers=("aes128-ctr",)),
+        )
+        self.assertEqual(
+            hash(SSHTuningProfile(compression=True)),
+            hash(SSHTuningProfile(compression=True)),
+        )
+        self.assertNotEqual(SSHTuningProfile(), SSHTuningProfile(compression=True))
@@ -0,0 +1,93 @@
+import json
+from io import StringIO
+from unittest import TestCase
+
+from cloudshell.cli.session.helper import tracer
+from cloudshell.cli.session.helper.tracer import (
+    NOOP_SPAN,
+    JsonExporter,
+    NoopTracer,
+    OpenTelemetryTracer,
+    SpanTracer,
+    get_tracer,
+    set_tracer,
+)
+
+try:
+    from unittest.mock import Mock
+except ImportError:
+    from mock import Mock
+
+
+class TestNoopTracer(TestCase):
+    def test_span(self):
+        with NoopTracer().span("operation", key="value") as span:
+            span.set_attribute("key", "value")
+        self.assertIs(span, NOOP_SPAN)
+
+
+class TestSpanTracer(TestCase):
+    def setUp(self):
+        self._exporter = Mock()
+        self._instance = SpanTracer(self._exporter)
+
+    def test_nested_spans(self):
+        with self._instance.span("parent", key="value") as parent:
+            with self._instance.span("child") as child:
+                child.set_attribute("bytes_received", 10)
+        self.assertEqual(
+            [c[0][0] for c in self._exporter.export.call_args_list], [child, parent]
+        )
+        self.assertEqual(child.parent_id, parent.span_id)
+        self.assertEqual(child.trace_id, parent.span_id)
+        self.assertIsNone(parent.parent_id)
+        self.assertEqual(parent.attributes, {"key": "value"})
+        self.assertEqual(child.attributes, {"bytes_received": 10})
+        self.assertGreaterEqual(parent.duration, child.duration)
+
+    def test_span_error(self):
+        with self.assertRaises(ValueError):
+            with self._instance.span("operation") as span:
+                raise ValueError("test error")
+        self.assertEqual(span.error, "ValueError: test error")
+        self._exporter.export.assert_called_once_with(span)
+        with self._instance.span("next") as next_span:
+            pass
+        self.assertIsNone(next_span.parent_id)
+
+
+class TestJsonExporter(TestCase):
+    def test_export(self):
+        file_obj = StringIO()
+        span_tracer = SpanTracer(JsonExporter(file_obj))
+        with span_tracer.span("operation", command="show version"):
+            pass
+        span = json.loads(file_obj.getvalue())
+        self.assertEqual(span["name"], "operation")
+        self.assertEqual(span["attributes"], {"command": "show version"})
+        self.assertIsNotNone(span["duration"])
+
+
+class TestOpenTelemetryTracer(TestCase):
+    def test_span(self):
+        otel_tracer = Mock()
+        instance = OpenTelemetryTracer(otel_tracer)
+        span = instance.span("operation", key="value")
+        otel_tracer.start_as_current_span.assert_called_once_with(
+            "operation", attributes={"key": "value"}
+        )
+        self.assertIs(span, otel_tracer.start_as_current_span.return_value)
+
+
+class TestSetTracer(TestCase):
+    def tearDown(self):
+        set_tracer(None)
+
+    def test_set_tracer(self):
+        self.assertIsInstance(get_tracer(), NoopTracer)
+        span_tracer = SpanTracer(Mock())
+        set_tracer(span_tracer)
+        self.assertIs(get_tracer(), span_tracer)
+        self.assertIs(tracer.get_tracer(), span_tracer)
+        set_tracer(None)
+        self.assertIsInstance(get_tracer(), NoopTracer)
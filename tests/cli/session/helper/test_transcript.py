@@ -0,0 +1,51 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from cloudshell.cli.session.helper.transcript import TranscriptRecorder
+
+
+class TestTranscriptRecorder(TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self._directory)
+        self._path = os.path.join(self._directory, "transcript.log")
+        self._instance = TranscriptRecorder(self._path, max_size=10)
+
+    def test_record(self):
+        instance = TranscriptRecorder()
+        instance.record(TranscriptRecorder.SENT, "show ver")
+        instance.record(TranscriptRecorder.RECEIVED, "1.0\n")
+        self.assertIsInstance(instance.getvalue(), type(u""))
+        transcript = instance.getvalue().splitlines()
+        self.assertEqual(len(transcript), 2)
+        self.assertTrue(transcript[0].endswith(" > 'show ver'"))
+        self.assertTrue(transcript[1].endswith(" < '1.0\\n'"))
+
+    def test_drop_oldest_entries(self):
+        self._instance.record(TranscriptRecorder.SENT, "show ver")
+        self._instance.record(TranscriptRecorder.RECEIVED, "version")
+        self._instance.record(TranscriptRecorder.RECEIVED, "long output line")
+        self.assertEqual(len(self._instance), 1)
+        self.assertIn("long output line", self._instance.getvalue())
+
+    def test_flush(self):
+        self._instance.record(TranscriptRecorder.SENT, "show ver")
+        self._instance.flush().join()
+        self._instance.record(TranscriptRecorder.RECEIVED, "1.0")
+        self._instance.flush()
+        self._instance.wait()
+        self.assertEqual(len(self._instance), 0)
+        with io.open(self._path, encoding="utf-8") as transcript_file:
+            transcript = transcript_file.read().splitlines()
+        self.assertEqual(len(transcript), 2)
+        self.assertIn("show ver", transcript[0])
+        self.assertIn("1.0", transcript[1])
+
+    def test_flush_without_path(self):
+        instance = TranscriptRecorder()
+        instance.record(TranscriptRecorder.SENT, "show ver")
+        self.assertIsNone(instance.flush())
+        self.assertEqual(len(instance), 1)
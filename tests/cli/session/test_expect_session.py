@@ -1,10 +1,18 @@
+import os
+import random
+import select
+import socket
 from collections import OrderedDict
-from unittest import TestCase
+from unittest import TestCase, skipUnless
 
 from cloudshell.cli.session.expect_session import ActionLoopDetector, ExpectSession
+from cloudshell.cli.session.helper.output_buffer import SpooledOutput
+from cloudshell.cli.session.helper.tracer import SpanTracer
+from cloudshell.cli.session.helper.transcript import TranscriptRecorder
 from cloudshell.cli.session.session_exceptions import (
     CommandExecutionException,
     ExpectedSessionException,
+    SessionCommandTimeoutException,
     SessionLoopLimitException,
     SessionReadTimeout,
 )
@@ -43,7 +51,6 @@ class ExpectSessionImpl(ExpectSession):
     "cloudshell.cli.session.expect_session.ActionLoopDetector.loops_detected",
     return_value=False,
 )
-@patch("cloudshell.cli.session.expect_session.normalize_buffer")
 class TestExpectSession(TestCase):
     def setUp(self):
         self._logger = Mock()
@@ -57,7 +64,7 @@ class TestExpectSession(TestCase):
         self._instance.connect = self._connect
         self._instance.disconnect = self._disconnect
 
-    def test_init_attributes(self, normalize_buffer, loops_detected):
+    def test_init_attributes(self, loops_detected):
         mandatory_attributes = [
             "_loop_detector_max_combination_length",
             "_empty_loop_timeout",
@@ -78,34 +85,32 @@ class TestExpectSession(TestCase):
             0,
         )
 
-    def test_session_type(self, normalize_buffer, loops_detected):
+    def test_session_type(self, loops_detected):
         self.assertEqual(self._instance.session_type, "EXPECT")
 
-    def test_active(self, normalize_buffer, loops_detected):
+    def test_active(self, loops_detected):
         self.assertFalse(self._instance.active())
 
-    def test_clear_buffer_receive_call(self, normalize_buffer, loops_detected):
+    def test_clear_buffer_receive_call(self, loops_detected):
         timeout = Mock()
         self._receive.side_effect = SessionReadTimeout()
         self._instance._clear_buffer(timeout, self._logger)
         self._receive.assert_called_once_with(timeout, self._logger)
 
-    def test_clear_buffer_raise_exception(self, normalize_buffer, loops_detected):
+    def test_clear_buffer_raise_exception(self, loops_detected):
         exception = Exception
         self._receive.side_effect = exception()
         timeout = Mock()
         with self.assertRaises(exception):
             self._instance._clear_buffer(timeout, self._logger)
 
-    def test_clear_buffer_exit_with_no_data(self, normalize_buffer, loops_detected):
+    def test_clear_buffer_exit_with_no_data(self, loops_detected):
         self._receive.side_effect = ["", TestExpectSessionException("Breaking loop")]
         timeout = Mock()
         self._instance._clear_buffer(timeout, self._logger)
         self.assertTrue(True)
 
-    def test_clear_buffer_exit_on_second_attempt(
-        self, normalize_buffer, loops_detected
-    ):
+    def test_clear_buffer_exit_on_second_attempt(self, loops_detected):
         self._receive.side_effect = [
             "test",
             "",
@@ -116,42 +121,145 @@ class TestExpectSession(TestCase):
         mock_calls = [call(timeout, self._logger), call(timeout, self._logger)]
         self._receive.assert_has_calls(mock_calls)
 
-    def test_send_line(self, normalize_buffer, loops_detected):
+    def test_clear_buffer_read_available_data(self, loops_detected):
+        self._instance._wait_readable = Mock(side_effect=[True, False])
+        self._receive.return_value = "test"
+        result = self._instance._clear_buffer(0.1, self._logger)
+        self.assertEqual(result, "test")
+        self._receive.assert_called_once_with(0.1, self._logger)
+        self._instance._wait_readable.assert_called_with(0)
+
+    def test_clear_buffer_timed(self, loops_detected):
+        self._instance._timed_clear_buffer = True
+        self._instance._wait_readable = Mock(return_value=False)
+        self._receive.side_effect = ["test", SessionReadTimeout()]
+        result = self._instance._clear_buffer(0.1, self._logger)
+        self.assertEqual(result, "test")
+        self._instance._wait_readable.assert_not_called()
+
+    def test_send_line(self, loops_detected):
         command = "test"
         self._instance.send_line(command, self._logger)
         self._send.assert_called_once_with(
             command + self._instance._new_line, self._logger
         )
 
-    def test_receive_all_exit_by_timeout(self, normalize_buffer, loops_detected):
+    def test_receive_all_exit_by_timeout(self, loops_detected):
         self._receive.side_effect = SessionReadTimeout()
         exception = ExpectedSessionException
         with self.assertRaises(exception):
             self._instance._receive_all(0.1, self._logger)
 
-    def test_receive_all_receive_call(self, normalize_buffer, loops_detected):
+    def test_receive_all_receive_call(self, loops_detected):
         self._receive.side_effect = ["test", SessionReadTimeout()]
         self._instance._receive_all(2, self._logger)
         mock_calls = [call(0.1, self._logger), call(0.1, self._logger)]
         self._receive.assert_has_calls(mock_calls)
 
-    def test_receive_get_all_data(self, normalize_buffer, loops_detected):
+    def test_receive_get_all_data(self, loops_detected):
         data1 = "test"
         data2 = "tesst"
         self._receive.side_effect = [data1, data2, SessionReadTimeout()]
         result = self._instance._receive_all(2, self._logger)
         self.assertTrue(result and result == data1 + data2)
 
+    def test_wait_readable_without_handle(self, loops_detected):
+        self.assertTrue(self._instance._wait_readable(0))
+
+    def test_wait_readable_socket(self, loops_detected):
+        local, remote = socket.socketpair()
+        self.addCleanup(local.close)
+        self.addCleanup(remote.close)
+        self._instance._select_handle = Mock(return_value=local)
+        self.assertFalse(self._instance._wait_readable(0))
+        remote.sendall(b"test")
+        self.assertTrue(self._instance._wait_readable(1))
+
+    @skipUnless(hasattr(select, "poll"), "poll isn't available")
+    def test_wait_readable_high_descriptor(self, loops_detected):
+        local, remote = socket.socketpair()
+        self.addCleanup(local.close)
+        self.addCleanup(remote.close)
+        try:
+            high_fd = os.dup2(local.fileno(), 1500) or 1500
+        except OSError:
+            self.skipTest("file descriptor limit is too low")
+        self.addCleanup(os.close, high_fd)
+        self._instance._select_handle = Mock(return_value=high_fd)
+        self.assertFalse(self._instance._wait_readable(0))
+        remote.sendall(b"test")
+        self.assertTrue(self._instance._wait_readable(1))
+
+    def test_receive_decode_split_character(self, loops_detected):
+        data = u"\u0442\u0435\u0441\u0442".encode("utf-8")
+        self._instance._receive_bytes = Mock(side_effect=[data[:3], data[3:]])
+        self.assertEqual(
+            ExpectSession._receive(self._instance, 1, self._logger), u"\u0442"
+        )
+        self.assertEqual(
+            ExpectSession._receive(self._instance, 1, self._logger),
+            u"\u0435\u0441\u0442",
+        )
+
+    def test_receive_decode_errors(self, loops_detected):
+        instance = ExpectSessionImpl(decode_errors="replace")
+        instance._receive_bytes = Mock(return_value=b"test\xff")
+        self.assertEqual(
+            ExpectSession._receive(instance, 1, self._logger), u"test\ufffd"
+        )
+
+    def test_receive_decode_error_strict(self, loops_detected):
+        self._instance._receive_bytes = Mock(side_effect=[b"test\xff", b"test"])
+        with self.assertRaises(UnicodeDecodeError):
+            ExpectSession._receive(self._instance, 1, self._logger)
+        self.assertEqual(
+            ExpectSession._receive(self._instance, 1, self._logger), "test"
+        )
+
+    def test_receive_decode_available_data_at_once(self, loops_detected):
+        local, remote = socket.socketpair()
+        self.addCleanup(local.close)
+        self.addCleanup(remote.close)
+        self._instance._select_handle = Mock(return_value=local)
+        self._instance._receive_bytes = lambda timeout, logger: local.recv(2)
+        self._instance._decoder = Mock(wraps=self._instance._decoder)
+        remote.sendall(b"test data")
+        self.assertEqual(
+            ExpectSession._receive(self._instance, 1, self._logger), "test data"
+        )
+        self._instance._decoder.decode.assert_called_once()
+
+    def test_encode(self, loops_detected):
+        self.assertEqual(ExpectSession._encode(self._instance, u"\u0442"), b"\xd1\x82")
+
+    def test_encode_bytes_unchanged(self, loops_detected):
+        self.assertEqual(
+            ExpectSession._encode(self._instance, b"test\xff"), b"test\xff"
+        )
+
+    def test_receive_all_return_available_data(self, loops_detected):
+        self._instance._wait_readable = Mock(side_effect=[True, True, False])
+        self._receive.side_effect = ["test", "tesst"]
+        result = self._instance._receive_all(2, self._logger)
+        self.assertEqual(result, "testtesst")
+        self.assertEqual(self._receive.call_count, 2)
+        self._instance._wait_readable.assert_called_with(0)
+
+    def test_receive_all_readiness_timeout(self, loops_detected):
+        self._instance._wait_readable = Mock(return_value=False)
+        with self.assertRaises(ExpectedSessionException):
+            self._instance._receive_all(0.1, self._logger)
+        self._receive.assert_not_called()
+
     @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
     @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
     @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
     def test_hardware_expect_clear_buffer_calls(
-        self, clear_buffer, receive_all, send_line, normalize_buffer, loops_detected
+        self, clear_buffer, receive_all, send_line, loops_detected
     ):
         command = "test_command"
         expected_string = "test_string"
         receive_all.return_value = expected_string
-        normalize_buffer.return_value = expected_string
         self._instance.hardware_expect(command, expected_string, self._logger)
         mock_calls = [
             call(self._instance._clear_buffer_timeout, self._logger),
@@ -159,16 +267,75 @@ class TestExpectSession(TestCase):
         ]
         clear_buffer.assert_has_calls(mock_calls)
 
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_quiescence_completion(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        self._instance._quiescence_completion = True
+        self._instance._wait_readable = Mock(side_effect=[True, False])
+        self._receive.return_value = "\nprompt#"
+        receive_all.return_value = "output\nprompt# "
+        output = self._instance.hardware_expect("command", "prompt#", self._logger)
+        self.assertEqual(output, "output\nprompt# \nprompt#")
+        clear_buffer.assert_called_once_with(
+            self._instance._clear_buffer_timeout, self._logger
+        )
+        self._instance._wait_readable.assert_called_with(
+            self._instance.metrics.idle_window
+        )
+        self.assertEqual(self._instance.metrics.late_completions, 1)
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_quiescence_prompt_not_at_end(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        self._instance._quiescence_completion = True
+        clear_buffer.return_value = ""
+        receive_all.return_value = "prompt# output"
+        self._instance.hardware_expect("command", "prompt#", self._logger)
+        self.assertEqual(clear_buffer.call_count, 2)
+        self.assertEqual(self._instance.metrics.completions, 0)
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_empty_read_backoff(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        self._instance._idle_wait = Mock()
+        receive_all.side_effect = ["", "", "", "prompt#"]
+        self._instance.hardware_expect(
+            "command", "prompt#", self._logger, empty_loop_timeout=0.03
+        )
+        self._instance._idle_wait.assert_has_calls([call(0.01), call(0.02), call(0.03)])
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_command_timeout(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        receive_all.return_value = "output"
+        with self.assertRaises(SessionCommandTimeoutException):
+            self._instance.hardware_expect(
+                "command", "prompt#", self._logger, retries=0, command_timeout=0.05
+            )
+        for receive_call in receive_all.call_args_list:
+            self.assertLessEqual(receive_call[0][0], 0.05)
+
     @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
     @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
     @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
     def test_hardware_expect_send_line_call(
-        self, clear_buffer, receive_all, send_line, normalize_buffer, loops_detected
+        self, clear_buffer, receive_all, send_line, loops_detected
     ):
         command = "test_command"
         expected_string = "test_string"
         receive_all.return_value = expected_string
-        normalize_buffer.return_value = expected_string
         self._instance.hardware_expect(command, expected_string, self._logger)
         send_line.assert_called_once_with(command, self._logger)
 
@@ -176,12 +343,11 @@ class TestExpectSession(TestCase):
     @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
     @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
     def test_hardware_expect_empty_expected_string(
-        self, clear_buffer, receive_all, send_line, normalize_buffer, loops_detected
+        self, clear_buffer, receive_all, send_line, loops_detected
     ):
         command = "test_command"
         expected_string = None
         receive_all.return_value = expected_string
-        normalize_buffer.return_value = expected_string
         exception = ExpectedSessionException
         with self.assertRaises(exception):
             self._instance.hardware_expect(command, expected_string, self._logger)
@@ -190,13 +356,12 @@ class TestExpectSession(TestCase):
     @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
     @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
     def test_hardware_expect_raise_session_loop_limit_exceded(
-        self, clear_buffer, receive_all, send_line, normalize_buffer, loops_detected
+        self, clear_buffer, receive_all, send_line, loops_detected
     ):
         command = "test_command"
         expected_string = "test_string"
         side_efect = [command, "", "", ""]
         receive_all.side_effect = side_efect
-        normalize_buffer.side_effect = side_efect
         exception = SessionLoopLimitException
         retries = 2
         with self.assertRaises(exception):
@@ -208,12 +373,11 @@ class TestExpectSession(TestCase):
     @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
     @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
     def test_hardware_expect_receive_all_call(
-        self, clear_buffer, receive_all, send_line, normalize_buffer, loops_detected
+        self, clear_buffer, receive_all, send_line, loops_detected
     ):
         command = "test_command"
         expected_string = "test_string"
         receive_all.return_value = expected_string
-        normalize_buffer.return_value = expected_string
         timeout = Mock()
         self._instance.hardware_expect(
             command, expected_string, self._logger, timeout=timeout
@@ -223,18 +387,21 @@ class TestExpectSession(TestCase):
     @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
     @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
     @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    @patch(
+        "cloudshell.cli.session.expect_session.BufferNormalizer.normalize",
+        side_effect=lambda data: data,
+    )
     def test_hardware_expect_normalize_buffer_call(
-        self, clear_buffer, receive_all, send_line, normalize_buffer, loops_detected
+        self, normalize, clear_buffer, receive_all, send_line, loops_detected
     ):
         command = "test_command"
         expected_string = "test_string"
         receive_all.return_value = expected_string
-        normalize_buffer.return_value = expected_string
         timeout = Mock()
         self._instance.hardware_expect(
             command, expected_string, self._logger, timeout=timeout
         )
-        normalize_buffer.assrrt_called_once_with(expected_string)
+        normalize.assert_called_once_with(expected_string)
 
     @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
     @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
@@ -243,7 +410,7 @@ class TestExpectSession(TestCase):
         return_value="",
     )
     def test_hardware_expect_remove_command_from_output(
-        self, clear_buffer, receive_all, send_line, normalize_buffer, loops_detected
+        self, clear_buffer, receive_all, send_line, loops_detected
     ):
         command = "test_command"
         expected_string = "test_string"
@@ -252,7 +419,6 @@ class TestExpectSession(TestCase):
             command, expected_string
         )
         receive_all.return_value = out
-        normalize_buffer.return_value = out
         timeout = Mock()
         result = self._instance.hardware_expect(
             command, expected_string, self._logger, timeout=timeout
@@ -266,14 +432,13 @@ class TestExpectSession(TestCase):
         return_value="",
     )
     def test_hardware_expect_action_map_call(
-        self, clear_buffer, receive_all, send_line, normalize_buffer, loops_detected
+        self, clear_buffer, receive_all, send_line, loops_detected
     ):
         command = "test_command"
         fake_out = "test_test"
         expected_string = "test_string"
         side_effect = [fake_out, expected_string]
         receive_all.side_effect = side_effect
-        normalize_buffer.side_effect = side_effect
         test_func = Mock()
         action_map = OrderedDict({fake_out: test_func})
         self._instance.hardware_expect(
@@ -288,12 +453,11 @@ class TestExpectSession(TestCase):
         return_value="",
     )
     def test_hardware_expect_error_map_call(
-        self, clear_buffer, receive_all, send_line, normalize_buffer, loops_detected
+        self, clear_buffer, receive_all, send_line, loops_detected
     ):
         command = "test_command"
         expected_string = "test_string"
         receive_all.return_value = expected_string
-        normalize_buffer.return_value = expected_string
         error_map = OrderedDict({expected_string: "test_error"})
         exception = CommandExecutionException
         with self.assertRaises(exception):
@@ -308,7 +472,7 @@ class TestExpectSession(TestCase):
         MagicMock(return_value=""),
     )
     def test_hardware_expect_error_map_call_with_exception(
-        self, receive_all, normalize_buffer, loops_detected
+        self, receive_all, loops_detected
     ):
         class TestException(CommandExecutionException):
             pass
@@ -316,24 +480,720 @@ class TestExpectSession(TestCase):
         command = "test_command"
         expected_string = "test_string"
         receive_all.return_value = expected_string
-        normalize_buffer.return_value = expected_string
         error_map = OrderedDict({expected_string: TestException("test_error")})
         with self.assertRaises(TestException):
             self._instance.hardware_expect(
                 command, expected_string, self._logger, error_map=error_map
             )
 
-    def test_reconnect_disconnect_call(self, normalize_buffer, loops_detected):
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line", MagicMock())
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch(
+        "cloudshell.cli.session.expect_session.ExpectSession._clear_buffer",
+        MagicMock(return_value=""),
+    )
+    def test_hardware_expect_iter_yield_chunks(self, receive_all, loops_detected):
+        side_effect = ["test_command\nline1\nli", "ne2\n", "test_string"]
+        receive_all.side_effect = side_effect
+        output = self._instance.hardware_expect_iter(
+            "test_command", "test_string", self._logger
+        )
+        self.assertEqual(list(output), ["line1\nli", "ne2\n", "test_string"])
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line", MagicMock())
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch(
+        "cloudshell.cli.session.expect_session.ExpectSession._clear_buffer",
+        MagicMock(return_value=""),
+    )
+    def test_hardware_expect_iter_yield_lines(self, receive_all, loops_detected):
+        side_effect = ["line1\nli", "ne2\n", "test_string"]
+        receive_all.side_effect = side_effect
+        output = self._instance.hardware_expect_iter(
+            None, "test_string", self._logger, lines=True
+        )
+        self.assertEqual(list(output), ["line1\n", "line2\n", "test_string"])
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line", MagicMock())
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch(
+        "cloudshell.cli.session.expect_session.ExpectSession._clear_buffer",
+        MagicMock(return_value=""),
+    )
+    def test_hardware_expect_iter_error_map(self, receive_all, loops_detected):
+        side_effect = ["Invalid input\n", "test_string"]
+        receive_all.side_effect = side_effect
+        error_map = OrderedDict([("Error", "error"), ("Invalid", "invalid")])
+        output = self._instance.hardware_expect_iter(
+            "test_command", "test_string", self._logger, error_map=error_map
+        )
+        with self.assertRaises(CommandExecutionException) as context:
+            list(output)
+        self.assertIn("invalid", str(context.exception))
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line", MagicMock())
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch(
+        "cloudshell.cli.session.expect_session.ExpectSession._clear_buffer",
+        MagicMock(return_value="\n"),
+    )
+    def test_hardware_expect_spill_threshold(self, receive_all, loops_detected):
+        side_effect = ["line1\n", "line2\n", "test_string"]
+        receive_all.side_effect = side_effect
+        output = self._instance.hardware_expect_spooled(
+            None,
+            "test_string",
+            self._logger,
+            spill_threshold=8,
+            error_map=OrderedDict([("[Ee]rror", "error")]),
+        )
+        self.assertIsInstance(output, SpooledOutput)
+        self.assertEqual(output, "line1\nline2\ntest_string\n")
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line", MagicMock())
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch(
+        "cloudshell.cli.session.expect_session.ExpectSession._clear_buffer",
+        MagicMock(return_value="\n"),
+    )
+    def test_hardware_expect_spooled_without_echo(self, receive_all, loops_detected):
+        receive_all.side_effect = ["line1\n" * 100, "test_string"]
+        self._instance._spill_threshold = 20
+        output = self._instance.hardware_expect_spooled(
+            "command", "test_string", self._logger
+        )
+        self.assertIsInstance(output, SpooledOutput)
+        self.assertEqual(output, "line1\n" * 100 + "test_string\n")
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line", MagicMock())
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch(
+        "cloudshell.cli.session.expect_session.ExpectSession._clear_buffer",
+        MagicMock(return_value="\n"),
+    )
+    def test_hardware_expect_ignores_spill_threshold(self, receive_all, loops_detected):
+        receive_all.side_effect = ["line1\nline2\n", "test_string"]
+        self._instance._spill_threshold = 4
+        output = self._instance.hardware_expect(None, "test_string", self._logger)
+        self.assertIsInstance(output, str)
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_send_commands_pipeline(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        clear_buffer.return_value = ""
+        receive_all.side_effect = [
+            "show ver\nversion\nswitch# sh",
+            "ow version\nversion 2\nswitch# ",
+        ]
+        outputs = self._instance.send_commands(
+            ["show ver", "show version"], "switch#", self._logger, pipeline=True
+        )
+        self.assertEqual(outputs, ["version\nswitch#", "version 2\nswitch# "])
+        send_line.assert_has_calls(
+            [call("show ver", self._logger), call("show version", self._logger)]
+        )
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_send_commands_pipeline_error_maps(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        clear_buffer.return_value = ""
+        receive_all.return_value = "a\ninvalid\nswitch# b\nerror\nswitch# "
+        with self.assertRaises(CommandExecutionException) as context:
+            self._instance.send_commands(
+                ["a", "b"],
+                "switch#",
+                self._logger,
+                error_map={"invalid|error": "Common error"},
+                error_maps=[None, {"error": "Command error"}],
+                pipeline=True,
+            )
+        self.assertIn("Common error", str(context.exception))
+
+    @patch("cloudshell.cli.session.expect_session.DEVICE_CAPABILITIES")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.hardware_expect")
+    def test_send_commands_sequential(
+        self, hardware_expect, capabilities, loops_detected
+    ):
+        capabilities.get.return_value = False
+        hardware_expect.side_effect = ["output1", "output2"]
+        outputs = self._instance.send_commands(
+            ["a", "b"],
+            "switch#",
+            self._logger,
+            error_map={"error": "Common error"},
+            error_maps=[{"invalid": "Command error"}, None],
+        )
+        self.assertEqual(outputs, ["output1", "output2"])
+        hardware_expect.assert_has_calls(
+            [
+                call(
+                    "a",
+                    "switch#",
+                    self._logger,
+                    error_map=OrderedDict(
+                        [("invalid", "Command error"), ("error", "Common error")]
+                    ),
+                    timeout=None,
+                    remove_command_from_output=True,
+                ),
+                call(
+                    "b",
+                    "switch#",
+                    self._logger,
+                    error_map=OrderedDict([("error", "Common error")]),
+                    timeout=None,
+                    remove_command_from_output=True,
+                ),
+            ]
+        )
+
+    @patch("cloudshell.cli.session.expect_session.DEVICE_CAPABILITIES")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.hardware_expect")
+    def test_send_commands_sequential_by_default(
+        self, hardware_expect, capabilities, loops_detected
+    ):
+        hardware_expect.side_effect = ["output1", "output2"]
+        outputs = self._instance.send_commands(["a", "b"], "switch#", self._logger)
+        self.assertEqual(outputs, ["output1", "output2"])
+        capabilities.get.assert_not_called()
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.hardware_expect")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._pipeline_output")
+    def test_send_commands_optional_args_sequential(
+        self, pipeline_output, hardware_expect, loops_detected
+    ):
+        hardware_expect.side_effect = ["output1", "output2"]
+        outputs = self._instance.send_commands(
+            ["a", "b"], "switch#", self._logger, pipeline=True, retries=5
+        )
+        self.assertEqual(outputs, ["output1", "output2"])
+        pipeline_output.assert_not_called()
+        hardware_expect.assert_called_with(
+            "b",
+            "switch#",
+            self._logger,
+            error_map=OrderedDict(),
+            timeout=None,
+            remove_command_from_output=True,
+            retries=5,
+        )
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._pipeline_output")
+    def test_send_commands_hardware_expect_override_sequential(
+        self, pipeline_output, loops_detected
+    ):
+        class OverriddenSession(ExpectSessionImpl):
+            def hardware_expect(self, command, *args, **kwargs):
+                return "{} output".format(command)
+
+        instance = OverriddenSession()
+        outputs = instance.send_commands(
+            ["a", "b"], "switch#", self._logger, pipeline=True
+        )
+        self.assertEqual(outputs, ["a output", "b output"])
+        pipeline_output.assert_not_called()
+
+    @patch("cloudshell.cli.session.expect_session.DEVICE_CAPABILITIES")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_probe_pipeline(
+        self,
+        clear_buffer,
+        receive_all,
+        send_line,
+        capabilities,
+        loops_detected,
+    ):
+        capabilities.get.return_value = None
+        receive_all.side_effect = [
+            "!pipeline probe 1\nswitch# ",
+            "!pipeline probe 2\nswitch# ",
+        ]
+        self.assertTrue(self._instance._pipeline_supported("switch#", self._logger))
+        send_line.assert_has_calls(
+            [
+                call("!pipeline probe 1", self._logger),
+                call("!pipeline probe 2", self._logger),
+            ]
+        )
+        capabilities.set.assert_called_once_with(
+            ("EXPECT", None, None), self._instance.PIPELINE_CAPABILITY, True
+        )
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_probe_pipeline_timeout(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        receive_all.side_effect = [
+            "!pipeline probe 1\nswitch# ",
+            ExpectedSessionException("Socket closed by timeout"),
+        ]
+        self.assertFalse(self._instance._probe_pipeline("switch#", self._logger))
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_probe_pipeline_typed_ahead_echo(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        receive_all.side_effect = [
+            "!pipeline probe 1\n!pipeline probe 2\n",
+            "switch# \nswitch# ",
+            ExpectedSessionException("Socket closed by timeout"),
+        ]
+        self.assertFalse(self._instance._probe_pipeline("switch#", self._logger))
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_abort_on_error(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        receive_all.side_effect = ["command\n% Invalid input", "\nhelp", "\nprompt#"]
+        with self.assertRaises(CommandExecutionException) as context:
+            self._instance.hardware_expect(
+                "command",
+                "prompt#",
+                self._logger,
+                error_map={"Invalid input": "Invalid command"},
+                abort_on_error=True,
+            )
+        self.assertIn("Invalid command", str(context.exception))
+        self.assertEqual(receive_all.call_count, 3)
+        clear_buffer.assert_called_once()
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_abort_on_error_background_drain(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        receive_all.side_effect = ["command\n% Invalid input", "\nhelp", "\nprompt#"]
+        with self.assertRaises(CommandExecutionException):
+            self._instance.hardware_expect(
+                "command",
+                "prompt#",
+                self._logger,
+                error_map={"Invalid input": "Invalid command"},
+                abort_on_error=True,
+                background_drain=True,
+            )
+        self._instance._wait_drain()
+        self.assertEqual(receive_all.call_count, 3)
+        self.assertIsNone(self._instance._drain_thread)
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_abort_on_error_with_prompt(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        clear_buffer.return_value = ""
+        receive_all.side_effect = [
+            "show foo\n% Invalid input detected\nRouter#",
+            "show foo\n% Invalid input detected\nRouter#",
+            "show bar\noutput\nRouter#",
+        ]
+        self._instance.set_active(True)
+        for background_drain in (False, True):
+            with self.assertRaises(CommandExecutionException):
+                self._instance.hardware_expect(
+                    "show foo",
+                    "Router#",
+                    self._logger,
+                    error_map={"Invalid input": "Invalid command"},
+                    abort_on_error=True,
+                    background_drain=background_drain,
+                )
+            self.assertIsNone(self._instance._drain_thread)
+            self.assertTrue(self._instance.active())
+        self.assertEqual(receive_all.call_count, 2)
+
+        output = self._instance.hardware_expect("show bar", "Router#", self._logger)
+        self.assertEqual(output, "output\nRouter#")
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_iter_abort_on_error_with_prompt(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        receive_all.side_effect = ["output\n% Invalid input\nprompt#"]
+        chunks = []
+        with self.assertRaises(CommandExecutionException):
+            for chunk in self._instance.hardware_expect_iter(
+                None,
+                "prompt#",
+                self._logger,
+                error_map={"Invalid input": "Invalid command"},
+                abort_on_error=True,
+            ):
+                chunks.append(chunk)
+        self.assertEqual(receive_all.call_count, 1)
+        self.assertIsNone(self._instance._drain_thread)
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_background_drain_failed(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        receive_all.side_effect = [
+            "command\n% Invalid input",
+            ExpectedSessionException("Socket closed by timeout"),
+        ]
+        self._instance.set_active(True)
+        with self.assertRaises(CommandExecutionException):
+            self._instance.hardware_expect(
+                "command",
+                "prompt#",
+                self._logger,
+                error_map={"Invalid input": "Invalid command"},
+                abort_on_error=True,
+                background_drain=True,
+            )
+        with self.assertRaises(ExpectedSessionException):
+            self._instance._wait_drain()
+        self.assertFalse(self._instance.active())
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_iter_abort_on_error(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        receive_all.side_effect = ["output\n", "% Invalid input", "\nprompt#"]
+        chunks = []
+        with self.assertRaises(CommandExecutionException):
+            for chunk in self._instance.hardware_expect_iter(
+                None,
+                "prompt#",
+                self._logger,
+                error_map={"Invalid input": "Invalid command"},
+                abort_on_error=True,
+            ):
+                chunks.append(chunk)
+        self.assertEqual(chunks, ["output\n", "% Invalid input"])
+        self.assertEqual(receive_all.call_count, 3)
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_terminal_model(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        instance = ExpectSessionImpl(terminal_model=True)
+        instance._send = self._send
+        clear_buffer.return_value = ""
+        action = Mock()
+        receive_all.side_effect = [
+            "show run\r\nline 1\r\n--More--",
+            "\r\x1b[Kline 2\r\nswitch#",
+        ]
+        output = instance.hardware_expect(
+            "show run",
+            r"switch#\s*$",
+            self._logger,
+            action_map=OrderedDict([("--More--", action)]),
+        )
+        self.assertEqual(output, "line 1\n--More--line 2\nswitch#")
+        action.assert_called_once_with(instance, self._logger)
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_answer_pager(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        instance = ExpectSessionImpl(pager_map=OrderedDict([("--More--", " ")]))
+        instance._send = self._send
+        clear_buffer.return_value = ""
+        receive_all.side_effect = [
+            "show run\nline 1\n--More--",
+            "line 2\n--More--",
+            "line 3\nswitch#",
+        ]
+        output = instance.hardware_expect("show run", r"switch#\s*$", self._logger)
+        self.assertEqual(output, "line 1\nline 2\nline 3\nswitch#")
+        self._send.assert_has_calls([call(" ", self._logger)] * 2)
+        loops_detected.assert_not_called()
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_answer_split_pager(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        instance = ExpectSessionImpl(pager_map=OrderedDict([("--More--", " ")]))
+        instance._send = self._send
+        clear_buffer.return_value = ""
+        receive_all.side_effect = [
+            "show run\nline 1\n --Mo",
+            "re-- ",
+            "line 2\nswitch#",
+        ]
+        output = instance.hardware_expect("show run", r"switch#\s*$", self._logger)
+        self.assertEqual(output, "line 1\n --Mo line 2\nswitch#")
+        self._send.assert_called_once_with(" ", self._logger)
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_answer_redrawn_pager(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        instance = ExpectSessionImpl(terminal_model=True)
+        instance._send = self._send
+        clear_buffer.return_value = ""
+        receive_all.side_effect = [
+            "show run\r\nline 1\r\n --More-- ",
+            "\r\x1b[Kline 2\r\nswitch#",
+        ]
+        output = instance.hardware_expect(
+            "show run",
+            r"switch#\s*$",
+            self._logger,
+            pager_map=OrderedDict([(r"\s*--More--\s*", " ")]),
+        )
+        self.assertEqual(output, "line 1\nline 2\nswitch#")
+        self._send.assert_called_once_with(" ", self._logger)
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_remove_redrawn_pager_line(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        instance = ExpectSessionImpl(terminal_model=True)
+        instance._send = self._send
+        clear_buffer.return_value = ""
+        receive_all.side_effect = [
+            "show run\r\nline 1\r\n -- More -- (q to quit) ",
+            "\r\x1b[Kline 2\r\nswitch#",
+        ]
+        output = instance.hardware_expect(
+            "show run",
+            r"switch#\s*$",
+            self._logger,
+            pager_map=OrderedDict([("-- More --", " ")]),
+        )
+        self.assertEqual(output, "line 1\nline 2\nswitch#")
+        self._send.assert_called_once_with(" ", self._logger)
+
+    @patch("cloudshell.cli.session.expect_session.DEVICE_CAPABILITIES")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.hardware_expect")
+    def test_send_commands_with_pager_sequential(
+        self, hardware_expect, capabilities, loops_detected
+    ):
+        instance = ExpectSessionImpl(pager_map={"--More--": " "})
+        hardware_expect.side_effect = ["output1", "output2"]
+        outputs = instance.send_commands(
+            ["a", "b"], "switch#", self._logger, pipeline=None
+        )
+        self.assertEqual(outputs, ["output1", "output2"])
+        capabilities.get.assert_not_called()
+
+    @patch("cloudshell.cli.session.expect_session.DEVICE_CAPABILITIES")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.hardware_expect")
+    def test_disable_pager_fallback(
+        self, hardware_expect, capabilities, loops_detected
+    ):
+        capabilities.get.return_value = None
+        hardware_expect.side_effect = [
+            CommandExecutionException("Invalid input"),
+            "switch#",
+        ]
+        command = self._instance.disable_pager(
+            ["terminal length 0", "terminal pager 0"], "switch#", self._logger
+        )
+        self.assertEqual(command, "terminal pager 0")
+        self.assertEqual(hardware_expect.call_count, 2)
+        capabilities.set.assert_called_once_with(
+            self._instance._device_key(),
+            ExpectSession.PAGER_DISABLE_CAPABILITY,
+            "terminal pager 0",
+        )
+        self.assertEqual(
+            self._instance.disable_pager(
+                ["terminal length 0"], "switch#", self._logger
+            ),
+            capabilities.get.return_value,
+        )
+        self.assertEqual(hardware_expect.call_count, 2)
+
+    @patch("cloudshell.cli.session.expect_session.DEVICE_CAPABILITIES")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.hardware_expect")
+    def test_disable_pager_cached_command(
+        self, hardware_expect, capabilities, loops_detected
+    ):
+        capabilities.get.return_value = "terminal pager 0"
+        command = self._instance.disable_pager(
+            ["terminal length 0", "terminal pager 0"], "switch#", self._logger
+        )
+        self.assertEqual(command, "terminal pager 0")
+        hardware_expect.assert_called_once()
+        self.assertEqual(hardware_expect.call_args[0][0], "terminal pager 0")
+
+    @patch("cloudshell.cli.session.expect_session.DEVICE_CAPABILITIES")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.hardware_expect")
+    def test_disable_pager_not_supported(
+        self, hardware_expect, capabilities, loops_detected
+    ):
+        capabilities.get.return_value = None
+        hardware_expect.side_effect = CommandExecutionException("Invalid input")
+        command = self._instance.disable_pager(
+            ["terminal length 0"], "switch#", self._logger
+        )
+        self.assertIsNone(command)
+        self.assertIsNone(
+            self._instance.disable_pager(["terminal length 0"], "switch#", self._logger)
+        )
+        hardware_expect.assert_called_once()
+        capabilities.set.assert_not_called()
+
+    @patch("cloudshell.cli.session.expect_session.DEVICE_CAPABILITIES")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.hardware_expect")
+    def test_disable_pager_cached_command_fails(
+        self, hardware_expect, capabilities, loops_detected
+    ):
+        capabilities.get.return_value = "terminal pager 0"
+        hardware_expect.side_effect = [
+            CommandExecutionException("Invalid input"),
+            "switch#",
+        ]
+        command = self._instance.disable_pager(
+            ["terminal length 0", "terminal pager 0"], "switch#", self._logger
+        )
+        self.assertEqual(command, "terminal length 0")
+        self.assertEqual(
+            [args[0][0] for args in hardware_expect.call_args_list],
+            ["terminal pager 0", "terminal length 0"],
+        )
+        capabilities.set.assert_called_once_with(
+            self._instance._device_key(),
+            ExpectSession.PAGER_DISABLE_CAPABILITY,
+            "terminal length 0",
+        )
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_command_timing(
+        self, clear_buffer, send_line, loops_detected
+    ):
+        clear_buffer.return_value = ""
+        timing_callback = Mock()
+        instance = ExpectSessionImpl(timing_callback=timing_callback)
+        instance._receive = lambda timeout, logger: ExpectSession._receive(
+            instance, timeout, logger
+        )
+        instance._receive_bytes = Mock(
+            side_effect=[
+                b"show version\nversion 1\n",
+                SessionReadTimeout(),
+                b"switch#",
+                SessionReadTimeout(),
+            ]
+        )
+        output = instance.hardware_expect("show version", "switch#", self._logger)
+        self.assertEqual(output, "version 1\nswitch#")
+        timing = instance.last_command_timing
+        timing_callback.assert_called_once_with(timing)
+        self.assertEqual(timing.command, "show version")
+        self.assertEqual(timing.bytes_received, 30)
+        self.assertEqual(timing.chunks, 2)
+        self.assertIsNotNone(timing.first_byte)
+        self.assertGreaterEqual(timing.prompt_match, timing.first_byte)
+        self.assertGreaterEqual(timing.total, timing.prompt_match)
+        self.assertEqual(timing.actions, 0)
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_command_timing_on_error(
+        self, clear_buffer, receive_all, send_line, loops_detected
+    ):
+        clear_buffer.return_value = ""
+        receive_all.side_effect = ExpectedSessionException("Socket closed by timeout")
+        with self.assertRaises(ExpectedSessionException):
+            self._instance.hardware_expect("show version", "switch#", self._logger)
+        timing = self._instance.last_command_timing
+        self.assertEqual(timing.command, "show version")
+        self.assertIsNone(timing.first_byte)
+        self.assertIsNone(timing.prompt_match)
+        self.assertIsNotNone(timing.total)
+
+    @patch("cloudshell.cli.session.expect_session.get_tracer")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession.send_line")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_span(
+        self,
+        clear_buffer,
+        receive_all,
+        send_line,
+        get_tracer,
+        loops_detected,
+    ):
+        exporter = Mock()
+        get_tracer.return_value = SpanTracer(exporter)
+        clear_buffer.return_value = ""
+        receive_all.return_value = "show version\nswitch#"
+        self._instance.hardware_expect("show version", "switch#", self._logger)
+        span = exporter.export.call_args[0][0]
+        self.assertEqual(span.name, "session.hardware_expect")
+        self.assertEqual(
+            span.attributes, {"command": "show version", "bytes_received": 0}
+        )
+
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._receive_all")
+    @patch("cloudshell.cli.session.expect_session.ExpectSession._clear_buffer")
+    def test_hardware_expect_transcript(
+        self, clear_buffer, receive_all, loops_detected
+    ):
+        transcript = Mock()
+        instance = ExpectSessionImpl(transcript=transcript)
+        instance._send = self._send
+        clear_buffer.return_value = ""
+        receive_all.return_value = "show version\n% Invalid input\nswitch#"
+        with self.assertRaises(CommandExecutionException):
+            instance.hardware_expect(
+                "show version",
+                "switch#",
+                self._logger,
+                error_map={"Invalid input": "Invalid command"},
+            )
+        transcript.record.assert_has_calls(
+            [
+                call(TranscriptRecorder.SENT, "show version"),
+                call(
+                    TranscriptRecorder.RECEIVED,
+                    "show version\n% Invalid input\nswitch#",
+                ),
+            ]
+        )
+        transcript.flush.assert_called_once_with()
+        self._logger.debug.assert_called_once_with("Command: %s", "show version")
+
+    def test_reconnect_disconnect_call(self, loops_detected):
         prompt = Mock()
         self._instance.reconnect(prompt, self._logger)
         self._disconnect.assert_called_once_with()
 
-    def test_reconnect_connect_call(self, normalize_buffer, loops_detected):
+    def test_reconnect_connect_call(self, loops_detected):
         prompt = Mock()
         self._instance.reconnect(prompt, self._logger)
         self._connect.assert_called_once_with(prompt, self._logger)
 
-    def test_reconnect_raise_timeout_exception(self, normalize_buffer, loops_detected):
+    def test_reconnect_raise_timeout_exception(self, loops_detected):
         prompt = Mock()
         exception = ExpectedSessionException
         self._connect.side_effect = Exception()
@@ -364,3 +1224,32 @@ class TestActionLoopDetector(TestCase):
             if self._instance.loops_detected(key):
                 loop_detected = True
         self.assertFalse(loop_detected)
+
+    def test_same_as_history_comparison(self):
+        def previous_loops_detected(history, max_loops, max_combination_length):
+            reversed_history = history[::-1]
+            for combination_length in range(1, max_combination_length + 1):
+                if len(history) / combination_length < max_loops:
+                    continue
+                combinations = [
+                    reversed_history[x : x + combination_length]
+                    for x in range(0, len(reversed_history), combination_length)
+                ][:max_loops]
+                if all(x == combinations[0] for x in combinations):
+                    return True
+            return False
+
+        rand = random.Random(0)
+        for _ in range(300):
+            max_loops = rand.randint(1, 4)
+            max_combination_length = rand.randint(1, 4)
+            keys = ["key{}".format(i) for i in range(rand.randint(1, 3))]
+            detector = ActionLoopDetector(max_loops, max_combination_length)
+            history = []
+            for _ in range(rand.randint(1, 40)):
+                key = rand.choice(keys)
+                history.append(key)
+                self.assertEqual(
+                    detector.loops_detected(key),
+                    previous_loops_detected(history, max_loops, max_combination_length),
+                )
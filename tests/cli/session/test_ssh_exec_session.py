@@ -0,0 +1,81 @@
+from threading import Lock
+from unittest import TestCase
+
+from cloudshell.cli.session.session_exceptions import CommandExecutionException
+from cloudshell.cli.session.ssh_exec_session import ExecResult, SSHExecSession
+
+from tests.cli.session.test_ssh_session import SSHServer
+
+try:
+    from unittest.mock import Mock
+except ImportError:
+    from mock import Mock
+
+
+class TestSSHExecSession(TestCase):
+    def setUp(self):
+        self._server = SSHServer(user2password={"user1": "password1"})
+        self._logger = Mock()
+        self._instance = SSHExecSession(
+            "127.0.0.1",
+            "user1",
+            "password1",
+            port=self._server.port,
+            on_session_start=Mock(),
+        )
+        self._instance.connect(">", logger=self._logger)
+        self.addCleanup(self._instance.disconnect)
+
+    def test_exec_command(self):
+        result = self._instance.exec_command("show", self._logger)
+        self.assertEqual(
+            result,
+            ExecResult('show\noutput of "s h o w "\n[prompt] $ # > ', "", 0),
+        )
+
+    def test_exec_commands(self):
+        results = self._instance.exec_commands(["a", "b", "c"], self._logger)
+        self.assertEqual(
+            [result.stdout.splitlines()[1] for result in results],
+            ['output of "a "', 'output of "b "', 'output of "c "'],
+        )
+
+    def test_exec_commands_max_channels(self):
+        exec_command = self._instance.exec_command
+        lock = Lock()
+        active = []
+        max_active = []
+
+        def limited_exec_command(command, logger, timeout=None):
+            with lock:
+                active.append(command)
+                max_active.append(len(active))
+            try:
+                return exec_command(command, logger, timeout)
+            finally:
+                with lock:
+                    active.remove(command)
+
+        self._instance.exec_command = limited_exec_command
+        commands = ["c{}".format(index) for index in range(12)]
+        results = self._instance.exec_commands(commands, self._logger, max_channels=2)
+        self.assertEqual(
+            [result.stdout.splitlines()[0] for result in results], commands
+        )
+        self.assertLessEqual(max(max_active), 2)
+
+    def test_hardware_expect(self):
+        output = self._instance.hardware_expect("show", None, self._logger)
+        self.assertIn('output of "s h o w "', output)
+        self.assertTrue(self._instance.match_prompt(">", "", self._logger))
+
+    def test_send_commands_error_maps(self):
+        with self.assertRaises(CommandExecutionException) as context:
+            self._instance.send_commands(
+                ["a", "b"],
+                None,
+                self._logger,
+                error_map={"failed": "Common error"},
+                error_maps=[None, {"output": "Command error"}],
+            )
+        self.assertIn("Command error", str(context.exception))
@@ -8,6 +8,7 @@ from unittest import TestCase
 import paramiko
 from paramiko import RSAKey
 
+from cloudshell.cli.session.helper.ssh_tuning_profile import SSHTuningProfile
 from cloudshell.cli.session.ssh_session import SSHSession, SSHSessionException
 
 try:
@@ -554,6 +555,78 @@ class TestSshSession(TestCase):
         self._instance.connect(">", logger=Mock())
         self._instance.hardware_expect("dummy command", ">", Mock())
 
+    def test_tuning_profile(self):
+        server = SSHServer(user2password={"user0": "password0"})
+        self._instance = SSHSession(
+            "127.0.0.1",
+            "user0",
+            "password0",
+            port=server.port,
+            on_session_start=self._on_session_start,
+            tuning_profile=SSHTuningProfile(
+                compression=True,
+                ciphers=["aes256-ctr"],
+                window_size=4194304,
+                keepalive_interval=60,
+            ),
+        )
+        self._instance.connect(">", logger=Mock())
+        self._instance.hardware_expect("dummy command", ">", Mock())
+        transport = self._instance._handler.get_transport()
+        self.assertEqual(transport.remote_cipher, "aes256-ctr")
+        self.assertEqual(transport.default_window_size, 4194304)
+        self.assertEqual(transport.packetizer._Packetizer__keepalive_interval, 60)
+
+    def test_share_transport(self):
+        server = SSHServer(user2password={"user5": "password5"})
+        sessions = [
+            SSHSession(
+                "127.0.0.1",
+                "user5",
+                "password5",
+                port=server.port,
+                on_session_start=self._on_session_start,
+                share_transport=True,
+            )
+            for _ in range(2)
+        ]
+        for session in sessions:
+            session.connect(">", logger=Mock())
+        self.assertIs(sessions[0]._handler, sessions[1]._handler)
+        self.assertIsNot(sessions[0]._current_channel, sessions[1]._current_channel)
+        sessions[0].disconnect()
+        o = sessions[1].hardware_expect("dummy command", ">", Mock())
+        self.assertTrue("[prompt]" in o)
+        sessions[1].disconnect()
+
+    @patch("cloudshell.cli.session.ssh_session.SSH_TRANSPORTS")
+    def test_share_transport_rejected(self, ssh_transports):
+        shared_handler = Mock()
+        shared_handler.invoke_shell.side_effect = paramiko.ChannelException(
+            1, "Administratively prohibited"
+        )
+        ssh_transports.shareable.return_value = True
+        ssh_transports.acquire.return_value = (shared_handler, True)
+        self._instance = SSHSession(
+            "127.0.0.1", "user0", "password0", share_transport=True
+        )
+        self._instance._connect_handler = Mock()
+        self._instance._handler = None
+
+        def connect_handler(logger):
+            self._instance._handler = Mock()
+
+        self._instance._connect_handler.side_effect = connect_handler
+        self._instance._initialize_session(">", logger=Mock())
+        ssh_transports.release.assert_called_once_with(
+            ssh_transports.make_key.return_value, shared_handler
+        )
+        ssh_transports.set_not_shareable.assert_called_once_with(
+            ssh_transports.make_key.return_value
+        )
+        self.assertIsNot(self._instance._handler, shared_handler)
+        self.assertIsNone(self._instance._transport_key)
+
     def test_upload_sftp(self):
         server = SSHServer(
             user2password={"user0": "password0"}, enable_sftp=True, enable_scp=False
@@ -645,6 +718,27 @@ class TestSshSession(TestCase):
         self._instance.connect(">", logger=Mock())
         self._instance.hardware_expect("dummy command", ">", Mock())
 
+    def test_rsa_key_text(self):
+        pkey = paramiko.RSAKey.from_private_key(
+            StringIO(KEY_WITH_PASSPHRASE), password=KEY_PASSPHRASE
+        )
+
+        server = SSHServer(user2key={"user4": pkey})
+
+        self._instance = SSHSession(
+            "127.0.0.1",
+            "user4",
+            "",
+            port=server.port,
+            on_session_start=self._on_session_start,
+            pkey=KEY_WITH_PASSPHRASE,
+            pkey_password=KEY_PASSPHRASE,
+        )
+        self._instance.connect(">", logger=Mock())
+        self._instance.hardware_expect("dummy command", ">", Mock())
+        self.assertEqual(self._instance._get_pkey(), pkey)
+        self.assertIs(self._instance._get_pkey(), self._instance._get_pkey())
+
     def test_rsa_failure(self):
         pkey = paramiko.RSAKey.from_private_key(
             StringIO(KEY_WITH_PASSPHRASE), password=KEY_PASSPHRASE
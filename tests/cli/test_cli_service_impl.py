@@ -111,6 +111,15 @@ class TestEnterDetachCommandModeContextManager(TestCase):
         else:
             self.fail("context manager handle an error")
 
+    def test_enter_exit_without_command_modes(self):
+        self._cli_service.session.COMMAND_MODES = False
+        previous_mode = self._cli_service.command_mode
+        with self._instance as cli_service:
+            self.assertEqual(cli_service.command_mode, self._command_mode)
+        self.assertEqual(self._cli_service.command_mode, previous_mode)
+        self._command_mode.step_up.assert_not_called()
+        self._command_mode.step_down.assert_not_called()
+
 
 class TestCliOperationsImpl(TestCase):
     def setUp(self):
@@ -154,9 +163,36 @@ class TestCliOperationsImpl(TestCase):
             self._instance
         )
 
+    def test_init_determined_mode_pager_actions_call(self):
+        self._determined_command_mode.pager_actions.assert_called_once_with(
+            self._instance, self._logger
+        )
+
     def test_init_change_mod_call(self):
         self._change_mode_func.assert_called_once_with(self._command_mode)
 
+    @patch(
+        "cloudshell.cli.service.command_mode_helper.CommandModeHelper"
+        ".determine_current_mode"
+    )
+    def test_init_without_command_modes(self, determine_current_mode):
+        self._session.COMMAND_MODES = False
+        instance = CliServiceImpl(self._session, self._command_mode, self._logger)
+        self.assertEqual(instance.command_mode, self._command_mode)
+        determine_current_mode.assert_not_called()
+        self._command_mode.enter_actions.assert_not_called()
+
+    @patch(
+        "cloudshell.cli.service.command_mode_helper.CommandModeHelper"
+        ".calculate_route_steps"
+    )
+    def test_change_mode_without_command_modes(self, calculate_route_steps):
+        self._session.COMMAND_MODES = False
+        command_mode = Mock()
+        self._instance._change_mode(command_mode)
+        self.assertEqual(self._instance.command_mode, command_mode)
+        calculate_route_steps.assert_not_called()
+
     @patch("cloudshell.cli.service.cli_service_impl.EnterCommandModeContextManager")
     def test_enter_mode(self, command_mode_context_manager):
         command_mode_context_manager_instance = Mock()
@@ -205,6 +241,46 @@ class TestCliOperationsImpl(TestCase):
             logger=self._logger,
         )
 
+    def test_send_command_iter_hardware_expect_iter_call(self):
+        command = Mock()
+        expected_string = Mock()
+        self._instance.send_command_iter(
+            command, expected_string=expected_string, logger=self._logger
+        )
+        self._session.hardware_expect_iter.assert_called_once_with(
+            command,
+            action_map=None,
+            error_map=None,
+            expected_string=expected_string,
+            logger=self._logger,
+            lines=False,
+        )
+
+    def test_send_command_iter_remove_prompt(self):
+        self._session.hardware_expect_iter.return_value = iter(
+            ["output\n", "switch#"]
+        )
+        output = self._instance.send_command_iter(
+            "command", expected_string="switch#", remove_prompt=True
+        )
+        self.assertEqual(list(output), ["output\n", ""])
+
+    def test_send_commands_remove_prompt(self):
+        self._session.send_commands.return_value = ["output1\nswitch#", "output2"]
+        outputs = self._instance.send_commands(
+            ["command1", "command2"],
+            expected_string="switch#",
+            logger=self._logger,
+            remove_prompt=True,
+        )
+        self._session.send_commands.assert_called_once_with(
+            ["command1", "command2"],
+            expected_string="switch#",
+            error_map=None,
+            logger=self._logger,
+        )
+        self.assertEqual(outputs, ["output1\n", "output2"])
+
     @patch(
         "cloudshell.cli.service.command_mode_helper.CommandModeHelper"
         ".calculate_route_steps"
@@ -130,3 +130,25 @@ class TestCommandMode(TestCase):
 
         self.assertTrue(command_mode_a.is_attached_command_mode())
         self.assertFalse(command_mode_b.is_attached_command_mode())
+
+    def test_pager_actions_disable_pager(self):
+        cli_service = Mock()
+        command_mode = CommandMode(
+            "#", pager_disable_commands=["terminal length 0", "no page"]
+        )
+        command_mode.pager_actions(cli_service, self._logger)
+        cli_service.session.disable_pager.assert_called_once_with(
+            ["terminal length 0", "no page"], "#", self._logger
+        )
+
+    def test_pager_actions_without_pager_disable_commands(self):
+        cli_service = Mock()
+        self._command_mode.pager_actions(cli_service, self._logger)
+        cli_service.session.disable_pager.assert_not_called()
+
+    def test_step_up_call_pager_actions(self):
+        cli_service = Mock()
+        pager_actions = Mock()
+        self._command_mode.pager_actions = pager_actions
+        self._command_mode.step_up(cli_service, self._logger)
+        pager_actions.assert_called_once_with(cli_service, self._logger)
@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+from cloudshell.cli.configurator import CLIServiceConfigurator
+from cloudshell.cli.session.ssh_exec_session import SSHExecSession
+from cloudshell.cli.session.ssh_session import SSHSession
+from cloudshell.cli.session.telnet_session import TelnetSession
+
+try:
+    from unittest.mock import Mock
+except ImportError:
+    from mock import Mock
+
+
+class TestCLIServiceConfigurator(TestCase):
+    def _defined_session_types(self, cli_type):
+        resource_config = Mock(
+            address="127.0.0.1",
+            user="user",
+            password="password",
+            cli_tcp_port="",
+            cli_connection_type=cli_type,
+        )
+        configurator = CLIServiceConfigurator(resource_config, Mock(), cli=Mock())
+        return [type(session) for session in configurator._defined_sessions()]
+
+    def test_auto_sessions(self):
+        self.assertEqual(
+            self._defined_session_types("auto"), [SSHSession, TelnetSession]
+        )
+
+    def test_ssh_exec_session(self):
+        self.assertEqual(self._defined_session_types("SSH_EXEC"), [SSHExecSession])
+        self.assertEqual(self._defined_session_types("ssh"), [SSHSession])